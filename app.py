@@ -1,12 +1,30 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import (Flask, Response, g, render_template, request, jsonify, session, redirect, stream_with_context,
+                   url_for)
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
+import heapq
+import logging
 import requests
 import secrets
 import json
 import os
+import time
 import uuid
 from werkzeug.utils import secure_filename
-from utils import extract_text_from_pdf, get_embedding, calculate_similarity, generate_ai_insights, detect_fake_resume
+from dashboard_stats import get_dashboard_stats
+from document_cache import read_upload
+from embedding_cache import get_embedding_cache
+from job_library import get_job_library
+from logging_config import configure_logging
+from metrics import clear_metrics_dir, counter, histogram, render_metrics
+from result_store import get_result_store
+from background_jobs import get_job_manager
+from pipeline import (EMBEDDING_BATCH_SIZE, ROLE_MATCH_TOP_K, iter_score_texts, iter_search, match_roles,
+                      rerank_search, run_search, search_talent_pool, warm_up)
+from talent_pool import get_talent_pool
+from utils import get_embedding, model_status
+configure_logging()
+logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.secret_key = 'quantum_recruitment_secret_2024'
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
@@ -18,13 +36,65 @@ RECRUITERS = {
 }
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'txt'}
+# Uploads with more resumes than this are processed as a background job
+ASYNC_SEARCH_THRESHOLD = int(os.getenv('ASYNC_SEARCH_THRESHOLD', '10'))
+RESULTS_PER_PAGE = 25
+TALENT_POOL_TOP_K = int(os.getenv('TALENT_POOL_TOP_K', '50'))
+# Size of the running ranking sent while a search streams, and how often the stream polls the job
+STREAM_TOP_K = int(os.getenv('STREAM_TOP_K', '10'))
+STREAM_POLL_INTERVAL = 0.25
+# A stream ends with a "reconnect" event after this long, so no worker thread is held by one client indefinitely
+STREAM_MAX_SECONDS = int(os.getenv('STREAM_MAX_SECONDS', '300'))
+# Archiving uploads is optional and happens in the background
+PERSIST_UPLOADS = os.getenv('PERSIST_UPLOADS', '1') == '1'
+# Werkzeug rejects forms with more than 1000 parts, which a 1000-resume upload exceeds
+MAX_UPLOAD_FILES = int(os.getenv('MAX_UPLOAD_FILES', '5000'))
+# /api/v1 clients, as comma-separated name:token pairs (a bare token is named "api")
+API_TOKENS = os.getenv('API_TOKENS', '')
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+app.config['MAX_FORM_PARTS'] = MAX_UPLOAD_FILES + 10
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+upload_writer = ThreadPoolExecutor(max_workers=2)
+UPLOAD_SAVE_SECONDS = histogram('recruitment_upload_save_seconds', "Time to archive one upload to UPLOAD_FOLDER")
+UPLOAD_SAVE_FAILURES = counter('recruitment_upload_save_failures_total', "Uploads that could not be archived")
+HTTP_REQUEST_SECONDS = histogram('recruitment_http_request_seconds', "Time to build each response",
+                                 ('endpoint', 'method', 'status'))
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def persist_upload(data, filename, digest):
+    """Archive an upload to UPLOAD_FOLDER under its content hash; runs off the request path.
+
+    A file whose contents were archived before is not written again.
+    """
+    path = os.path.join(app.config['UPLOAD_FOLDER'], digest + os.path.splitext(filename)[1].lower())
+    if os.path.exists(path):
+        return
+    try:
+        with UPLOAD_SAVE_SECONDS.time():
+            with open(f"{path}.{uuid.uuid4().hex}.tmp", 'wb') as f:
+                f.write(data)
+            os.replace(f.name, path)
+    except OSError as e:
+        UPLOAD_SAVE_FAILURES.inc()
+        logger.warning("Could not archive upload %s: %s", filename, e)
+
+
+def read_resume_uploads():
+    """``(data, filename, digest)`` for each allowed file in the request's ``resumes`` field."""
+    documents = []
+    for file in request.files.getlist('resumes'):
+        if file and allowed_file(file.filename):
+            filename = secure_filename(file.filename)
+            data, digest = read_upload(file.stream)
+            if PERSIST_UPLOADS:
+                upload_writer.submit(persist_upload, data, filename, digest)
+            documents.append((data, filename, digest))
+    return documents
+
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -35,8 +105,70 @@ def login_required(f):
     return decorated_function
 
 
+def parse_api_tokens(value):
+    tokens = {}
+    for entry in filter(None, (part.strip() for part in value.split(','))):
+        name, separator, token = entry.partition(':')
+        tokens[token if separator else name] = name if separator else 'api'
+    return tokens
+
+
+api_clients = parse_api_tokens(API_TOKENS)
+
+
+def api_auth_required(f):
+    """Accept an ``Authorization: Bearer <token>`` from API_TOKENS, or a logged-in recruiter."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        client = None
+        if scheme.lower() == 'bearer' and token:
+            client = next((name for known, name in api_clients.items()
+                           if secrets.compare_digest(known.encode(), token.strip().encode())), None)
+        client = client or session.get('recruiter_email')
+        if client is None:
+            return jsonify({'success': False, 'message': 'Authentication required'}), 401, {
+                'WWW-Authenticate': 'Bearer'}
+        g.api_client = client
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def observe_request(response):
+    # Streaming responses are timed to their first byte
+    if 'request_started' in g:
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - g.request_started, endpoint=request.endpoint or 'unknown',
+                                     method=request.method, status=response.status_code)
+    return response
+
+
 # ---------- Routes ----------
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics summed over every worker"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/health/live')
+def health_live():
+    return jsonify({'status': 'ok'})
+
+
+@app.route('/health/ready')
+def health_ready():
+    """503 until this worker's model is loaded and warmed up"""
+    status = model_status()
+    return jsonify(status), 200 if status['warmed'] else 503
+
+
 @app.route('/')
 def index():
     return redirect(url_for('login'))
@@ -128,8 +260,7 @@ def google_auth_callback():
             return "Failed to get user info from Google", 400
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Google authentication failed")
         return f"Authentication failed: {str(e)}", 400
 
 
@@ -138,13 +269,16 @@ def google_auth_callback():
 def dashboard():
     recruiter_email = session.get('recruiter_email')
     recruiter_data = RECRUITERS.get(recruiter_email, {})
-    dashboard_data = {
-        'total_candidates': 156,
-        'interviews': 42,
-        'hired': 18,
-        'recruiter': recruiter_data
-    }
-    return render_template('dashboard.html', data=dashboard_data)
+    stats = get_dashboard_stats().summary(recruiter=recruiter_email)
+    dashboard_data = dict(stats, recruiter=dict(recruiter_data, recent_selections=stats['recent_outreach']))
+    return render_template('dashboard.html', data=dashboard_data, stats=stats)
+
+
+@app.route('/api/dashboard/stats')
+@login_required
+def dashboard_stats():
+    """Running totals of search and outreach activity, as shown on the dashboard"""
+    return jsonify({'success': True, 'stats': get_dashboard_stats().summary(recruiter=session.get('recruiter_email'))})
 
 
 @app.route('/quantum-search', methods=['GET', 'POST'])
@@ -152,132 +286,480 @@ def dashboard():
 def quantum_search():
     if request.method == 'POST':
         job_description = request.form.get('job_description', '')
-        uploaded_files = request.files.getlist('resumes')
-        analyzed_candidates = []
-
-        print(f"\n🔍 Starting Quantum Search with {len(uploaded_files)} resumes")
-        print(f"📋 Job Description: {job_description[:100]}...")
-
-        # Get job description embedding once
-        job_embedding = get_embedding(job_description)
-
-        for idx, file in enumerate(uploaded_files):
-            if file and allowed_file(file.filename):
-                print(f"\n📄 Processing {idx + 1}/{len(uploaded_files)}: {file.filename}")
-
-                filename = secure_filename(file.filename)
-                unique_filename = f"{uuid.uuid4()}_{filename}"
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-                file.save(file_path)
-
-                # Extract actual resume text
-                resume_text = extract_text_from_pdf(open(file_path, 'rb'))
-                print(f"✅ Extracted {len(resume_text)} characters from resume")
-
-                # Get resume embedding and calculate similarity
-                resume_embedding = get_embedding(resume_text)
-                similarity_score = calculate_similarity(job_embedding, resume_embedding)
-                match_percentage = int(similarity_score * 100)
-
-                print(f"🎯 Match Score: {match_percentage}%")
-
-                # Generate candidate name from filename
-                candidate_name = filename.replace('.pdf', '').replace('_', ' ').replace('-', ' ').title()
-
-                # Generate AI insights
-                ai_analysis = generate_ai_insights(job_description, resume_text, candidate_name)
-
-                # Detect fake resume
-                fake_check = detect_fake_resume(resume_text, candidate_name)
-
-                # Determine status based on score
-                if match_percentage >= 85:
-                    status = 'Perfect Match'
-                elif match_percentage >= 70:
-                    status = 'Strong Match'
-                elif match_percentage >= 50:
-                    status = 'Good Match'
-                else:
-                    status = 'Partial Match'
-
-                # Extract email (or generate one)
-                import re
-                email_match = re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', resume_text)
-                candidate_email = email_match.group(
-                    0) if email_match else f"{candidate_name.lower().replace(' ', '.')}@email.com"
-
-                analyzed_candidates.append({
-                    'name': candidate_name,
-                    'email': candidate_email,
-                    'filename': filename,
-                    'score': match_percentage,
-                    'status': status,
-                    'matched_keywords': ai_analysis['skill_gap_analysis']['strong_skills'],
-                    'experience': '3+ years' if match_percentage > 70 else '1-3 years',
-                    'ai_insights': ai_analysis,
-                    'fake_detection': fake_check,
-                    'resume_text': resume_text  # Store for scorecard view
-                })
-
-                print(f"✨ Analysis complete: {status}")
-
-        # Sort by score
-        analyzed_candidates.sort(key=lambda x: x['score'], reverse=True)
-
-        session['last_search_results'] = {
-            'job_description': job_description,
-            'total_resumes': len(analyzed_candidates),
-            'matched_candidates': len([c for c in analyzed_candidates if c['score'] >= 50]),
-            'shortlisted': len([c for c in analyzed_candidates if c['score'] >= 85]),
-            'candidates': analyzed_candidates
-        }
 
-        print(f"\n🎉 Search Complete: {len(analyzed_candidates)} candidates analyzed")
-        return redirect(url_for('results'))
+        # Read uploads into memory, hashing them for deduplication; archiving them is a background side step
+        documents = read_resume_uploads()
+
+        owner = session.get('recruiter_email')
+        wants_json = request.accept_mimetypes.best == 'application/json'
+        if wants_json or len(documents) > ASYNC_SEARCH_THRESHOLD:
+            # Large batches run on the job pool so this worker can keep serving requests
+            job_id = get_job_manager().submit(job_description, documents, owner=owner)
+            session['last_search_id'] = job_id
+            if wants_json:
+                return jsonify({
+                    'success': True,
+                    'job_id': job_id,
+                    'status_url': url_for('search_job_status', job_id=job_id),
+                    'stream_url': url_for('search_job_stream', job_id=job_id),
+                    'results_url': url_for('search_job_results', job_id=job_id)
+                }), 202
+            return redirect(url_for('search_job_page', job_id=job_id))
+
+        analyzed_candidates, embeddings = run_search(job_description, documents)
+        search_id = get_result_store().save(job_description, analyzed_candidates, owner=owner, embeddings=embeddings)
+        session['last_search_id'] = search_id
+        return redirect(url_for('results', search_id=search_id))
 
     return render_template('quantum_search.html')
 
 
+@app.route('/quantum-search/jobs/<job_id>')
+@login_required
+def search_job_page(job_id):
+    """Progress page for a background search"""
+    job = get_job_manager().get(job_id, owner=session.get('recruiter_email'))
+    if job is None:
+        return redirect(url_for('quantum_search'))
+    if job['status'] == 'completed':
+        return redirect(url_for('results', search_id=job['search_id']))
+    return render_template('search_job.html', job=job)
+
+
+@app.route('/api/jobs/<job_id>')
+@login_required
+def search_job_status(job_id):
+    """Per-stage progress of a background search"""
+    job = get_job_manager().get(job_id, owner=session.get('recruiter_email'))
+    if job is None:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    job.pop('owner', None)
+    if job['status'] == 'completed':
+        job['results_url'] = url_for('results', search_id=job['search_id'])
+    return jsonify({'success': True, 'job': job})
+
+
+@app.route('/api/jobs/<job_id>/results')
+@login_required
+def search_job_results(job_id):
+    """Ranked candidates of a finished background search"""
+    owner = session.get('recruiter_email')
+    job = get_job_manager().get(job_id, owner=owner)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    if job['status'] != 'completed':
+        return jsonify({'success': False, 'status': job['status'], 'message': 'Job not finished'}), 202
+    results_data = get_result_store().get(job['search_id'], owner=owner)
+    if results_data is None:
+        return jsonify({'success': False, 'message': 'Results expired'}), 410
+    return jsonify({
+        'success': True,
+        'search_id': job['search_id'],
+        'job_description': results_data['job_description'],
+        'candidates': [{key: value for key, value in candidate.items() if key != 'resume_text'}
+                       for candidate in results_data['candidates']]
+    })
+
+
+@app.route('/api/jobs/<job_id>/stream')
+@login_required
+def search_job_stream(job_id):
+    """Stream a background search's candidates as they are scored.
+
+    Server-sent events by default: a ``candidate`` event per scored resume,
+    ``ranking`` with the running top-K, ``progress`` with the stage counters
+    and a final ``done``. ``?format=ndjson`` sends the same events as
+    newline-delimited JSON objects with an ``event`` key instead.
+
+    A stream still open after STREAM_MAX_SECONDS ends with a ``reconnect``
+    event carrying an ``offset``; requesting the stream again with
+    ``?offset=`` carries on from there with the same running ranking.
+    """
+    manager = get_job_manager()
+    job = manager.get(job_id, owner=session.get('recruiter_email'))
+    if job is None:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    ndjson = request.args.get('format') == 'ndjson'
+    results_url = url_for('results', search_id=job_id)
+
+    def encode(event, data):
+        if ndjson:
+            return json.dumps({'event': event, 'data': data}) + '\n'
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    resume_offset = max(request.args.get('offset', 0, type=int), 0)
+
+    def generate():
+        deadline = time.monotonic() + STREAM_MAX_SECONDS
+        top = []  # min-heap of (score, arrival, candidate)
+        arrivals = 0
+        last_stages = None
+
+        def add(candidate):
+            nonlocal arrivals
+            arrivals += 1
+            entry = (candidate['score'], -arrivals, candidate)
+            if len(top) < STREAM_TOP_K:
+                heapq.heappush(top, entry)
+            elif entry[:2] > top[0][:2]:
+                heapq.heapreplace(top, entry)
+
+        # Rebuild the ranking from the candidates an earlier connection already sent
+        seen, offset = manager.read_events(job_id, 0, end=resume_offset)
+        for candidate in seen:
+            add(candidate)
+        while True:
+            status = manager.get(job_id)
+            if status is None:
+                yield encode('done', {'status': 'expired'})
+                return
+            # Read events after the status so a finished job's last candidates are never missed
+            events, offset = manager.read_events(job_id, offset)
+            for candidate in events:
+                add(candidate)
+                yield encode('candidate', candidate)
+            if events:
+                ranking = [candidate for _, _, candidate in sorted(top, key=lambda e: e[:2], reverse=True)]
+                yield encode('ranking', {'candidates': ranking, 'scored': arrivals})
+            if status['stages'] != last_stages:
+                last_stages = status['stages']
+                yield encode('progress', {'status': status['status'], 'stages': last_stages})
+            if status['status'] in ('completed', 'failed'):
+                yield encode('done', {'status': status['status'], 'error': status['error'],
+                                      'results_url': results_url if status['status'] == 'completed' else None})
+                return
+            if time.monotonic() >= deadline:
+                yield encode('reconnect', {'offset': offset, 'url': url_for(
+                    'search_job_stream', job_id=job_id, offset=offset, format='ndjson' if ndjson else None)})
+                return
+            if not events:
+                time.sleep(STREAM_POLL_INTERVAL)
+
+    return Response(stream_with_context(generate()),
+                    mimetype='application/x-ndjson' if ndjson else 'text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def query_flag(name, default=True):
+    value = request.args.get(name)
+    return default if value is None else value.lower() not in ('0', 'false', 'no', 'off')
+
+
+class InvalidResumeLine(ValueError):
+    pass
+
+
+def iter_ndjson_resumes(stream):
+    """``(filename, text)`` pairs from the resume lines of an NDJSON request body."""
+    for number, line in enumerate(stream, start=2):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            raise InvalidResumeLine(f"line {number} is not valid JSON")
+        if not isinstance(item, dict) or not isinstance(item.get('text'), str):
+            raise InvalidResumeLine(f'line {number} has no "text" string')
+        name = str(item.get('filename') or item.get('id') or '')
+        yield secure_filename(name) or f"resume_{number - 1}", item['text']
+
+
+@app.route('/api/v1/score', methods=['POST'])
+@api_auth_required
+def api_score():
+    """Score many resumes against one job description, streaming the candidates as NDJSON.
+
+    Send multipart/form-data with a ``job_description`` field and
+    ``resumes`` files, or an application/x-ndjson body of already-extracted
+    text: a first line ``{"job_description": ...}``, then one
+    ``{"filename": ..., "text": ...}`` line per resume, read as it arrives
+    rather than held in memory.
+    Query options: ``top_k`` to rank, ``insights=0`` and
+    ``fake_detection=0`` to skip those stages, and ``resume_text=1`` to
+    return each resume's text.
+
+    The response is newline-delimited ``{"event": ..., "data": ...}``
+    objects and ends with a ``done``. With ``top_k``, ``progress`` is sent
+    as batches are scored, then a ``candidate`` per result, best first
+    with its ``rank``; only the best ``top_k`` are kept while scoring.
+    Without it, each ``candidate`` is sent unranked as soon as it is
+    scored, so nothing accumulates however many resumes are streamed in.
+    A problem found after the response has started is sent as an
+    ``error`` event.
+    """
+    try:
+        top_k = int(request.args['top_k']) if request.args.get('top_k') else None
+    except ValueError:
+        top_k = 0
+    if top_k is not None and top_k < 1:
+        return jsonify({'success': False, 'message': 'top_k must be a positive integer'}), 400
+    options = {'insights': query_flag('insights'), 'detect_fake': query_flag('fake_detection')}
+    if options['insights'] and not options['detect_fake']:
+        return jsonify({'success': False, 'message': 'insights need fake_detection; pass insights=0 too'}), 400
+    include_text = query_flag('resume_text', default=False)
+
+    ndjson = request.mimetype in ('application/x-ndjson', 'application/jsonl')
+    if ndjson:
+        try:
+            header = json.loads(request.stream.readline() or b'{}')
+        except ValueError:
+            header = None
+        job_description = header.get('job_description', '') if isinstance(header, dict) else ''
+    else:
+        job_description = request.form.get('job_description', '')
+    # Before any upload is read, archived or cached
+    if not isinstance(job_description, str) or not job_description.strip():
+        return jsonify({'success': False, 'message': 'job_description is required'}), 400
+
+    if ndjson:
+        def scored():
+            for candidate, _ in iter_score_texts(job_description, iter_ndjson_resumes(request.stream), kind='api',
+                                                 **options):
+                yield candidate
+    else:
+        # Read now: Flask closes uploaded files when the view returns, before the response streams
+        documents = read_resume_uploads()
+
+        def scored():
+            for candidate, _ in iter_search(job_description, documents, kind='api', **options):
+                yield candidate
+
+    def encode(event, data):
+        return json.dumps({'event': event, 'data': data}) + '\n'
+
+    def generate():
+        started = time.perf_counter()
+        top = []  # min-heap of (score, -arrival, candidate) when top_k is set
+        count = 0
+        try:
+            for candidate in scored():
+                count += 1
+                if not include_text:
+                    candidate.pop('resume_text', None)
+                if top_k is None:
+                    yield encode('candidate', candidate)
+                    continue
+                entry = (candidate['score'], -count, candidate)
+                if len(top) < top_k:
+                    heapq.heappush(top, entry)
+                elif entry[:2] > top[0][:2]:
+                    heapq.heapreplace(top, entry)
+                if count % EMBEDDING_BATCH_SIZE == 0:
+                    yield encode('progress', {'scored': count})
+        except InvalidResumeLine as e:
+            yield encode('error', {'message': str(e), 'scored': count})
+            return
+        except Exception:
+            logger.exception("API scoring failed after %d resumes", count, extra={'client': g.api_client})
+            yield encode('error', {'message': 'Scoring failed', 'scored': count})
+            return
+        ranking = [candidate for _, _, candidate in sorted(top, key=lambda e: e[:2], reverse=True)]
+        for rank, candidate in enumerate(ranking, start=1):
+            yield encode('candidate', dict(candidate, rank=rank))
+        yield encode('done', {'scored': count, 'returned': count if top_k is None else len(ranking),
+                              'took_ms': round((time.perf_counter() - started) * 1000, 2)})
+        logger.info("API scored %d resumes for %s", count, g.api_client, extra={'resumes': count})
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/talent-pool', methods=['POST'])
+@login_required
+def talent_pool_search():
+    """Match a job description against every previously processed resume"""
+    job_description = request.form.get('job_description', '')
+    owner = session.get('recruiter_email')
+    analyzed_candidates, embeddings = search_talent_pool(job_description, top_k=TALENT_POOL_TOP_K)
+    search_id = get_result_store().save(job_description, analyzed_candidates, owner=owner, embeddings=embeddings)
+    session['last_search_id'] = search_id
+    return redirect(url_for('results', search_id=search_id))
+
+
+@app.route('/api/talent-pool/search', methods=['POST'])
+@login_required
+def api_talent_pool_search():
+    """Nearest pooled candidates for a job description, without per-job analysis"""
+    data = request.get_json(silent=True) or {}
+    job_description = data.get('job_description', '')
+    if not job_description.strip():
+        return jsonify({'success': False, 'message': 'job_description is required'}), 400
+    try:
+        top_k = int(data.get('top_k', TALENT_POOL_TOP_K))
+    except (TypeError, ValueError):
+        top_k = 0
+    if top_k < 1:
+        return jsonify({'success': False, 'message': 'top_k must be a positive integer'}), 400
+    top_k = min(top_k, 1000)
+    started = time.perf_counter()
+    hits = get_talent_pool().search(get_embedding(job_description), top_k=top_k)
+    return jsonify({
+        'success': True,
+        'took_ms': round((time.perf_counter() - started) * 1000, 2),
+        'candidates': [{key: value for key, value in hit.items() if key not in ('resume_text', 'embedding')}
+                       for hit in hits]
+    })
+
+
+@app.route('/api/talent-pool/stats')
+@login_required
+def talent_pool_stats():
+    return jsonify(get_talent_pool().stats())
+
+
+@app.route('/roles', methods=['GET', 'POST'])
+@login_required
+def roles():
+    """The job library: saved roles, a form to add one, and batch matching against the open ones"""
+    if request.method == 'POST':
+        title = request.form.get('title', '').strip()
+        description = request.form.get('description', '').strip()
+        if title and description:
+            get_job_library().add(title, description, created_by=session.get('recruiter_email'))
+        return redirect(url_for('roles'))
+    return render_template('roles.html', roles=get_job_library().list())
+
+
+@app.route('/roles/<role_id>/status', methods=['POST'])
+@login_required
+def role_status(role_id):
+    get_job_library().update(role_id, status='closed' if request.form.get('status') == 'closed' else 'open')
+    return redirect(url_for('roles'))
+
+
+@app.route('/roles/<role_id>/delete', methods=['POST'])
+@login_required
+def delete_role(role_id):
+    get_job_library().delete(role_id)
+    return redirect(url_for('roles'))
+
+
+@app.route('/roles/match', methods=['POST'])
+@login_required
+def roles_match():
+    """Match uploaded resumes against every open role at once"""
+    open_roles, role_embeddings = get_job_library().open_roles()
+    if not open_roles:
+        return redirect(url_for('roles'))
+    matches = match_roles(read_resume_uploads(), open_roles, role_embeddings)
+    return render_template('role_match.html', **matches)
+
+
+@app.route('/api/roles', methods=['GET', 'POST'])
+@api_auth_required
+def api_roles():
+    """List the job library, or add a role from ``{"title": ..., "description": ...}``"""
+    library = get_job_library()
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        title, description = str(data.get('title', '')).strip(), str(data.get('description', '')).strip()
+        if not title or not description:
+            return jsonify({'success': False, 'message': 'title and description are required'}), 400
+        return jsonify({'success': True, 'role': library.add(title, description, created_by=g.api_client)}), 201
+    return jsonify({'success': True, 'roles': library.list(status=request.args.get('status'))})
+
+
+@app.route('/api/roles/<role_id>', methods=['PATCH', 'DELETE'])
+@api_auth_required
+def api_role(role_id):
+    """Edit a role's ``title``, ``description`` or ``status`` (open/closed), or delete it"""
+    library = get_job_library()
+    if request.method == 'DELETE':
+        if not library.delete(role_id):
+            return jsonify({'success': False, 'message': 'Role not found'}), 404
+        return jsonify({'success': True})
+    data = request.get_json(silent=True) or {}
+    try:
+        role = library.update(role_id, title=data.get('title'), description=data.get('description'),
+                              status=data.get('status'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    if role is None:
+        return jsonify({'success': False, 'message': 'Role not found'}), 404
+    return jsonify({'success': True, 'role': role})
+
+
+@app.route('/api/roles/match', methods=['POST'])
+@api_auth_required
+def api_roles_match():
+    """Best-fitting open role for each uploaded resume, and the best resumes for each open role"""
+    open_roles, role_embeddings = get_job_library().open_roles()
+    if not open_roles:
+        return jsonify({'success': False, 'message': 'No open roles in the job library'}), 409
+    top_k = min(max(request.args.get('top_k', ROLE_MATCH_TOP_K, type=int), 1), 1000)
+    started = time.perf_counter()
+    matches = match_roles(read_resume_uploads(), open_roles, role_embeddings, top_k=top_k)
+    return jsonify(dict(matches, success=True, took_ms=round((time.perf_counter() - started) * 1000, 2)))
+
+
 @app.route('/results')
 @login_required
 def results():
-    results_data = session.get('last_search_results', {
-        'job_description': 'No search performed yet',
-        'total_resumes': 0,
-        'matched_candidates': 0,
-        'shortlisted': 0,
-        'candidates': []
-    })
+    search_id = request.args.get('search_id') or session.get('last_search_id')
+    page = request.args.get('page', 1, type=int)
+    per_page = min(max(request.args.get('per_page', RESULTS_PER_PAGE, type=int), 1), 200)
+    results_data = get_result_store().page(search_id, page, per_page, owner=session.get('recruiter_email'))
+    if results_data is None and get_job_manager().get(search_id, owner=session.get('recruiter_email')):
+        # Still running in the background
+        return redirect(url_for('search_job_page', job_id=search_id))
+    if results_data is None:
+        results_data = {
+            'search_id': None,
+            'job_description': 'No search performed yet',
+            'total_resumes': 0,
+            'matched_candidates': 0,
+            'shortlisted': 0,
+            'candidates': [],
+            'page': 1,
+            'per_page': per_page,
+            'total_pages': 1,
+            'rank_offset': 0
+        }
     return render_template('results.html', **results_data)
 
 
-@app.route('/scorecard/<candidate_name>')
+@app.route('/results/rerank', methods=['POST'])
 @login_required
-def scorecard(candidate_name):
+def rerank_results():
+    """Re-rank an existing search's candidates against an edited job description"""
+    owner = session.get('recruiter_email')
+    search_id = request.form.get('search_id', '')
+    job_description = request.form.get('job_description', '')
+    store = get_result_store()
+    record = store.get(search_id, owner=owner)
+    if record is None or not job_description.strip():
+        return redirect(url_for('results', search_id=search_id))
+    candidates, embeddings = rerank_search(job_description, record['candidates'],
+                                           store.get_embeddings(search_id, owner=owner))
+    new_search_id = store.save(job_description, candidates, owner=owner, embeddings=embeddings,
+                               parent_search_id=search_id)
+    session['last_search_id'] = new_search_id
+    return redirect(url_for('results', search_id=new_search_id))
+
+
+@app.route('/scorecard/<candidate_id>')
+@login_required
+def scorecard(candidate_id):
     """Display detailed scorecard for a candidate"""
-    results = session.get('last_search_results', {})
-    candidates = results.get('candidates', [])
-
-    candidate = next((c for c in candidates if c['name'] == candidate_name), None)
+    search_id = request.args.get('search_id') or session.get('last_search_id')
+    results, candidate = get_result_store().get_candidate(search_id, candidate_id,
+                                                          owner=session.get('recruiter_email'))
 
     if not candidate:
         return redirect(url_for('results'))
 
-    job_description = results.get('job_description', '')
-
     return render_template('scorecard.html',
                            candidate=candidate,
-                           job_description=job_description)
+                           job_description=results['job_description'])
 
 
-@app.route('/api/candidate-details/<candidate_name>')
+@app.route('/api/candidate-details/<candidate_id>')
 @login_required
-def candidate_details(candidate_name):
+def candidate_details(candidate_id):
     """Get detailed information about a specific candidate"""
-    results = session.get('last_search_results', {})
-    candidates = results.get('candidates', [])
-
-    candidate = next((c for c in candidates if c['name'] == candidate_name), None)
+    search_id = request.args.get('search_id') or session.get('last_search_id')
+    _, candidate = get_result_store().get_candidate(search_id, candidate_id,
+                                                    owner=session.get('recruiter_email'))
 
     if candidate:
         return jsonify({'success': True, 'candidate': candidate})
@@ -285,6 +767,13 @@ def candidate_details(candidate_name):
         return jsonify({'success': False, 'message': 'Candidate not found'})
 
 
+@app.route('/api/embedding-cache/stats')
+@login_required
+def embedding_cache_stats():
+    """Report embedding cache hit/miss counts for this worker"""
+    return jsonify({'success': True, 'stats': get_embedding_cache().stats()})
+
+
 @app.route('/api/generate-email', methods=['POST'])
 @login_required
 def generate_email():
@@ -376,10 +865,10 @@ def send_email():
         #     server.send_message(message)
 
         # For now, just log it
-        print(f"\n📧 EMAIL WOULD BE SENT:")
-        print(f"To: {candidate_email}")
-        print(f"Subject: {subject}")
-        print(f"Content:\n{content}\n")
+        logger.info("Email would be sent to %s: %s\n%s", candidate_email, subject, content,
+                    extra={'to': candidate_email, 'subject': subject})
+        get_dashboard_stats().record_outreach(session.get('recruiter_email'), data.get('candidate_name'),
+                                              candidate_email, score=data.get('score'), role=data.get('role'))
 
         return jsonify({
             'success': True,
@@ -387,7 +876,7 @@ def send_email():
         })
 
     except Exception as e:
-        print(f"❌ Email error: {e}")
+        logger.error("Email error: %s", e)
         return jsonify({
             'success': False,
             'message': f'Failed to send email: {str(e)}'
@@ -402,4 +891,6 @@ def logout():
 
 # ---------- MAIN ----------
 if __name__ == '__main__':
+    clear_metrics_dir()
+    warm_up()
     app.run(debug=True, host='127.0.0.1', port=5000)
\ No newline at end of file
@@ -0,0 +1,203 @@
+# background_jobs.py
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline import STAGES, iter_search, rank
+from result_store import get_result_store
+
+JOBS_FOLDER = os.getenv('JOBS_FOLDER', 'jobs')
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+JOB_RETENTION_SECONDS = int(os.getenv('JOB_RETENTION_SECONDS', str(24 * 3600)))
+PROGRESS_WRITE_INTERVAL = 0.5
+JOB_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+# Candidate fields streamed to the browser while a search is still running
+STREAM_FIELDS = ('id', 'name', 'email', 'filename', 'score', 'status', 'matched_keywords', 'experience')
+
+logger = logging.getLogger(__name__)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _write_status(folder, status):
+    status['updated_at'] = time.time()
+    path = os.path.join(folder, f"{status['job_id']}.json")
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(status, f)
+    os.replace(tmp_path, path)
+
+
+def fail_orphaned_jobs(folder=JOBS_FOLDER, pid=None):
+    """Mark queued or running jobs whose process is gone as failed; returns how many.
+
+    Jobs run on threads of the worker that accepted them, so they die with
+    it. Pass the ``pid`` of a worker that just exited, or leave it out to
+    check every unfinished job's process.
+    """
+    failed = 0
+    for name in os.listdir(folder) if os.path.isdir(folder) else ():
+        if not (name.endswith('.json') and JOB_ID_PATTERN.fullmatch(name[:-len('.json')])):
+            continue
+        try:
+            with open(os.path.join(folder, name), encoding='utf-8') as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            continue
+        owner_pid = status.get('pid')
+        if status['status'] not in ('queued', 'running') or owner_pid is None:
+            continue
+        if (owner_pid == pid) if pid is not None else not _pid_alive(owner_pid):
+            status['status'] = 'failed'
+            status['error'] = 'The worker running this search exited before it finished'
+            _write_status(folder, status)
+            failed += 1
+    if failed:
+        logger.warning("Marked %d orphaned search jobs as failed", failed)
+    return failed
+
+
+def candidate_summary(candidate):
+    summary = {key: candidate[key] for key in STREAM_FIELDS}
+    summary['risk_level'] = candidate['fake_detection']['risk_level']
+    return summary
+
+
+class SearchJobManager:
+    """Runs quantum searches on a local thread pool outside the request.
+
+    Job status is written to ``folder/<job_id>.json`` so that any gunicorn
+    worker can answer status requests, and finished results go to the
+    shared result store under the job ID, which doubles as the search ID.
+    Each candidate is also appended to ``folder/<job_id>.events.ndjson`` as
+    soon as it is scored, so results can be streamed before the job ends.
+    """
+
+    def __init__(self, folder=JOBS_FOLDER, max_workers=JOB_WORKERS):
+        self.folder = folder
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='search-job')
+        os.makedirs(folder, exist_ok=True)
+        fail_orphaned_jobs(folder)
+
+    def _path(self, job_id):
+        return os.path.join(self.folder, f"{job_id}.json")
+
+    def _events_path(self, job_id):
+        return os.path.join(self.folder, f"{job_id}.events.ndjson")
+
+    def _write(self, status):
+        _write_status(self.folder, status)
+
+    def submit(self, job_description, documents, owner=None):
+        """Queue a search over ``(data, filename[, digest])`` uploads and return its job ID."""
+        job_id = uuid.uuid4().hex
+        status = {
+            'job_id': job_id,
+            'owner': owner,
+            'pid': os.getpid(),
+            'status': 'queued',
+            'created_at': time.time(),
+            'total_resumes': len(documents),
+            'stages': {stage: {'done': 0, 'total': len(documents)} for stage in STAGES},
+            'search_id': None,
+            'error': None
+        }
+        self._write(status)
+        self._executor.submit(self._run, status, job_description, documents)
+        self._prune()
+        return job_id
+
+    def _run(self, status, job_description, documents):
+        last_write = [0.0]
+
+        def progress(stage, done, total):
+            status['stages'][stage] = {'done': done, 'total': total}
+            now = time.monotonic()
+            if done == total or now - last_write[0] >= PROGRESS_WRITE_INTERVAL:
+                last_write[0] = now
+                self._write(status)
+
+        try:
+            status['status'] = 'running'
+            self._write(status)
+            results = []
+            with open(self._events_path(status['job_id']), 'a', encoding='utf-8') as events:
+                for candidate, embedding in iter_search(job_description, documents, progress):
+                    results.append((candidate, embedding))
+                    events.write(json.dumps(candidate_summary(candidate)) + '\n')
+                    events.flush()
+            candidates, embeddings = rank(results)
+            get_result_store().save(job_description, candidates, owner=status['owner'],
+                                    search_id=status['job_id'], embeddings=embeddings)
+            status['search_id'] = status['job_id']
+            status['status'] = 'completed'
+        except Exception as e:
+            logger.exception("Search job %s failed", status['job_id'])
+            status['status'] = 'failed'
+            status['error'] = str(e)
+        finally:
+            documents.clear()
+            self._write(status)
+
+    def get(self, job_id, owner=None):
+        """Return the job status dict, or None if unknown or owned by someone else."""
+        if not JOB_ID_PATTERN.fullmatch(job_id or ''):
+            return None
+        try:
+            with open(self._path(job_id), encoding='utf-8') as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if owner is not None and status.get('owner') not in (None, owner):
+            return None
+        return status
+
+    def read_events(self, job_id, offset=0, end=None):
+        """Return candidates streamed since byte ``offset`` (up to ``end``) and the offset to resume from."""
+        if not JOB_ID_PATTERN.fullmatch(job_id or ''):
+            return [], offset
+        try:
+            with open(self._events_path(job_id), 'rb') as f:
+                f.seek(offset)
+                chunk = f.read() if end is None else f.read(max(end - offset, 0))
+        except OSError:
+            return [], offset
+        # Leave a partially written last line for the next read
+        complete = chunk[:chunk.rfind(b'\n') + 1]
+        events = [json.loads(line) for line in complete.splitlines() if line]
+        return events, offset + len(complete)
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            try:
+                if name.endswith(('.json', '.ndjson')) and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = SearchJobManager()
+        return _manager
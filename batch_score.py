@@ -0,0 +1,307 @@
+# batch_score.py
+"""Score a directory or archive of resumes against job descriptions, without the web app.
+
+    python batch_score.py resumes/ --job backend.txt --job frontend.txt -o scores.jsonl
+    python batch_score.py resumes.zip --job-text "Senior Python developer" -o scores.csv
+    python batch_score.py resumes/ --job backend.txt -o scores.jsonl --resume   # carry on after a crash
+
+Text is extracted on the extraction process pool and each resume is
+analyzed on a pool of --workers processes, while this process embeds
+whatever has been extracted. One row per (resume, job) pair is appended to
+the output as soon as a resume is analyzed. A checkpoint file next to the
+output records every finished resume along with the output's size after
+its rows, so --resume drops any half-written rows and skips finished files.
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import sys
+import tarfile
+import time
+import zipfile
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from dashboard_stats import get_dashboard_stats
+from document_cache import get_document_cache, minhash_signature, upload_digest
+from extraction import FALLBACK_TEXT, iter_extracted_batches, warm_up_pool
+from logging_config import configure_logging
+from pipeline import CANDIDATES_ANALYZED, EMBEDDING_BATCH_SIZE, analyze_candidate, record_activity
+from utils import EXTRACTORS, detect_fake_resume, get_embeddings
+
+ANALYSIS_WORKERS = int(os.getenv('BATCH_ANALYSIS_WORKERS', str(os.cpu_count() or 1)))
+# Resumes read into memory at a time
+WINDOW_SIZE = 256
+CSV_FIELDS = ('job', 'filename', 'name', 'email', 'score', 'status', 'experience', 'matched_keywords',
+              'risk_level', 'hiring_recommendation')
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------- INPUTS --------------------
+
+def is_resume(path):
+    return os.path.splitext(path)[1].lower().lstrip('.') in EXTRACTORS
+
+
+def iter_resumes(paths):
+    """Yield ``(key, filename, data)`` for every resume in the given directories, archives and files.
+
+    ``key`` identifies the file across runs: its path, or ``archive!member``
+    for a file inside a .zip or .tar(.gz) archive.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if is_resume(name):
+                        yield from _read_file(os.path.join(root, name))
+        elif zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                for member in archive.infolist():
+                    if not member.is_dir() and is_resume(member.filename):
+                        yield f"{path}!{member.filename}", os.path.basename(member.filename), archive.read(member)
+        elif tarfile.is_tarfile(path):
+            with tarfile.open(path) as archive:
+                for member in archive:
+                    if member.isfile() and is_resume(member.name):
+                        yield f"{path}!{member.name}", os.path.basename(member.name), archive.extractfile(member).read()
+        elif is_resume(path):
+            yield from _read_file(path)
+        else:
+            logger.warning("Skipping %s: not a resume, directory or archive", path)
+
+
+def _read_file(path):
+    try:
+        with open(path, 'rb') as f:
+            yield path, os.path.basename(path), f.read()
+    except OSError as e:
+        logger.warning("Skipping %s: %s", path, e)
+
+
+def load_jobs(job_paths=(), job_texts=()):
+    """``(job id, description)`` pairs; a file's job id is its name without the extension."""
+    jobs = []
+    for path in job_paths:
+        with open(path, encoding='utf-8') as f:
+            jobs.append((os.path.splitext(os.path.basename(path))[0], f.read().strip()))
+    jobs.extend((f"job{i}", text) for i, text in enumerate(job_texts, start=len(jobs) + 1))
+    return jobs
+
+
+# -------------------- OUTPUT --------------------
+
+class ResultWriter:
+    """Appends result rows to a JSONL or CSV file and checkpoints each finished resume.
+
+    Each checkpoint line is ``<output size>\\t<key>``, written after the
+    resume's rows are flushed, so on restart the output is cut back to the
+    last checkpointed size before appending.
+    """
+
+    def __init__(self, path, fmt=None, resume=False, include_text=False):
+        self.path = path
+        self.fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        self.include_text = include_text
+        self.checkpoint_path = f"{path}.checkpoint"
+        self.done = set()
+        size = 0
+        resume = resume and os.path.exists(path) and os.path.exists(self.checkpoint_path)
+        if resume:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                for line in f:
+                    offset, _, key = line.rstrip('\n').partition('\t')
+                    if key:
+                        self.done.add(key)
+                        size = int(offset)
+        self._file = open(path, 'r+b' if resume else 'w+b')
+        self._file.truncate(size)
+        self._file.seek(size)
+        self._checkpoint = open(self.checkpoint_path, 'a' if resume else 'w', encoding='utf-8')
+        if self.fmt == 'csv' and not size:
+            self._write_csv([dict(zip(CSV_FIELDS, CSV_FIELDS))])
+
+    def _write_csv(self, rows):
+        buffer = io.StringIO()
+        csv.DictWriter(buffer, CSV_FIELDS, extrasaction='ignore').writerows(rows)
+        self._file.write(buffer.getvalue().encode('utf-8'))
+
+    def write(self, key, rows):
+        """Append one resume's rows (a dict per job) and mark ``key`` as done."""
+        if self.fmt == 'csv':
+            self._write_csv([_csv_row(row) for row in rows])
+        else:
+            for row in rows:
+                if not self.include_text:
+                    row = {field: value for field, value in row.items() if field != 'resume_text'}
+                self._file.write((json.dumps(row, default=str) + '\n').encode('utf-8'))
+        self._file.flush()
+        self._checkpoint.write(f"{self._file.tell()}\t{key}\n")
+        self._checkpoint.flush()
+        self.done.add(key)
+
+    def close(self):
+        self._file.close()
+        self._checkpoint.close()
+
+
+def _csv_row(row):
+    return dict(row, matched_keywords='; '.join(row.get('matched_keywords', [])),
+                risk_level=row.get('fake_detection', {}).get('risk_level'),
+                hiring_recommendation=row.get('ai_insights', {}).get('hiring_recommendation'))
+
+
+# -------------------- SCORING --------------------
+
+def analyze_resume(jobs, filename, resume_text, scores, fake_detection=None):
+    """Analyze one resume against every job; runs on an analysis worker.
+
+    The fake-resume check doesn't depend on the job, so it runs once.
+    """
+    fake_detection = fake_detection or detect_fake_resume(resume_text)
+    return [dict(analyze_candidate(job_description, filename, resume_text, score, fake_detection), job=job_id)
+            for (job_id, job_description), score in zip(jobs, scores)]
+
+
+def _windows(iterable, size):
+    window = []
+    for item in iterable:
+        window.append(item)
+        if len(window) == size:
+            yield window
+            window = []
+    if window:
+        yield window
+
+
+def score_batch(resumes, jobs, writer, workers=ANALYSIS_WORKERS, window_size=WINDOW_SIZE):
+    """Score ``(key, filename, data)`` resumes against ``(job id, description)`` jobs into ``writer``.
+
+    Returns a stats dict: resumes scored and skipped, and seconds per stage.
+    """
+    stats = {'scored': 0, 'skipped': 0, 'cached': 0, 'seconds': defaultdict(float)}
+    document_cache = get_document_cache()
+    warm_up_pool()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Start the analysis workers before the model is loaded, so they don't inherit it
+        for future in [pool.submit(os.getpid) for _ in range(workers)]:
+            future.result()
+        job_embeddings = get_embeddings([description for _, description in jobs], batch_size=EMBEDDING_BATCH_SIZE)
+        pending = {}
+
+        def drain(block):
+            if not pending:
+                return
+            started = time.perf_counter()
+            done, _ = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            stats['seconds']['analysis_wait'] += time.perf_counter() - started
+            finished = []
+            for future in done:
+                key, digest, filename, resume_text, cached = pending.pop(future)
+                rows = future.result()
+                writer.write(key, rows)
+                CANDIDATES_ANALYZED.inc(len(rows), kind='batch')
+                # One dashboard sample per resume, not per (resume, job) pair
+                finished.append(max(rows, key=lambda row: row['score']))
+                stats['scored'] += 1
+                if not cached and resume_text != FALLBACK_TEXT:
+                    document_cache.put_many([(digest, {
+                        'filename': filename, 'text': resume_text, 'fake_detection': rows[0]['fake_detection'],
+                        'signature': minhash_signature(resume_text)})])
+                if stats['scored'] % 100 == 0:
+                    logger.info("Scored %d resumes", stats['scored'])
+            record_activity(finished, 'batch')
+
+        def todo():
+            for key, filename, data in resumes:
+                if key in writer.done:
+                    stats['skipped'] += 1
+                else:
+                    yield key, filename, data
+
+        for window in _windows(todo(), window_size):
+            digests = [upload_digest(data) for _, _, data in window]
+            cached = document_cache.get_many(list(set(digests)))
+            from_cache = [(i, cached[digest]['text']) for i, digest in enumerate(digests) if digest in cached]
+            to_extract = [i for i, digest in enumerate(digests) if digest not in cached]
+            stats['cached'] += len(from_cache)
+
+            def batches():
+                if from_cache:
+                    yield from_cache
+                for batch in iter_extracted_batches([(window[i][2], window[i][1]) for i in to_extract]):
+                    yield [(to_extract[position], text) for position, text in batch]
+
+            extracted = batches()
+            while True:
+                started = time.perf_counter()
+                batch = next(extracted, None)
+                stats['seconds']['extraction_wait'] += time.perf_counter() - started
+                if batch is None:
+                    break
+                started = time.perf_counter()
+                resume_embeddings = get_embeddings([text for _, text in batch], batch_size=EMBEDDING_BATCH_SIZE)
+                scores = resume_embeddings @ job_embeddings.T
+                stats['seconds']['embedding'] += time.perf_counter() - started
+                for (i, resume_text), resume_scores in zip(batch, scores):
+                    key, filename, _ = window[i]
+                    record = cached.get(digests[i])
+                    future = pool.submit(analyze_resume, jobs, filename, resume_text, resume_scores.tolist(),
+                                         record and record['fake_detection'])
+                    pending[future] = (key, digests[i], filename, resume_text, record is not None)
+                # Keep the analysis queue bounded so results are written as they finish
+                drain(block=False)
+                while len(pending) > workers * 4:
+                    drain(block=True)
+        while pending:
+            drain(block=True)
+    get_dashboard_stats().record_search('batch')
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score resumes against job descriptions, writing JSONL or CSV.")
+    parser.add_argument('inputs', nargs='+', help="resume files, directories, or .zip/.tar(.gz) archives")
+    parser.add_argument('-j', '--job', action='append', default=[], metavar='PATH',
+                        help="job description file (repeatable)")
+    parser.add_argument('--job-text', action='append', default=[], metavar='TEXT',
+                        help="job description given inline (repeatable)")
+    parser.add_argument('-o', '--output', required=True, help="output file; .csv for CSV, anything else for JSONL")
+    parser.add_argument('--format', choices=('jsonl', 'csv'), help="override the format implied by --output")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue an interrupted run, skipping resumes already in the checkpoint")
+    parser.add_argument('--workers', type=int, default=ANALYSIS_WORKERS,
+                        help=f"analysis processes (default: {ANALYSIS_WORKERS})")
+    parser.add_argument('--include-text', action='store_true', help="include each resume's text in JSONL rows")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    jobs = load_jobs(args.job, args.job_text)
+    if not jobs:
+        parser.error("give at least one --job or --job-text")
+
+    writer = ResultWriter(args.output, args.format, resume=args.resume, include_text=args.include_text)
+    started = time.perf_counter()
+    try:
+        stats = score_batch(iter_resumes(args.inputs), jobs, writer, workers=max(1, args.workers))
+    finally:
+        writer.close()
+    seconds = time.perf_counter() - started
+
+    print(f"Scored {stats['scored']} resumes against {len(jobs)} job(s) in {seconds:.1f}s "
+          f"({stats['scored'] / seconds if seconds else 0:.1f} resumes/s, "
+          f"{stats['scored'] * len(jobs) / seconds if seconds else 0:.1f} pairs/s)")
+    if stats['skipped'] or stats['cached']:
+        print(f"  {stats['skipped']} already done (checkpoint), {stats['cached']} texts from the document cache")
+    print("  " + ", ".join(f"{stage} {value:.1f}s" for stage, value in sorted(stats['seconds'].items())))
+    print(f"  results: {writer.path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+"""Throughput benchmarks for the resume scoring pipeline; run ``python -m benchmarks.run --help``."""
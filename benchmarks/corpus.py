@@ -0,0 +1,164 @@
+# benchmarks/corpus.py
+"""Synthetic resume corpus: PDF, DOCX and TXT uploads of varied length, plus adversarial PDFs.
+
+Everything is generated from a seed, so a corpus is identical across runs
+and machines and results stay comparable with saved baselines.
+"""
+import io
+import random
+import zipfile
+from xml.sax.saxutils import escape
+
+FIRST_NAMES = ['Aarav', 'Priya', 'Rohan', 'Sneha', 'Vikram', 'Ananya', 'Arjun', 'Neha', 'Karan', 'Divya',
+               'James', 'Maria', 'Chen', 'Fatima', 'Lucas', 'Amara']
+LAST_NAMES = ['Sharma', 'Patel', 'Reddy', 'Iyer', 'Gupta', 'Singh', 'Nair', 'Mehta', 'Smith', 'Garcia',
+              'Wang', 'Khan', 'Silva', 'Okafor']
+TITLES = ['Software Engineer', 'Senior Software Engineer', 'Data Scientist', 'DevOps Engineer',
+          'Full Stack Developer', 'Machine Learning Engineer', 'Team Lead', 'Backend Developer']
+COMPANIES = ['Infosys', 'TCS', 'Wipro', 'Flipkart', 'Google', 'Microsoft', 'Amazon', 'Zomato', 'Freshworks',
+             'Startup Labs']
+SKILLS = ['Python', 'Java', 'JavaScript', 'TypeScript', 'React', 'Angular', 'Node.js', 'Django', 'Flask',
+          'Spring Boot', 'SQL', 'PostgreSQL', 'MongoDB', 'Redis', 'AWS', 'Azure', 'GCP', 'Docker', 'Kubernetes',
+          'Terraform', 'Machine Learning', 'TensorFlow', 'PyTorch', 'Pandas', 'Spark', 'Kafka', 'Git', 'CI/CD']
+VALUES = ['teamwork', 'innovation', 'integrity', 'customer focus', 'ownership', 'collaboration',
+          'continuous learning', 'diversity']
+DUTIES = ['designed and built {skill} services handling millions of requests',
+          'led a team of {n} engineers delivering {skill} projects',
+          'migrated legacy systems to {skill} and cut costs by {n}0%',
+          'mentored junior developers on {skill} best practices',
+          'improved {skill} pipeline performance by {n}x',
+          'owned the {skill} platform end to end with a focus on {value}']
+# Approximate words per resume for each length bucket
+LENGTHS = {'short': 60, 'medium': 300, 'long': 1200, 'very_long': 4000}
+FORMATS = ('pdf', 'docx', 'txt')
+ADVERSARIAL_PDFS = ('not_a_pdf', 'truncated', 'many_pages', 'huge_stream', 'deep_nesting')
+JOB_DESCRIPTIONS = [
+    "Senior Python developer with Django, PostgreSQL and AWS experience. We value teamwork and ownership.",
+    "Full stack engineer: React, TypeScript and Node.js, Docker and Kubernetes; collaboration and innovation.",
+    "Machine learning engineer with PyTorch, Pandas and Spark, leading a data team; continuous learning.",
+]
+
+
+def resume_text(rng, length='medium'):
+    """One plausible resume of roughly LENGTHS[length] words."""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    skills = rng.sample(SKILLS, rng.randint(4, 10))
+    lines = [name, rng.choice(TITLES),
+             f"{name.lower().replace(' ', '.')}{rng.randint(1, 999)}@example.com | +91 {rng.randint(7000000000, 9999999999)}",
+             "Skills: " + ", ".join(skills),
+             "Values: " + ", ".join(rng.sample(VALUES, 2)),
+             "Experience"]
+    year = 2024
+    words = sum(len(line.split()) for line in lines)
+    while words < LENGTHS[length]:
+        start = year - rng.randint(1, 4)
+        lines.append(f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)} ({start} - {'present' if year == 2024 else year})")
+        for _ in range(rng.randint(2, 5)):
+            duty = rng.choice(DUTIES).format(skill=rng.choice(skills), n=rng.randint(2, 9), value=rng.choice(VALUES))
+            lines.append(f"- {duty.capitalize()}.")
+        year = start
+        words = sum(len(line.split()) for line in lines)
+    lines.append(f"Education: B.Tech Computer Science, {year - 4}")
+    return "\n".join(lines)
+
+
+def _pdf(objects):
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
+
+
+def _pdf_string(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)').encode('latin-1', 'replace')
+
+
+def make_pdf(text, lines_per_page=50, resources=b"<< /Font << /F1 3 0 R >> >>"):
+    """A minimal valid PDF with ``text`` laid out in Helvetica, paginated."""
+    lines = text.split('\n') or ['']
+    pages = [lines[start:start + lines_per_page] for start in range(0, len(lines), lines_per_page)]
+    first_page = 4
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+                   b" ".join(b"%d 0 R" % (first_page + 2 * i) for i in range(len(pages))), len(pages)),
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    for i, page in enumerate(pages):
+        content = b"BT /F1 10 Tf 40 760 Td 14 TL " + b" ".join(b"(%s) '" % _pdf_string(line) for line in page) + b" ET"
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R /Resources %s >>"
+                       % (first_page + 2 * i + 1, resources))
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+    return _pdf(objects)
+
+
+def make_docx(text):
+    """A minimal DOCX with one paragraph per line."""
+    paragraphs = "".join(f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(line)}</w:t></w:r></w:p>"
+                         for line in text.split('\n'))
+    document = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                f'<w:body>{paragraphs}</w:body></w:document>')
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml',
+                         '<?xml version="1.0" encoding="UTF-8"?>'
+                         '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                         '<Default Extension="xml" ContentType="application/xml"/>'
+                         '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-'
+                         'officedocument.wordprocessingml.document.main+xml"/></Types>')
+        archive.writestr('word/document.xml', document)
+    return buffer.getvalue()
+
+
+def make_document(text, fmt):
+    if fmt == 'pdf':
+        return make_pdf(text)
+    if fmt == 'docx':
+        return make_docx(text)
+    return text.encode('utf-8')
+
+
+def make_adversarial_pdf(kind, rng):
+    """A PDF built to be slow, broken or oversized for the extractor."""
+    text = resume_text(rng, 'short')
+    if kind == 'not_a_pdf':
+        return bytes(rng.getrandbits(8) for _ in range(4096))
+    if kind == 'truncated':
+        data = make_pdf(text)
+        return data[:len(data) // 2]
+    if kind == 'many_pages':
+        # Far more pages than EXTRACTION_MAX_PAGES reads
+        return make_pdf("\n".join([text] * 300), lines_per_page=12)
+    if kind == 'huge_stream':
+        # One page whose content stream is megabytes of text operators
+        return make_pdf("\n".join([text] * 400), lines_per_page=10 ** 6)
+    if kind == 'deep_nesting':
+        # Resources nested deeper than a recursive parser can follow
+        return make_pdf(text, resources=b"<< /Font << /F1 3 0 R >> /X " + b"[" * 5000 + b"]" * 5000 + b" >>")
+    raise ValueError(f"Unknown adversarial PDF: {kind}")
+
+
+def generate_corpus(count, seed=0, formats=FORMATS, lengths=('short', 'medium', 'long'), adversarial_ratio=0.0):
+    """Return ``count`` uploads as ``(data, filename)`` pairs, the shape pipeline.run_search takes.
+
+    Formats and lengths are cycled through evenly; ``adversarial_ratio`` of
+    the uploads are replaced by adversarial PDFs.
+    """
+    rng = random.Random(seed)
+    adversarial_every = round(1 / adversarial_ratio) if adversarial_ratio else 0
+    documents = []
+    for i in range(count):
+        if adversarial_every and i % adversarial_every == adversarial_every - 1:
+            kind = ADVERSARIAL_PDFS[(i // adversarial_every) % len(ADVERSARIAL_PDFS)]
+            documents.append((make_adversarial_pdf(kind, rng), f"adversarial_{kind}_{i}.pdf"))
+            continue
+        fmt = formats[i % len(formats)]
+        text = resume_text(rng, lengths[(i // len(formats)) % len(lengths)])
+        name = text.split('\n', 1)[0].lower().replace(' ', '_')
+        documents.append((make_document(text, fmt), f"{name}_{i}.{fmt}"))
+    return documents
@@ -0,0 +1,309 @@
+# benchmarks/run.py
+"""Benchmark the resume scoring pipeline.
+
+    python -m benchmarks.run                          # micro + end-to-end at 10/100/1000 resumes
+    python -m benchmarks.run --sizes 10 100 --save-baseline main
+    python -m benchmarks.run --compare main           # exit status 1 on a regression
+
+Uses the deterministic stub embedding model unless ``--model real`` is
+given, in which case EMBEDDING_BACKEND (and its weights) are used as in
+production. Runs in a scratch directory, so caches, results and the
+talent pool start empty and the working tree is left untouched.
+"""
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, nullcontext, redirect_stderr, redirect_stdout
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARKS_DIR)
+BASELINES_DIR = os.path.join(BENCHMARKS_DIR, 'baselines')
+DEFAULT_SIZES = (10, 100, 1000)
+# A run slower than the baseline by more than this fraction counts as a regression
+DEFAULT_TOLERANCE = 0.2
+
+
+def configure_environment(model, verbose=False):
+    """Settings that must be in place before the app modules are imported."""
+    if model == 'stub':
+        os.environ['EMBEDDING_BACKEND'] = 'stub'
+    os.environ['EMBEDDING_SERVICE_SOCKET'] = ''  # encode in-process
+    os.environ['LOG_LEVEL'] = 'INFO' if verbose else 'OFF'
+    os.environ['METRICS_DIR'] = ''  # keep metrics in memory rather than in the scratch directory
+    os.environ['PERSIST_UPLOADS'] = '0'
+    # Keep every size on the synchronous /quantum-search path so the request time is the search time
+    os.environ['ASYNC_SEARCH_THRESHOLD'] = str(10 ** 9)
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+
+@contextmanager
+def quiet():
+    """Silence the pipeline's per-resume progress output."""
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull), redirect_stderr(devnull):
+        yield
+
+
+def time_calls(func, args_list, min_seconds=0.2):
+    """Call ``func(*args)`` for each args in ``args_list`` (cycling) for at least ``min_seconds``."""
+    timings = []
+    started = time.perf_counter()
+    i = 0
+    while i < len(args_list) or time.perf_counter() - started < min_seconds:
+        args = args_list[i % len(args_list)]
+        call_started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - call_started)
+        i += 1
+    timings.sort()
+    return {
+        'calls': len(timings),
+        'ops_per_sec': round(1 / statistics.median(timings), 2),
+        'median_ms': round(statistics.median(timings) * 1000, 4),
+        'p95_ms': round(timings[math.ceil(len(timings) * 0.95) - 1] * 1000, 4)
+    }
+
+
+def run_micro(seed=0):
+    """Time the per-resume building blocks on their own."""
+    import numpy as np
+    import utils
+    from benchmarks.corpus import ADVERSARIAL_PDFS, JOB_DESCRIPTIONS, make_adversarial_pdf, make_pdf, resume_text
+
+    rng = random.Random(seed)
+    results = {}
+
+    for length in ('short', 'long', 'very_long'):
+        pdfs = [make_pdf(resume_text(rng, length)) for _ in range(5)]
+        results[f'extract_text_from_pdf[{length}]'] = time_calls(
+            lambda data: utils.extract_text_from_pdf(io.BytesIO(data)), [(data,) for data in pdfs])
+    for kind in ADVERSARIAL_PDFS:
+        data = make_adversarial_pdf(kind, rng)
+        results[f'extract_text_from_pdf[{kind}]'] = time_calls(
+            lambda: utils.extract_text_from_pdf(io.BytesIO(data), max_pages=20), [()], min_seconds=0.05)
+
+    # Unique texts defeat the embedding cache; a repeated one measures a cache hit
+    texts = [f"{resume_text(rng, 'medium')}\nref {i}" for i in range(50)]
+    results['get_embedding[uncached]'] = time_calls(utils.get_embedding, [(text,) for text in texts], min_seconds=0)
+    results['get_embedding[cached]'] = time_calls(utils.get_embedding, [(texts[0],)])
+
+    job_embedding = utils.get_embedding(JOB_DESCRIPTIONS[0])
+    resume_embedding = np.asarray(utils.get_embedding(texts[1]))
+    results['calculate_similarity'] = time_calls(utils.calculate_similarity, [(job_embedding, resume_embedding)])
+
+    # More distinct resumes than the rule and matcher caches hold, so these are cold timings
+    resumes = [resume_text(rng, rng.choice(['short', 'medium', 'long'])) + f"\nref {i}" for i in range(1200)]
+    results['detect_fake_resume'] = time_calls(utils.detect_fake_resume, [(text,) for text in resumes])
+    results['generate_ai_insights'] = time_calls(
+        utils.generate_ai_insights, [(JOB_DESCRIPTIONS[i % len(JOB_DESCRIPTIONS)], text, 'Candidate')
+                                     for i, text in enumerate(resumes)])
+    return results
+
+
+class StageTimer:
+    """Wall time spent in each pipeline stage during a request, by wrapping the functions pipeline.py calls.
+
+    Extraction runs in worker processes alongside the rest, so its figure is
+    the time the search spent waiting for extracted text.
+    """
+
+    def __init__(self):
+        self.seconds = {}
+
+    def _add(self, stage, started):
+        self.seconds[stage] = self.seconds.get(stage, 0) + time.perf_counter() - started
+
+    def _timed(self, stage, func):
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._add(stage, started)
+        return wrapper
+
+    def _timed_iter(self, stage, func):
+        def wrapper(*args, **kwargs):
+            iterator = iter(func(*args, **kwargs))
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    self._add(stage, started)
+                yield item
+        return wrapper
+
+    @contextmanager
+    def install(self):
+        import pipeline
+        import result_store
+        import talent_pool
+
+        patches = [
+            (pipeline, 'iter_extracted_batches', self._timed_iter('extraction', pipeline.iter_extracted_batches)),
+            (pipeline, 'get_embedding', self._timed('embedding', pipeline.get_embedding)),
+            (pipeline, 'get_embeddings', self._timed('embedding', pipeline.get_embeddings)),
+            (pipeline, 'score_candidates', self._timed('scoring', pipeline.score_candidates)),
+            (pipeline, 'analyze_candidate', self._timed('analysis', pipeline.analyze_candidate)),
+            (talent_pool.TalentPool, 'add_many', self._timed('talent_pool', talent_pool.TalentPool.add_many)),
+            (result_store.SearchResultStore, 'save', self._timed('result_store', result_store.SearchResultStore.save)),
+        ]
+        originals = [(target, name, getattr(target, name)) for target, name, _ in patches]
+        for target, name, wrapper in patches:
+            setattr(target, name, wrapper)
+        try:
+            yield self
+        finally:
+            for target, name, original in originals:
+                setattr(target, name, original)
+
+
+def run_end_to_end(sizes, seed=0, adversarial_ratio=0.02):
+    """POST synthetic uploads to /quantum-search through the Flask test client."""
+    import app as app_module
+    import pipeline
+    from benchmarks.corpus import JOB_DESCRIPTIONS, generate_corpus
+
+    pipeline.warm_up()
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['recruiter_email'] = 'benchmark@company.com'
+
+    results = {}
+    for size in sizes:
+        # A fresh corpus per size, so no size is served from another's embedding cache entries
+        documents = generate_corpus(size, seed=seed + size, adversarial_ratio=adversarial_ratio)
+        upload_bytes = sum(len(data) for data, _ in documents)
+        timer = StageTimer()
+        with timer.install():
+            started = time.perf_counter()
+            response = client.post('/quantum-search', content_type='multipart/form-data', data={
+                'job_description': JOB_DESCRIPTIONS[size % len(JOB_DESCRIPTIONS)],
+                'resumes': [(io.BytesIO(data), filename) for data, filename in documents]
+            })
+            seconds = time.perf_counter() - started
+        if response.status_code != 302 or 'search_id=' not in response.headers.get('Location', ''):
+            raise RuntimeError(f"/quantum-search returned {response.status_code} for {size} resumes")
+        stages = {stage: round(value, 4) for stage, value in sorted(timer.seconds.items())}
+        stages['other'] = round(max(0, seconds - sum(timer.seconds.values())), 4)
+        results[str(size)] = {
+            'resumes': size,
+            'upload_mb': round(upload_bytes / 1024 / 1024, 2),
+            'seconds': round(seconds, 4),
+            'resumes_per_sec': round(size / seconds, 2),
+            'stages': stages
+        }
+    return results
+
+
+def environment_info(model):
+    import utils
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'model': 'stub' if model == 'stub' else utils.EMBEDDING_MODEL_KEY,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return ``(rows, regressions)`` comparing throughput with a baseline run."""
+    rows, regressions = [], []
+    pairs = [(f"micro {name}", result['ops_per_sec'], baseline.get('micro', {}).get(name, {}).get('ops_per_sec'))
+             for name, result in current.get('micro', {}).items()]
+    pairs += [(f"e2e {size} resumes", result['resumes_per_sec'],
+               baseline.get('e2e', {}).get(size, {}).get('resumes_per_sec'))
+              for size, result in current.get('e2e', {}).items()]
+    for name, now, before in pairs:
+        if not before:
+            continue
+        ratio = now / before
+        rows.append((name, before, now, ratio))
+        if ratio < 1 - tolerance:
+            regressions.append(name)
+    return rows, regressions
+
+
+def print_report(results):
+    if results.get('micro'):
+        print(f"\n{'micro-benchmark':<42}{'ops/sec':>12}{'median ms':>12}{'p95 ms':>12}")
+        for name, result in results['micro'].items():
+            print(f"{name:<42}{result['ops_per_sec']:>12.1f}{result['median_ms']:>12.3f}{result['p95_ms']:>12.3f}")
+    if results.get('e2e'):
+        print(f"\n{'end-to-end /quantum-search':<28}{'seconds':>10}{'resumes/sec':>14}  stages (s)")
+        for size, result in results['e2e'].items():
+            stages = ", ".join(f"{stage} {value:.3f}" for stage, value in result['stages'].items())
+            print(f"{size + ' resumes':<28}{result['seconds']:>10.3f}{result['resumes_per_sec']:>14.1f}  {stages}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the resume scoring pipeline.")
+    parser.add_argument('--model', choices=('stub', 'real'), default='stub',
+                        help="stub: deterministic hashing embeddings, no weights (default); "
+                             "real: the configured EMBEDDING_BACKEND")
+    parser.add_argument('--sizes', type=int, nargs='*', default=list(DEFAULT_SIZES),
+                        help="end-to-end batch sizes (default: 10 100 1000); none to skip")
+    parser.add_argument('--no-micro', action='store_true', help="skip the micro-benchmarks")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save-baseline', metavar='NAME', help="save results to benchmarks/baselines/NAME.json")
+    parser.add_argument('--compare', metavar='NAME', help="compare with benchmarks/baselines/NAME.json")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed throughput drop before a result counts as a regression (default: 0.2)")
+    parser.add_argument('--json', metavar='PATH', help="also write the results to PATH")
+    parser.add_argument('--verbose', action='store_true', help="show the pipeline's own output while running")
+    args = parser.parse_args(argv)
+
+    configure_environment(args.model, args.verbose)
+    baseline = None
+    if args.compare:
+        with open(os.path.join(BASELINES_DIR, f"{args.compare}.json"), encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory(prefix='resume-benchmark-') as workdir:
+        previous_dir = os.getcwd()
+        os.chdir(workdir)
+        try:
+            with nullcontext() if args.verbose else quiet():
+                results = {'environment': environment_info(args.model)}
+                if not args.no_micro:
+                    results['micro'] = run_micro(args.seed)
+                if args.sizes:
+                    results['e2e'] = run_end_to_end(args.sizes, args.seed)
+        finally:
+            os.chdir(previous_dir)
+
+    print_report(results)
+    paths = [args.json, args.save_baseline and os.path.join(BASELINES_DIR, f"{args.save_baseline}.json")]
+    for path in filter(None, paths):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results saved to {path}")
+
+    if baseline is not None:
+        rows, regressions = compare(results, baseline, args.tolerance)
+        print(f"\n{'compared with ' + args.compare:<42}{'before':>12}{'now':>12}{'change':>10}")
+        for name, before, now, ratio in rows:
+            flag = '  ⚠️ regression' if name in regressions else ''
+            print(f"{name:<42}{before:>12.1f}{now:>12.1f}{ratio - 1:>+10.0%}{flag}")
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            return 1
+        print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,16 +1,20 @@
 # candidate_aggregator.py
+import logging
+
 from web_scrapers.professional_apis import ProfessionalDataAggregator
-from utils import get_embedding, calculate_similarity, generate_ai_insights
+from utils import get_embeddings, score_candidates, generate_ai_insights
+
+logger = logging.getLogger(__name__)
 
 
 class CandidateAggregator:
-    def init(self):
+    def __init__(self):
         self.pro_aggregator = ProfessionalDataAggregator()
 
     def find_candidates_from_web(self, job_description):
         """Find candidates from professional networks"""
         try:
-            print(" Starting web candidate search...")
+            logger.info("Starting web candidate search")
 
             # Get candidates from APIs
             candidates = self.pro_aggregator.search_professionals(job_description, 15)
@@ -18,50 +22,44 @@ class CandidateAggregator:
             # Process with AI analysis
             processed = self.process_candidates(candidates, job_description)
 
-            print(f" Search completed: {len(processed)} candidates processed")
+            logger.info("Web candidate search completed: %d candidates processed", len(processed))
             return processed
 
         except Exception as e:
-            print(f"Search error: {e}")
+            logger.exception("Web candidate search failed: %s", e)
             return []
 
     def process_candidates(self, candidates, job_description):
         """Process candidates with AI scoring"""
         processed = []
 
-        print(" Getting job description embedding...")
-        job_embedding = get_embedding(job_description)
+        profile_texts = [self.create_profile_text(candidate) for candidate in candidates]
+        embeddings = get_embeddings([job_description] + profile_texts)
+        scores, ranking = score_candidates(embeddings[0], embeddings[1:])
 
-        for i, candidate in enumerate(candidates):
+        # Walk candidates from highest to lowest score
+        for i in ranking:
+            candidate = candidates[i]
             try:
-                print(f"Processing candidate {i + 1}/{len(candidates)}: {candidate['name']}")
-
-                # Create profile text for analysis
-                profile_text = self.create_profile_text(candidate)
-
-                # Calculate similarity score
-                candidate_embedding = get_embedding(profile_text)
-                score = calculate_similarity(job_embedding, candidate_embedding)
+                score = float(scores[i])
 
                 # Generate basic AI insights (skip full analysis for speed)
                 ai_insights = self.get_basic_insights(candidate, score)
 
                 # Enhanced candidate data
                 candidate['score'] = round(score, 3)
-                candidate['profile_text'] = profile_text
+                candidate['profile_text'] = profile_texts[i]
                 candidate['email'] = f"{candidate['name'].lower().replace(' ', '.')}@professional.com"
                 candidate['ai_insights'] = ai_insights
 
                 processed.append(candidate)
 
-                print(f"  Scored: {score:.1%}")
+                logger.debug("%s scored %.1f%%", candidate['name'], score * 100)
 
             except Exception as e:
-                print(f"  Error processing {candidate.get('name')}: {e}")
+                logger.warning("Error processing %s: %s", candidate.get('name'), e)
                 continue
 
-        # Sort by score (highest first)
-        processed.sort(key=lambda x: x['score'], reverse=True)
         return processed
 
     def create_profile_text(self, candidate):
@@ -99,11 +97,14 @@ class CandidateAggregator:
             'development_areas': ['Need more specific project details']
         }
 
-    # Test the class directly
-    if name == "main":
-        print(" Testing CandidateAggregator...")
-        aggregator = CandidateAggregator()
-        test_results = aggregator.find_candidates_from_web("Python developer with web experience")
-        print(f" Test completed: {len(test_results)} candidates")
-        for cand in test_results[:3]:
-            print(f"  - {cand['name']}: {cand['score']:.1%} - {cand['ai_insights']['hiring_recommendation']}")
+
+# Test the class directly
+if __name__ == "__main__":
+    from logging_config import configure_logging
+    configure_logging()
+    print(" Testing CandidateAggregator...")
+    aggregator = CandidateAggregator()
+    test_results = aggregator.find_candidates_from_web("Python developer with web experience")
+    print(f" Test completed: {len(test_results)} candidates")
+    for cand in test_results[:3]:
+        print(f"  - {cand['name']}: {cand['score']:.1%} - {cand['ai_insights']['hiring_recommendation']}")
@@ -0,0 +1,12 @@
+import os
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture(autouse=True, scope='session')
+def metrics_dir(tmp_path_factory):
+    """Keep metric snapshots written during the run, including by forked workers, out of the tree."""
+    metrics.METRICS_DIR = str(tmp_path_factory.mktemp('metrics'))
+    os.environ['METRICS_DIR'] = metrics.METRICS_DIR
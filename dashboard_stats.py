@@ -0,0 +1,202 @@
+# dashboard_stats.py
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from embedding_cache import STORAGE_FAILURES
+
+DASHBOARD_STATS_PATH = os.getenv('DASHBOARD_STATS_PATH', os.path.join('dashboard', 'stats.sqlite3'))
+# Throughput is shown per hour for this many hours and per day for this many days
+THROUGHPUT_HOURS = 24
+THROUGHPUT_DAYS = 14
+# Hourly buckets older than this are dropped; daily buckets are kept
+HOURLY_RETENTION_HOURS = 24 * 7
+RECENT_OUTREACH_KEPT = 5
+# Same cut-off as the results page's "shortlisted" count
+SHORTLIST_SCORE = 85
+# Display order; labels come from pipeline.match_status and calculate_risk_score
+SCORE_BANDS = ('Perfect Match', 'Strong Match', 'Good Match', 'Partial Match')
+RISK_LEVELS = ('Low', 'Medium', 'High', 'Critical', 'Unchecked')
+PERIODS = {'hour': 3600, 'day': 86400}
+
+logger = logging.getLogger(__name__)
+
+
+class DashboardStats:
+    """Running totals of search and outreach activity for the dashboard.
+
+    Every scored chunk of candidates adds to a handful of named counters
+    (candidates, shortlisted, one per score band, risk level and search
+    kind) and to the current hourly and daily throughput buckets, in one
+    transaction on an SQLite file every worker shares. Reading the
+    dashboard is then a fixed number of primary-key lookups, however much
+    history has built up. Pass ``path=None`` to keep the totals in memory.
+    """
+
+    def __init__(self, path=DASHBOARD_STATS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+
+    def _connection(self):
+        # SQLite handles must not cross a fork, so reconnect per process
+        if self._conn is None or self._conn_pid != os.getpid():
+            if self.path:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path or ':memory:', timeout=30, check_same_thread=False)
+            if self.path:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+            conn.execute('''CREATE TABLE IF NOT EXISTS throughput (
+                period TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                candidates INTEGER NOT NULL,
+                shortlisted INTEGER NOT NULL,
+                outreach INTEGER NOT NULL,
+                PRIMARY KEY (period, bucket)
+            )''')
+            conn.execute('''CREATE TABLE IF NOT EXISTS outreach (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                recruiter TEXT,
+                name TEXT,
+                email TEXT,
+                score INTEGER,
+                role TEXT,
+                sent_at REAL NOT NULL
+            )''')
+            conn.execute('CREATE INDEX IF NOT EXISTS outreach_recruiter ON outreach (recruiter, id)')
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def _add(self, counters, candidates=0, shortlisted=0, outreach=0, now=None, extra=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany('''INSERT INTO counters (name, value) VALUES (?, ?)
+                                    ON CONFLICT (name) DO UPDATE SET value = value + excluded.value''',
+                                 [(name, value) for name, value in counters.items() if value])
+                conn.executemany('''INSERT INTO throughput (period, bucket, candidates, shortlisted, outreach)
+                                    VALUES (?, ?, ?, ?, ?)
+                                    ON CONFLICT (period, bucket) DO UPDATE SET
+                                        candidates = candidates + excluded.candidates,
+                                        shortlisted = shortlisted + excluded.shortlisted,
+                                        outreach = outreach + excluded.outreach''',
+                                 [(period, int(now // seconds), candidates, shortlisted, outreach)
+                                  for period, seconds in PERIODS.items()])
+                if extra:
+                    extra(conn)
+
+    def record_candidates(self, kind, scored, now=None):
+        """Add ``(match percentage, score band, risk level or None)`` for each newly scored candidate."""
+        if not scored:
+            return
+        counters = {'candidates': len(scored), f'kind:{kind}': len(scored)}
+        for score, band, risk_level in scored:
+            counters['score_total'] = counters.get('score_total', 0) + score
+            counters['shortlisted'] = counters.get('shortlisted', 0) + (score >= SHORTLIST_SCORE)
+            counters[f'band:{band}'] = counters.get(f'band:{band}', 0) + 1
+            risk = f'risk:{risk_level or "Unchecked"}'
+            counters[risk] = counters.get(risk, 0) + 1
+        now = time.time() if now is None else now
+
+        def prune(conn):
+            conn.execute("DELETE FROM throughput WHERE period = 'hour' AND bucket < ?",
+                         (int(now // PERIODS['hour']) - HOURLY_RETENTION_HOURS,))
+        try:
+            self._add(counters, candidates=len(scored), shortlisted=counters['shortlisted'], now=now, extra=prune)
+        except sqlite3.Error as e:
+            STORAGE_FAILURES.inc(store='dashboard_stats', operation='write')
+            logger.warning("Dashboard stats write failed: %s", e)
+
+    def record_search(self, kind):
+        try:
+            self._add({'searches': 1, f'searches:{kind}': 1})
+        except sqlite3.Error as e:
+            STORAGE_FAILURES.inc(store='dashboard_stats', operation='write')
+            logger.warning("Dashboard stats write failed: %s", e)
+
+    def record_outreach(self, recruiter, name, email, score=None, role=None, now=None):
+        """Count an email sent to a candidate and remember it among the recruiter's recent selections."""
+        now = time.time() if now is None else now
+
+        def remember(conn):
+            conn.execute('INSERT INTO outreach (recruiter, name, email, score, role, sent_at) VALUES (?, ?, ?, ?, ?, ?)',
+                         (recruiter, name, email, score, role, now))
+            conn.execute('''DELETE FROM outreach WHERE recruiter IS ? AND id <= (
+                                SELECT id FROM outreach WHERE recruiter IS ? ORDER BY id DESC LIMIT 1 OFFSET ?)''',
+                         (recruiter, recruiter, RECENT_OUTREACH_KEPT))
+        try:
+            self._add({'outreach': 1}, outreach=1, now=now, extra=remember)
+        except sqlite3.Error as e:
+            STORAGE_FAILURES.inc(store='dashboard_stats', operation='write')
+            logger.warning("Dashboard stats write failed: %s", e)
+
+    def summary(self, recruiter=None, now=None):
+        """Totals, score-band and risk breakdowns, throughput series and ``recruiter``'s recent outreach."""
+        now = time.time() if now is None else now
+        first = {period: int(now // PERIODS[period]) - count + 1
+                 for period, count in (('hour', THROUGHPUT_HOURS), ('day', THROUGHPUT_DAYS))}
+        try:
+            with self._lock:
+                conn = self._connection()
+                counters = dict(conn.execute('SELECT name, value FROM counters').fetchall())
+                buckets = {(period, bucket): row for period, bucket, *row in conn.execute(
+                    '''SELECT period, bucket, candidates, shortlisted, outreach FROM throughput
+                       WHERE (period = 'hour' AND bucket >= ?) OR (period = 'day' AND bucket >= ?)''',
+                    (first['hour'], first['day'])).fetchall()}
+                recent = conn.execute('''SELECT name, email, score, role, sent_at FROM outreach
+                                         WHERE recruiter IS ? ORDER BY id DESC LIMIT ?''',
+                                      (recruiter, RECENT_OUTREACH_KEPT)).fetchall()
+        except sqlite3.Error as e:
+            STORAGE_FAILURES.inc(store='dashboard_stats', operation='read')
+            logger.warning("Dashboard stats read failed: %s", e)
+            counters, buckets, recent = {}, {}, []
+
+        candidates = counters.get('candidates', 0)
+
+        def breakdown(prefix, order):
+            names = list(order) + sorted(name[len(prefix):] for name in counters
+                                         if name.startswith(prefix) and name[len(prefix):] not in order)
+            return [{'label': name, 'count': counters.get(prefix + name, 0),
+                     'percent': round(100 * counters.get(prefix + name, 0) / candidates, 1) if candidates else 0}
+                    for name in names]
+
+        def series(period, label_format):
+            seconds = PERIODS[period]
+            return [{'label': datetime.fromtimestamp(bucket * seconds, timezone.utc).strftime(label_format),
+                     **dict(zip(('candidates', 'shortlisted', 'outreach'), buckets.get((period, bucket), (0, 0, 0))))}
+                    for bucket in range(first[period], int(now // seconds) + 1)]
+
+        return {
+            'candidates': candidates,
+            'searches': counters.get('searches', 0),
+            'shortlisted': counters.get('shortlisted', 0),
+            'outreach': counters.get('outreach', 0),
+            'average_score': round(counters.get('score_total', 0) / candidates, 1) if candidates else 0,
+            'score_bands': breakdown('band:', SCORE_BANDS),
+            'risk_levels': breakdown('risk:', RISK_LEVELS),
+            'kinds': breakdown('kind:', ()),
+            'hourly': series('hour', '%H:00'),
+            'daily': series('day', '%b %d'),
+            'recent_outreach': [{'name': name, 'email': email, 'score': score, 'role': role,
+                                 'date': datetime.fromtimestamp(sent_at, timezone.utc).strftime('%b %d, %H:%M UTC')}
+                                for name, email, score, role, sent_at in recent]
+        }
+
+
+_stats = None
+
+
+def get_dashboard_stats():
+    global _stats
+    if _stats is None:
+        _stats = DashboardStats()
+    return _stats
@@ -0,0 +1,253 @@
+# document_cache.py
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from embedding_cache import STORAGE_FAILURES
+from metrics import counter
+
+DOCUMENT_CACHE_PATH = os.getenv('DOCUMENT_CACHE_PATH', os.path.join('cache', 'documents.sqlite3'))
+DOCUMENT_CACHE_MEMORY_ITEMS = int(os.getenv('DOCUMENT_CACHE_MEMORY_ITEMS', '2000'))
+# Resumes whose estimated Jaccard similarity (over word shingles) reaches this are near-duplicates
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0.8'))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+SHINGLE_WORDS = 3
+# Texts shorter than this (e.g. extraction fallbacks) are never matched as near-duplicates
+MIN_SIGNATURE_WORDS = 30
+# 16 bands of 8 rows: pairs above ~0.7 similarity almost always share a band
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+
+DUPLICATE_UPLOADS = counter('recruitment_duplicate_uploads_total', "Uploads recognized as duplicates",
+                            ('kind', 'scope'))
+DOCUMENT_CACHE_REQUESTS = counter('recruitment_document_cache_requests_total',
+                                  "Upload lookups, by whether the extracted text was cached", ('result',))
+
+logger = logging.getLogger(__name__)
+
+# Multiply-shift hash family: h(x) = (a * x + b) mod 2**64 >> 32, with odd a
+_rng = np.random.RandomState(20240601)
+_HASH_A = (_rng.randint(0, 2 ** 62, MINHASH_PERMUTATIONS, dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+_HASH_B = _rng.randint(0, 2 ** 62, MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+def read_upload(stream, chunk_size=UPLOAD_CHUNK_SIZE):
+    """Read an upload stream to bytes, hashing it chunk by chunk; returns ``(data, sha256 hex)``."""
+    digest = hashlib.sha256()
+    chunks = []
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+        chunks.append(chunk)
+    return b''.join(chunks), digest.hexdigest()
+
+
+def upload_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def minhash_signature(text):
+    """MinHash of the text's lower-cased word shingles, or None for texts too short to compare."""
+    words = text.lower().split()
+    if len(words) < MIN_SIGNATURE_WORDS:
+        return None
+    shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles), dtype=np.uint64,
+                         count=len(shingles))
+    permuted = (hashes[:, None] * _HASH_A + _HASH_B) >> np.uint64(32)
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def signature_similarity(first, second):
+    """Estimated Jaccard similarity of the two signatures' shingle sets."""
+    return float(np.mean(first == second))
+
+
+def lsh_buckets(signature):
+    """One signed 64-bit bucket id per band; similar signatures collide in at least one band."""
+    return [int.from_bytes(hashlib.blake2b(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes(),
+                                           digest_size=8).digest(), 'big', signed=True)
+            for band in range(LSH_BANDS)]
+
+
+class NearDuplicateIndex:
+    """In-memory MinHash LSH over the resumes of one search."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._signatures = {}
+
+    def add(self, key, signature):
+        if signature is None:
+            return
+        self._signatures[key] = signature
+        for band, bucket in enumerate(lsh_buckets(signature)):
+            self._buckets.setdefault((band, bucket), []).append(key)
+
+    def find(self, signature, threshold=NEAR_DUPLICATE_THRESHOLD):
+        """Return ``(key, similarity)`` for the most similar indexed resume at or above ``threshold``."""
+        if signature is None:
+            return None
+        candidates = {key for band, bucket in enumerate(lsh_buckets(signature))
+                      for key in self._buckets.get((band, bucket), ())}
+        return _best_match(signature, ((key, self._signatures[key]) for key in candidates), threshold)
+
+
+def _best_match(signature, candidates, threshold):
+    best = None
+    for key, other in candidates:
+        similarity = signature_similarity(signature, other)
+        if similarity >= threshold and (best is None or similarity > best[1]):
+            best = (key, similarity)
+    return best
+
+
+class DocumentCache:
+    """Per-upload cache of JD-independent work, keyed by the SHA-256 of the file's bytes.
+
+    Stores each upload's extracted text, fake-resume check and MinHash
+    signature in an SQLite file every worker shares (with a small in-process
+    LRU in front), plus an LSH table over the signatures so near-duplicates
+    of earlier uploads can be found without comparing against all of them.
+    """
+
+    def __init__(self, path=DOCUMENT_CACHE_PATH, max_memory_items=DOCUMENT_CACHE_MEMORY_ITEMS):
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+
+    def _connection(self):
+        # SQLite handles must not cross a fork, so reconnect per process
+        if self._conn is None or self._conn_pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('''CREATE TABLE IF NOT EXISTS documents (
+                content_hash TEXT PRIMARY KEY, filename TEXT NOT NULL, text TEXT NOT NULL,
+                fake_detection TEXT, signature BLOB, created_at REAL NOT NULL)''')
+            conn.execute('''CREATE TABLE IF NOT EXISTS lsh_buckets (
+                band INTEGER NOT NULL, bucket INTEGER NOT NULL, content_hash TEXT NOT NULL,
+                PRIMARY KEY (band, bucket, content_hash)) WITHOUT ROWID''')
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def _remember(self, content_hash, record):
+        self._memory[content_hash] = record
+        self._memory.move_to_end(content_hash)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    @staticmethod
+    def _record(row):
+        return {
+            'filename': row[0],
+            'text': row[1],
+            'fake_detection': json.loads(row[2]) if row[2] else None,
+            'signature': np.frombuffer(row[3], dtype=np.uint32) if row[3] else None,
+            'created_at': row[4]
+        }
+
+    def get_many(self, content_hashes):
+        """Return a dict of the cached records for whichever upload hashes are known."""
+        found = {}
+        with self._lock:
+            pending = []
+            for content_hash in content_hashes:
+                record = self._memory.get(content_hash)
+                if record is None:
+                    pending.append(content_hash)
+                else:
+                    self._memory.move_to_end(content_hash)
+                    found[content_hash] = record
+            if pending and self.path:
+                try:
+                    conn = self._connection()
+                    for start in range(0, len(pending), 500):
+                        chunk = pending[start:start + 500]
+                        rows = conn.execute(
+                            f"SELECT content_hash, filename, text, fake_detection, signature, created_at "
+                            f"FROM documents WHERE content_hash IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+                        for row in rows:
+                            found[row[0]] = self._record(row[1:])
+                            self._remember(row[0], found[row[0]])
+                except sqlite3.Error as e:
+                    STORAGE_FAILURES.inc(store='document_cache', operation='read')
+                    logger.warning("Document cache read failed: %s", e)
+        DOCUMENT_CACHE_REQUESTS.inc(len(found), result='hit')
+        DOCUMENT_CACHE_REQUESTS.inc(len(content_hashes) - len(found), result='miss')
+        return found
+
+    def put_many(self, records):
+        """Store ``(content_hash, record)`` pairs; a record holds filename, text, fake_detection and signature."""
+        records = [(content_hash, dict(record, created_at=record.get('created_at') or time.time()))
+                   for content_hash, record in records]
+        with self._lock:
+            for content_hash, record in records:
+                self._remember(content_hash, record)
+            if records and self.path:
+                try:
+                    conn = self._connection()
+                    with conn:
+                        conn.executemany(
+                            'INSERT OR IGNORE INTO documents (content_hash, filename, text, fake_detection, '
+                            'signature, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                            [(content_hash, record['filename'], record['text'],
+                              json.dumps(record['fake_detection']) if record.get('fake_detection') else None,
+                              record['signature'].tobytes() if record.get('signature') is not None else None,
+                              record['created_at']) for content_hash, record in records])
+                        conn.executemany(
+                            'INSERT OR IGNORE INTO lsh_buckets (band, bucket, content_hash) VALUES (?, ?, ?)',
+                            [(band, bucket, content_hash) for content_hash, record in records
+                             if record.get('signature') is not None
+                             for band, bucket in enumerate(lsh_buckets(record['signature']))])
+                except sqlite3.Error as e:
+                    STORAGE_FAILURES.inc(store='document_cache', operation='write')
+                    logger.warning("Document cache write failed: %s", e)
+
+    def find_near_duplicate(self, signature, exclude=(), threshold=NEAR_DUPLICATE_THRESHOLD):
+        """Return ``(content_hash, record, similarity)`` for the closest earlier upload, or None."""
+        if signature is None or not self.path:
+            return None
+        buckets = list(enumerate(lsh_buckets(signature)))
+        try:
+            with self._lock:
+                conn = self._connection()
+                rows = conn.execute(
+                    "SELECT DISTINCT content_hash FROM lsh_buckets WHERE "
+                    + " OR ".join(["(band = ? AND bucket = ?)"] * len(buckets)),
+                    [value for pair in buckets for value in pair]).fetchall()
+            candidates = [row[0] for row in rows if row[0] not in exclude]
+        except sqlite3.Error as e:
+            STORAGE_FAILURES.inc(store='document_cache', operation='read')
+            logger.warning("Document cache read failed: %s", e)
+            return None
+        if not candidates:
+            return None
+        records = self.get_many(candidates)
+        best = _best_match(signature, ((content_hash, record['signature']) for content_hash, record in records.items()
+                                       if record['signature'] is not None), threshold)
+        return (best[0], records[best[0]], best[1]) if best else None
+
+
+_cache = None
+
+
+def get_document_cache():
+    global _cache
+    if _cache is None:
+        _cache = DocumentCache()
+    return _cache
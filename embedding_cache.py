@@ -0,0 +1,133 @@
+# embedding_cache.py
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from metrics import counter
+
+EMBEDDING_CACHE_PATH = os.getenv('EMBEDDING_CACHE_PATH', os.path.join('cache', 'embeddings.sqlite3'))
+EMBEDDING_CACHE_MEMORY_ITEMS = int(os.getenv('EMBEDDING_CACHE_MEMORY_ITEMS', '10000'))
+STORAGE_FAILURES = counter('recruitment_storage_failures_total', "Failed reads and writes of local stores",
+                           ('store', 'operation'))
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache.
+
+    Vectors are keyed by (model name, hash of normalized text). Lookups hit a
+    bounded in-process LRU first and then an SQLite file that every gunicorn
+    worker on the machine shares. Pass ``path=None`` for a memory-only cache.
+    """
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH, max_memory_items=EMBEDDING_CACHE_MEMORY_ITEMS):
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model_name, text):
+        """Cache key for an already normalized text."""
+        return hashlib.sha256(f"{model_name}\0{text}".encode('utf-8')).hexdigest()
+
+    def _connection(self):
+        # SQLite handles must not cross a fork, so reconnect per process
+        if self._conn is None or self._conn_pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)')
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys):
+        """Return a dict of the cached vectors for whichever keys are known."""
+        found = {}
+        with self._lock:
+            pending = []
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is None:
+                    pending.append(key)
+                else:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+            self.memory_hits += len(found)
+
+            if pending and self.path:
+                try:
+                    conn = self._connection()
+                    for start in range(0, len(pending), 500):
+                        chunk = pending[start:start + 500]
+                        rows = conn.execute(
+                            f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                            chunk).fetchall()
+                        for key, blob in rows:
+                            vector = np.frombuffer(blob, dtype=np.float32)
+                            found[key] = vector
+                            self._remember(key, vector)
+                            self.disk_hits += 1
+                except sqlite3.Error as e:
+                    STORAGE_FAILURES.inc(store='embedding_cache', operation='read')
+                    logger.warning("Embedding cache read failed: %s", e)
+
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Store ``(key, vector)`` pairs in both tiers."""
+        items = [(key, np.asarray(vector, dtype=np.float32)) for key, vector in items]
+        with self._lock:
+            for key, vector in items:
+                self._remember(key, vector)
+            if items and self.path:
+                try:
+                    conn = self._connection()
+                    with conn:
+                        conn.executemany('INSERT OR IGNORE INTO embeddings (key, vector) VALUES (?, ?)',
+                                         [(key, vector.tobytes()) for key, vector in items])
+                except sqlite3.Error as e:
+                    STORAGE_FAILURES.inc(store='embedding_cache', operation='write')
+                    logger.warning("Embedding cache write failed: %s", e)
+
+    def stats(self):
+        """Hit/miss counters for this process."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0,
+            'memory_items': len(self._memory)
+        }
+
+
+_cache = None
+
+
+def get_embedding_cache():
+    global _cache
+    if _cache is None:
+        _cache = EmbeddingCache()
+    return _cache
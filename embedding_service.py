@@ -0,0 +1,231 @@
+# embedding_service.py
+"""Local embedding service: one model process shared by every gunicorn worker.
+
+Run with ``python embedding_service.py`` (gunicorn.conf.py starts it when
+EMBEDDING_SERVICE=1). Requests arriving from all workers within
+EMBEDDING_SERVICE_MAX_WAIT_MS of each other are encoded as one micro-batch.
+
+Wire format, over a Unix stream socket, one request per connection:
+request ``!I`` length + UTF-8 JSON ``{"texts": [...]}``; response ``!BII``
+(status, rows, dim) followed by ``rows * dim`` float32 values, or by a UTF-8
+error message of ``rows`` bytes when status is non-zero.
+"""
+import json
+import logging
+import os
+import queue
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+from metrics import histogram
+
+EMBEDDING_SERVICE_SOCKET = os.getenv('EMBEDDING_SERVICE_SOCKET', os.path.join('cache', 'embedding.sock'))
+EMBEDDING_SERVICE_MAX_BATCH = int(os.getenv('EMBEDDING_SERVICE_MAX_BATCH', '64'))
+EMBEDDING_SERVICE_MAX_WAIT_MS = float(os.getenv('EMBEDDING_SERVICE_MAX_WAIT_MS', '5'))
+EMBEDDING_SERVICE_THREADS = int(os.getenv('EMBEDDING_SERVICE_THREADS', str(os.cpu_count() or 1)))
+EMBEDDING_SERVICE_TIMEOUT = float(os.getenv('EMBEDDING_SERVICE_TIMEOUT', '60'))
+# After a failed call, workers encode in-process for this long before trying the service again
+EMBEDDING_SERVICE_RETRY_SECONDS = 30
+
+REQUEST_HEADER = struct.Struct('!I')
+RESPONSE_HEADER = struct.Struct('!BII')
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+BATCH_SIZES = histogram('recruitment_embedding_service_batch_size', "Texts encoded per micro-batch",
+                        buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+BATCH_SECONDS = histogram('recruitment_embedding_service_batch_seconds', "Time to encode one micro-batch")
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingServiceError(Exception):
+    pass
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise EmbeddingServiceError('connection closed mid-message')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+class MicroBatcher:
+    """Collects concurrent encode requests and runs them through the model together.
+
+    A batch is closed once it holds ``max_batch`` texts or ``max_wait``
+    seconds after its first request arrived, whichever comes first.
+    """
+
+    def __init__(self, encode, max_batch=EMBEDDING_SERVICE_MAX_BATCH,
+                 max_wait=EMBEDDING_SERVICE_MAX_WAIT_MS / 1000):
+        self.encode = encode
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.texts = 0
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name='embedding-batcher', daemon=True).start()
+
+    def submit(self, texts):
+        """Block until ``texts`` are encoded and return their float32 matrix."""
+        request = {'texts': texts, 'done': threading.Event(), 'result': None, 'error': None}
+        self._queue.put(request)
+        request['done'].wait()
+        if request['error'] is not None:
+            raise request['error']
+        return request['result']
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0]['texts'])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += len(request['texts'])
+
+            try:
+                with BATCH_SECONDS.time():
+                    vectors = np.asarray(self.encode([text for request in batch for text in request['texts']]),
+                                         dtype=np.float32)
+                start = 0
+                for request in batch:
+                    request['result'] = vectors[start:start + len(request['texts'])]
+                    start += len(request['texts'])
+            except Exception as e:
+                for request in batch:
+                    request['error'] = e
+            self.batches += 1
+            self.texts += size
+            BATCH_SIZES.observe(size)
+            for request in batch:
+                request['done'].set()
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            (length,) = REQUEST_HEADER.unpack(_recv_exactly(self.request, REQUEST_HEADER.size))
+            if length > MAX_REQUEST_BYTES:
+                raise EmbeddingServiceError('request too large')
+            texts = json.loads(_recv_exactly(self.request, length))['texts']
+            vectors = self.server.batcher.submit(texts) if texts else np.zeros((0, 0), dtype=np.float32)
+            rows, dim = vectors.shape
+            self.request.sendall(RESPONSE_HEADER.pack(0, rows, dim) + vectors.astype(np.float32).tobytes())
+        except Exception as e:
+            message = f"{type(e).__name__}: {e}".encode('utf-8')
+            try:
+                self.request.sendall(RESPONSE_HEADER.pack(1, len(message), 0) + message)
+            except OSError:
+                pass
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 256  # every worker thread may connect at once
+
+    def __init__(self, path, batcher):
+        self.batcher = batcher
+        if os.path.exists(path):
+            os.remove(path)  # stale socket from a previous run
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        super().__init__(path, _RequestHandler)
+
+
+class EmbeddingServiceClient:
+    """Client used by the web workers; ``encode`` raises EmbeddingServiceError on any failure."""
+
+    def __init__(self, path=EMBEDDING_SERVICE_SOCKET, timeout=EMBEDDING_SERVICE_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._down_until = 0
+
+    def available(self):
+        return time.monotonic() >= self._down_until and os.path.exists(self.path)
+
+    def mark_down(self):
+        self._down_until = time.monotonic() + EMBEDDING_SERVICE_RETRY_SECONDS
+
+    def encode(self, texts):
+        payload = json.dumps({'texts': list(texts)}).encode('utf-8')
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.path)
+                sock.sendall(REQUEST_HEADER.pack(len(payload)) + payload)
+                status, rows, dim = RESPONSE_HEADER.unpack(_recv_exactly(sock, RESPONSE_HEADER.size))
+                if status:
+                    raise EmbeddingServiceError(_recv_exactly(sock, rows).decode('utf-8', 'replace'))
+                data = _recv_exactly(sock, rows * dim * 4)
+        except OSError as e:
+            raise EmbeddingServiceError(str(e)) from e
+        return np.frombuffer(data, dtype=np.float32).reshape(rows, dim)
+
+    def ping(self):
+        try:
+            self.encode([])
+            return True
+        except EmbeddingServiceError:
+            return False
+
+
+_client = None
+
+
+def get_embedding_client():
+    """The shared client, or None when no service socket is configured."""
+    global _client
+    if _client is None and EMBEDDING_SERVICE_SOCKET:
+        _client = EmbeddingServiceClient()
+    return _client
+
+
+def main():
+    import utils
+    from logging_config import configure_logging
+
+    configure_logging()
+
+    if utils.EMBEDDING_BACKEND == 'torch':
+        import torch
+        torch.set_num_threads(EMBEDDING_SERVICE_THREADS)
+    model = utils.load_model()
+
+    def encode(texts):
+        return model.encode(texts, batch_size=EMBEDDING_SERVICE_MAX_BATCH, normalize_embeddings=True)
+
+    # Warm up before binding, so an existing socket means the service is ready
+    encode(utils.WARMUP_TEXTS)
+    server = EmbeddingServer(EMBEDDING_SERVICE_SOCKET, MicroBatcher(encode))
+    logger.info("Embedding service listening on %s (batch %d, wait %sms)", EMBEDDING_SERVICE_SOCKET,
+                EMBEDDING_SERVICE_MAX_BATCH, EMBEDDING_SERVICE_MAX_WAIT_MS)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(EMBEDDING_SERVICE_SOCKET):
+            os.remove(EMBEDDING_SERVICE_SOCKET)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+# extraction.py
+import logging
+import os
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, TimeoutError, wait
+
+from metrics import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+# Set EXTRACTION_WORKERS=0 to extract in-process (no isolation)
+EXTRACTION_WORKERS = int(os.getenv('EXTRACTION_WORKERS', str(os.cpu_count() or 1)))
+EXTRACTION_TIMEOUT = float(os.getenv('EXTRACTION_TIMEOUT', '20'))
+EXTRACTION_MAX_PAGES = int(os.getenv('EXTRACTION_MAX_PAGES', '20'))
+FALLBACK_TEXT = "Professional resume content"
+# Extra seconds a worker gets past its alarm before it is treated as hung
+HUNG_WORKER_GRACE = 5
+EXTRACTION_SECONDS = histogram('recruitment_extraction_seconds', "Time to extract text from one upload",
+                               ('format',))
+EXTRACTION_FAILURES = counter('recruitment_extraction_failures_total',
+                              "Uploads whose text could not be extracted, by reason", ('reason',))
+
+
+class ExtractionTimeout(BaseException):
+    # Not an Exception, so PyPDF2's and our own broad handlers can't swallow it
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout()
+
+
+def _extract_document(data, filename, max_pages, timeout):
+    """Worker entry point: extract one in-memory upload under a wall-clock alarm."""
+    from utils import EXTRACTORS, extract_text
+
+    use_alarm = timeout and hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    started = time.perf_counter()
+    try:
+        return extract_text(data, filename, max_pages=max_pages)
+    except ExtractionTimeout:
+        EXTRACTION_FAILURES.inc(reason='timeout')
+        logger.warning("Extraction timed out after %ss: %s", timeout, filename)
+        return FALLBACK_TEXT
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        extension = filename.rsplit('.', 1)[-1].lower()
+        EXTRACTION_SECONDS.observe(time.perf_counter() - started,
+                                   format=extension if extension in EXTRACTORS else 'other')
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=EXTRACTION_WORKERS)
+        return _pool
+
+
+def warm_up_pool():
+    """Start the extraction worker processes now instead of on the first upload."""
+    if EXTRACTION_WORKERS >= 1:
+        pool = _get_pool()
+        for future in [pool.submit(os.getpid) for _ in range(EXTRACTION_WORKERS)]:
+            future.result()
+
+
+def _reset_pool(pool):
+    """Throw away ``pool``, killing any worker stuck on a file, unless it was already replaced."""
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            return
+        _pool = None
+    # A hung worker never returns, so terminate processes rather than wait on them
+    for process in list(getattr(pool, '_processes', {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _reset_if_hung(pool, futures, timeout):
+    """Reset ``pool`` if any of ``futures`` is still running long after its worker's alarm should have fired.
+
+    A missed deadline usually means the pool is busy with other searches, not
+    that a worker is stuck, and resetting would fail their files too. A
+    future already handed to a worker finishes within two alarm periods
+    (one for the file ahead of it in the call queue, one for itself) unless
+    the worker ignores the alarm, so only then is the shared pool replaced.
+    """
+    _, still_running = wait(futures, timeout=2 * (timeout or 60) + HUNG_WORKER_GRACE)
+    if still_running:
+        EXTRACTION_FAILURES.inc(len(still_running), reason='hung')
+        logger.warning("%d extraction workers stopped responding; restarting the pool", len(still_running))
+        _reset_pool(pool)
+
+
+def _abandon(pool, futures, timeout):
+    """Give up on this call's unfinished ``futures`` without failing other callers' files."""
+    running = [future for future in futures if not future.cancel()]
+    if running:
+        threading.Thread(target=_reset_if_hung, args=(pool, running, timeout), daemon=True).start()
+
+
+def iter_extracted_batches(documents, max_pages=EXTRACTION_MAX_PAGES, timeout=EXTRACTION_TIMEOUT):
+    """Extract resume text from ``(data, filename)`` uploads across a process pool.
+
+    Yields lists of ``(index, text)`` pairs in completion order, each list
+    holding every file that finished since the previous one, so callers can
+    start downstream work before the slowest file finishes and batch whatever
+    is ready. Each file is limited to ``max_pages`` pages and ``timeout``
+    seconds; a file that times out, is malformed or crashes its worker yields
+    the fallback text instead of failing the batch. The pool is shared by
+    every search, so when the whole call overruns its deadline only this
+    call's unfinished files fall back; other searches keep their workers.
+    """
+    documents = list(documents)
+    if EXTRACTION_WORKERS < 1:
+        # Pool disabled: no worker to isolate, and the alarm signal belongs to the web server
+        for index, (data, filename) in enumerate(documents):
+            yield [(index, _extract_document(data, filename, max_pages, None))]
+        return
+
+    remaining = dict(enumerate(documents))
+    pool = _get_pool()
+    futures = {pool.submit(_extract_document, data, filename, max_pages, timeout): index
+               for index, (data, filename) in remaining.items()}
+    # Backstop for workers that ignore the alarm (e.g. stuck inside C code)
+    deadline = time.monotonic() + (timeout or 60) * (len(futures) / max(EXTRACTION_WORKERS, 1) + 2)
+    pending = set(futures)
+    broken = False
+    while pending and not broken:
+        done, pending = wait(pending, timeout=max(0, deadline - time.monotonic()),
+                             return_when=FIRST_COMPLETED)
+        if not done:
+            EXTRACTION_FAILURES.inc(len(pending), reason='deadline')
+            logger.warning("Extraction deadline passed with %d files outstanding", len(pending))
+            _abandon(pool, pending, timeout)
+            yield [(index, FALLBACK_TEXT) for index in remaining]
+            return
+        batch = []
+        for future in done:
+            if future.exception() is not None:
+                broken = True
+                continue
+            index = futures[future]
+            batch.append((index, future.result()))
+            del remaining[index]
+        if batch:
+            yield batch
+    if not broken:
+        return
+
+    logger.warning("Extraction worker crashed; retrying %d files one at a time", len(remaining))
+    # Every future on a broken pool has failed, so replacing it costs other callers nothing more
+    _reset_pool(pool)
+    # Retry the survivors one by one so only the file that kills its worker is lost
+    for index, (data, filename) in list(remaining.items()):
+        pool = _get_pool()
+        future = pool.submit(_extract_document, data, filename, max_pages, timeout)
+        try:
+            text = future.result(timeout=(timeout or 60) * 2)
+        except TimeoutError:
+            EXTRACTION_FAILURES.inc(reason='deadline')
+            logger.warning("Skipping %s: extraction deadline passed", filename)
+            _abandon(pool, [future], timeout)
+            text = FALLBACK_TEXT
+        except Exception as e:
+            EXTRACTION_FAILURES.inc(reason='crash')
+            logger.warning("Skipping %s: %s", filename, type(e).__name__)
+            _reset_pool(pool)
+            text = FALLBACK_TEXT
+        del remaining[index]
+        yield [(index, text)]
+
+
+def iter_extracted_texts(documents, max_pages=EXTRACTION_MAX_PAGES, timeout=EXTRACTION_TIMEOUT):
+    """Like iter_extracted_batches, but yields one ``(index, text)`` pair at a time."""
+    for batch in iter_extracted_batches(documents, max_pages, timeout):
+        yield from batch
@@ -0,0 +1,70 @@
+# gunicorn.conf.py
+import gc
+import os
+import subprocess
+import sys
+import time
+
+# Import the app (and load the model) once in the master; workers fork from it
+# and share the model weights copy-on-write instead of each loading a copy.
+preload_app = os.getenv('PRELOAD_MODEL', '1') == '1'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+# Threaded workers keep heartbeating while a thread serves a long progress stream; a sync worker
+# would be killed after ``timeout``, taking its background search jobs with it
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+# Run the model in a separate embedding service that micro-batches requests from all workers
+EMBEDDING_SERVICE = os.getenv('EMBEDDING_SERVICE', '1') == '1'
+EMBEDDING_SERVICE_START_TIMEOUT = float(os.getenv('EMBEDDING_SERVICE_START_TIMEOUT', '120'))
+
+_service = None
+
+
+def on_starting(server):
+    global _service
+    from metrics import clear_metrics_dir
+    # Workers' metric snapshots are summed on /metrics; drop the previous run's
+    clear_metrics_dir()
+    if EMBEDDING_SERVICE:
+        _service = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                  'embedding_service.py')])
+
+
+def when_ready(server):
+    from embedding_service import get_embedding_client
+
+    client = get_embedding_client()
+    if _service is not None and client is not None:
+        deadline = time.monotonic() + EMBEDDING_SERVICE_START_TIMEOUT
+        while _service.poll() is None and time.monotonic() < deadline:
+            if client.ping():
+                server.log.info("Embedding service ready; workers will not load the model")
+                return
+            time.sleep(0.5)
+        server.log.warning("Embedding service did not start; workers will encode in-process")
+    if preload_app:
+        from utils import load_model
+        load_model()
+        # Keep the collector from touching (and so copying) the preloaded objects in workers
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    # Runs before the worker accepts connections, so no user request pays for warm-up
+    from pipeline import warm_up
+    warm_up()
+
+
+def child_exit(server, worker):
+    # Search jobs run on the worker's threads, so any it still had can never finish
+    from background_jobs import fail_orphaned_jobs
+    from metrics import retire_dead_snapshots
+    fail_orphaned_jobs(pid=worker.pid)
+    # Fold its metric snapshot into the retired totals now rather than on the next scrape
+    retire_dead_snapshots()
+
+
+def on_exit(server):
+    if _service is not None and _service.poll() is None:
+        _service.terminate()
+        _service.wait(timeout=10)
@@ -0,0 +1,164 @@
+# inference_backends.py
+import json
+import logging
+import os
+import re
+import zlib
+
+import numpy as np
+
+# Sentence-transformers model directory to load instead of downloading MODEL_NAME
+EMBEDDING_MODEL_DIR = os.getenv('EMBEDDING_MODEL_DIR')
+EMBEDDING_ONNX_DIR = os.getenv('EMBEDDING_ONNX_DIR', os.path.join('cache', 'onnx'))
+EMBEDDING_THREADS = int(os.getenv('EMBEDDING_THREADS', '0'))  # 0 = runtime default
+ONNX_INPUT_NAMES = ('input_ids', 'attention_mask', 'token_type_ids')
+STUB_TOKEN = re.compile(r'\w+')
+
+logger = logging.getLogger(__name__)
+
+
+class TorchBackend:
+    """The sentence-transformers PyTorch model, as originally used."""
+
+    name = 'torch'
+
+    def __init__(self, model_name_or_dir):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name_or_dir, device='cpu')
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=True):
+        return self.model.encode(texts, batch_size=batch_size, normalize_embeddings=normalize_embeddings)
+
+
+class StubBackend:
+    """Deterministic feature-hashing embeddings for benchmarks and tests; loads no weights.
+
+    Each word adds 1 to a dimension picked by its CRC32, so texts sharing
+    words score as similar, which is enough to exercise ranking.
+    """
+
+    name = 'stub'
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=True):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in STUB_TOKEN.findall(text.lower()):
+                embeddings[row, zlib.crc32(token.encode('utf-8')) % self.dim] += 1
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.where(norms == 0, 1, norms)
+        return embeddings[0] if single else embeddings
+
+
+def export_onnx(model_dir, output_dir):
+    """Export a local sentence-transformers model, pooling included, to ``output_dir/model.onnx``.
+
+    Needs torch and sentence-transformers, but only once: the ONNX backend
+    afterwards runs on onnxruntime and tokenizers alone.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_dir, device='cpu')
+    model.eval()
+
+    class SentenceEmbedding(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            features = {'input_ids': input_ids, 'attention_mask': attention_mask, 'token_type_ids': token_type_ids}
+            return self.model(features)['sentence_embedding']
+
+    # Trace with padding present so the attention-mask path ends up in the graph
+    sample = model.tokenizer(["Python developer", "Senior engineer leading cloud data teams"],
+                             padding=True, return_tensors='pt', return_token_type_ids=True)
+    os.makedirs(output_dir, exist_ok=True)
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in ONNX_INPUT_NAMES}
+    dynamic_axes['sentence_embedding'] = {0: 'batch'}
+    torch.onnx.export(SentenceEmbedding(), tuple(sample[name] for name in ONNX_INPUT_NAMES),
+                      os.path.join(output_dir, 'model.onnx'), dynamo=False, opset_version=17,
+                      input_names=list(ONNX_INPUT_NAMES), output_names=['sentence_embedding'],
+                      dynamic_axes=dynamic_axes)
+    model.tokenizer.backend_tokenizer.save(os.path.join(output_dir, 'tokenizer.json'))
+    with open(os.path.join(output_dir, 'onnx_config.json'), 'w') as f:
+        json.dump({'max_seq_length': model.max_seq_length, 'pad_token_id': model.tokenizer.pad_token_id or 0}, f)
+
+
+class OnnxBackend:
+    """ONNX Runtime on CPU, optionally with dynamically int8-quantized weights.
+
+    The model is exported from a local directory on first use and cached in
+    ``onnx_dir``; nothing is downloaded.
+    """
+
+    def __init__(self, model_dir, onnx_dir, quantize=False):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.name = 'onnx-int8' if quantize else 'onnx'
+        model_path = os.path.join(onnx_dir, 'model.onnx')
+        if not os.path.exists(model_path):
+            logger.info("Exporting %s to ONNX in %s", model_dir, onnx_dir)
+            export_onnx(model_dir, onnx_dir)
+        if quantize:
+            quantized_path = os.path.join(onnx_dir, 'model.int8.onnx')
+            if not os.path.exists(quantized_path):
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+                quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+            model_path = quantized_path
+
+        with open(os.path.join(onnx_dir, 'onnx_config.json')) as f:
+            config = json.load(f)
+        self.tokenizer = Tokenizer.from_file(os.path.join(onnx_dir, 'tokenizer.json'))
+        self.tokenizer.enable_truncation(config['max_seq_length'])
+        self.tokenizer.enable_padding(pad_id=config['pad_token_id'])
+
+        options = onnxruntime.SessionOptions()
+        if EMBEDDING_THREADS:
+            options.intra_op_num_threads = EMBEDDING_THREADS
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=True):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        batches = []
+        # Sort by length so each batch pads to similar lengths
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), batch_size):
+            encodings = self.tokenizer.encode_batch([texts[i] for i in order[start:start + batch_size]])
+            inputs = {
+                'input_ids': np.array([e.ids for e in encodings], dtype=np.int64),
+                'attention_mask': np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                'token_type_ids': np.array([e.type_ids for e in encodings], dtype=np.int64)
+            }
+            batches.append(self.session.run(None, inputs)[0])
+        if not batches:
+            return np.zeros((0, self.session.get_outputs()[0].shape[-1]), dtype=np.float32)
+        embeddings = np.empty((len(texts), batches[0].shape[1]), dtype=np.float32)
+        embeddings[order] = np.concatenate(batches)
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.where(norms == 0, 1, norms)
+        return embeddings[0] if single else embeddings
+
+
+def create_backend(name, model_name, model_dir=EMBEDDING_MODEL_DIR, onnx_dir=None):
+    """Build the inference backend called ``name``: 'torch', 'onnx', 'onnx-int8' or 'stub'."""
+    if name == 'stub':
+        return StubBackend()
+    if name == 'torch':
+        return TorchBackend(model_dir or model_name)
+    if name in ('onnx', 'onnx-int8'):
+        if not model_dir:
+            raise ValueError(f"EMBEDDING_MODEL_DIR must point to a local copy of {model_name} "
+                             f"for the {name} backend")
+        onnx_dir = onnx_dir or os.path.join(EMBEDDING_ONNX_DIR, os.path.basename(os.path.normpath(model_dir)))
+        return OnnxBackend(model_dir, onnx_dir, quantize=name == 'onnx-int8')
+    raise ValueError(f"Unknown embedding backend: {name}")
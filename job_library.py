@@ -0,0 +1,187 @@
+# job_library.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from embedding_cache import STORAGE_FAILURES
+from utils import EMBEDDING_DIM, EMBEDDING_MODEL_KEY, extract_skills, get_embeddings
+
+JOB_LIBRARY_PATH = os.getenv('JOB_LIBRARY_PATH', os.path.join('job_library', 'roles.sqlite3'))
+ROLE_STATUSES = ('open', 'closed')
+
+logger = logging.getLogger(__name__)
+
+
+class JobLibrary:
+    """Saved job descriptions ("roles") with their embeddings and required skills.
+
+    Each role's description is embedded and its skills extracted once, when
+    it is saved, and both are stored in an SQLite file every worker shares.
+    open_roles() returns the open roles' embeddings as one matrix, so a batch
+    of resumes can be scored against all of them with a single product. The
+    matrix is kept per process and only reloaded after some worker changes
+    the library. Roles embedded by a different model are re-embedded when
+    next loaded.
+    """
+
+    def __init__(self, path=JOB_LIBRARY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._open_roles = None  # (data version, roles, matrix)
+        self._writes = 0
+
+    def _connection(self):
+        # SQLite handles must not cross a fork, so reconnect per process
+        if self._conn is None or self._conn_pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('''CREATE TABLE IF NOT EXISTS roles (
+                id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                skills TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                model_key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_by TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )''')
+            self._conn, self._conn_pid = conn, os.getpid()
+            self._open_roles = None
+        return self._conn
+
+    def _version(self, conn):
+        # data_version changes when another connection commits; our own writes are counted separately
+        return conn.execute('PRAGMA data_version').fetchone()[0], self._writes
+
+    @staticmethod
+    def _role(row):
+        return {
+            'id': row[0],
+            'title': row[1],
+            'description': row[2],
+            'skills': json.loads(row[3]),
+            'status': row[4],
+            'created_by': row[5],
+            'created_at': row[6],
+            'updated_at': row[7]
+        }
+
+    def _write(self, sql, params):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                cursor = conn.execute(sql, params)
+            self._writes += 1
+            return cursor.rowcount
+
+    def add(self, title, description, created_by=None):
+        """Save a new open role and return it."""
+        embedding = get_embeddings([description])[0]
+        now = time.time()
+        role_id = uuid.uuid4().hex[:12]
+        skills = extract_skills(description)
+        self._write('''INSERT INTO roles (id, title, description, skills, embedding, model_key, status, created_by,
+                       created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, 'open', ?, ?, ?)''',
+                    (role_id, title, description, json.dumps(skills), embedding.astype(np.float32).tobytes(),
+                     EMBEDDING_MODEL_KEY, created_by, now, now))
+        return self.get(role_id)
+
+    def update(self, role_id, title=None, description=None, status=None):
+        """Change a role's title, description or status; returns the role, or None if it doesn't exist."""
+        if status is not None and status not in ROLE_STATUSES:
+            raise ValueError(f"status must be one of {ROLE_STATUSES}")
+        role = self.get(role_id)
+        if role is None:
+            return None
+        description = description if description is not None else role['description']
+        fields = {'title': title or role['title'], 'status': status or role['status'], 'updated_at': time.time()}
+        if description != role['description']:
+            fields.update(description=description, skills=json.dumps(extract_skills(description)),
+                          embedding=get_embeddings([description])[0].astype(np.float32).tobytes(),
+                          model_key=EMBEDDING_MODEL_KEY)
+        self._write(f"UPDATE roles SET {', '.join(f'{field} = ?' for field in fields)} WHERE id = ?",
+                    (*fields.values(), role_id))
+        return self.get(role_id)
+
+    def delete(self, role_id):
+        return self._write('DELETE FROM roles WHERE id = ?', (role_id,)) > 0
+
+    def get(self, role_id):
+        with self._lock:
+            row = self._connection().execute(
+                '''SELECT id, title, description, skills, status, created_by, created_at, updated_at
+                   FROM roles WHERE id = ?''', (role_id,)).fetchone()
+        return self._role(row) if row else None
+
+    def list(self, status=None):
+        """Every role (or those with ``status``), open first, then newest first."""
+        query = 'SELECT id, title, description, skills, status, created_by, created_at, updated_at FROM roles'
+        params = ()
+        if status is not None:
+            query, params = query + ' WHERE status = ?', (status,)
+        with self._lock:
+            rows = self._connection().execute(
+                query + " ORDER BY status = 'closed', created_at DESC", params).fetchall()
+        return [self._role(row) for row in rows]
+
+    def open_roles(self):
+        """``(roles, embeddings)`` for every open role: role dicts and a float32 matrix with a row each."""
+        try:
+            with self._lock:
+                conn = self._connection()
+                version = self._version(conn)
+                if self._open_roles is not None and self._open_roles[0] == version:
+                    return self._open_roles[1], self._open_roles[2]
+                rows = conn.execute(
+                    '''SELECT id, title, description, skills, status, created_by, created_at, updated_at,
+                              embedding, model_key
+                       FROM roles WHERE status = 'open' ORDER BY created_at''').fetchall()
+        except sqlite3.Error as e:
+            STORAGE_FAILURES.inc(store='job_library', operation='read')
+            logger.warning("Job library read failed: %s", e)
+            return [], np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+
+        roles = [self._role(row[:8]) for row in rows]
+        embeddings = np.zeros((len(rows), EMBEDDING_DIM), dtype=np.float32)
+        stale = []
+        for i, row in enumerate(rows):
+            if row[9] == EMBEDDING_MODEL_KEY:
+                embeddings[i] = np.frombuffer(row[8], dtype=np.float32)
+            else:
+                stale.append(i)
+        if stale:
+            logger.info("Re-embedding %d roles saved with another model", len(stale))
+            embeddings[stale] = get_embeddings([roles[i]['description'] for i in stale])
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.executemany('UPDATE roles SET embedding = ?, model_key = ? WHERE id = ?',
+                                     [(embeddings[i].tobytes(), EMBEDDING_MODEL_KEY, roles[i]['id']) for i in stale])
+                self._writes += 1
+                version = self._version(conn)
+        self._open_roles = (version, roles, embeddings)
+        return roles, embeddings
+
+
+_library = None
+
+
+def get_job_library():
+    global _library
+    if _library is None:
+        _library = JobLibrary()
+    return _library
@@ -0,0 +1,50 @@
+# logging_config.py
+import json
+import logging
+import os
+import sys
+import time
+
+# DEBUG, INFO, WARNING, ERROR or OFF; per-resume progress is logged at DEBUG
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+# 'text' for humans, 'json' for one structured object per line
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+# LogRecord attributes that are not ``extra=`` fields
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with any ``extra=`` fields as top-level keys."""
+
+    def format(self, record):
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            'level': record.levelname,
+            'logger': record.name,
+            'pid': record.process,
+            'message': record.getMessage()
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_FIELDS)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level=None, fmt=None):
+    """Send application logs to stderr at LOG_LEVEL in LOG_FORMAT; safe to call more than once."""
+    level = (level or LOG_LEVEL).upper()
+    fmt = fmt or LOG_FORMAT
+    root = logging.getLogger()
+    for handler in [h for h in root.handlers if getattr(h, '_app_handler', False)]:
+        root.removeHandler(handler)
+    if level == 'OFF':
+        root.setLevel(logging.CRITICAL + 1)
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    handler._app_handler = True
+    if fmt == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s'))
+    root.addHandler(handler)
+    root.setLevel(level)
@@ -0,0 +1,306 @@
+# metrics.py
+"""Counters and histograms exposed in Prometheus text format on /metrics.
+
+Each process (gunicorn master and workers, extraction pool workers, the
+embedding service) records into memory under a lock, and a background
+thread writes a snapshot to ``METRICS_DIR/<pid>.json`` every
+METRICS_FLUSH_INTERVAL seconds. render_metrics() merges every snapshot, so
+whichever worker serves /metrics reports totals for the whole server.
+Snapshots of exited processes are folded into a single ``retired.json``
+so counters never go backwards but the directory stays one file per live
+process; clear_metrics_dir() starts afresh when the server starts.
+"""
+import atexit
+import bisect
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_DIR = os.getenv('METRICS_DIR', 'metrics')  # '' = this process only
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# For per-candidate steps that take a millisecond or so
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+_registry = {}
+_registry_lock = threading.Lock()
+_flusher = {'pid': None, 'dirty': False}
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self):
+        with self._lock:
+            values = [[list(key), value if self.kind == 'counter' else dict(value, buckets=list(value['buckets']))]
+                      for key, value in self._values.items()]
+        return {'type': self.kind, 'help': self.documentation, 'labels': list(self.labelnames), 'values': values}
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        _mark_dirty()
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # Per-bucket (not cumulative) counts; the overflow slot is +Inf
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+        _mark_dirty()
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the ``with`` block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self):
+        snapshot = super().snapshot()
+        snapshot['bucket_bounds'] = list(self.buckets)
+        return snapshot
+
+
+def _register(cls, name, *args, **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, *args, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"{name} is already registered as a {metric.kind}")
+        return metric
+
+
+def counter(name, documentation, labelnames=()):
+    """The process-wide counter called ``name``, created on first use."""
+    return _register(Counter, name, documentation, labelnames)
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    """The process-wide histogram called ``name``, created on first use."""
+    return _register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+
+# -------------------- CROSS-PROCESS AGGREGATION --------------------
+
+RETIRED_SNAPSHOT = 'retired.json'
+
+
+def _snapshot_path():
+    return os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _read_snapshot(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None  # missing, or replaced mid-read; the next scrape picks it up
+
+
+def _write_snapshot(path, snapshot):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+
+def flush():
+    """Write this process's metrics to its snapshot file."""
+    if not METRICS_DIR:
+        return
+    _flusher['dirty'] = False
+    with _registry_lock:
+        metrics = list(_registry.values())
+    snapshot = {metric.name: metric.snapshot() for metric in metrics}
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        _write_snapshot(_snapshot_path(), snapshot)
+    except OSError:
+        _flusher['dirty'] = True
+
+
+def _flush_loop():
+    while True:
+        time.sleep(METRICS_FLUSH_INTERVAL)
+        if _flusher['dirty']:
+            flush()
+
+
+def _mark_dirty():
+    _flusher['dirty'] = True
+    if _flusher['pid'] != os.getpid() and METRICS_DIR:
+        # First update in this process (or since a fork, which doesn't copy threads)
+        with _registry_lock:
+            if _flusher['pid'] != os.getpid():
+                _flusher['pid'] = os.getpid()
+                threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True).start()
+
+
+def _after_fork_in_child():
+    # The parent's values are already counted in the parent's own snapshot. Locks are
+    # replaced rather than taken, since a thread that held one at fork time is gone.
+    global _registry_lock
+    _registry_lock = threading.Lock()
+    for metric in _registry.values():
+        metric._lock = threading.Lock()
+        metric._values = {}
+    _flusher['dirty'] = False
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+atexit.register(lambda: _flusher['dirty'] and flush())
+
+
+def clear_metrics_dir():
+    """Delete every process's snapshot; call once when the server starts."""
+    for path in glob.glob(os.path.join(METRICS_DIR, '*.json')) if METRICS_DIR else []:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def retire_dead_snapshots():
+    """Fold the snapshots of exited processes into ``retired.json`` and delete them.
+
+    Runs on every scrape (and when gunicorn reaps a worker) under a lock, so
+    each dead process is added to the retired totals exactly once.
+    """
+    if not METRICS_DIR:
+        return
+    dead = []
+    for path in glob.glob(os.path.join(METRICS_DIR, '*.json')):
+        pid = os.path.basename(path)[:-len('.json')]
+        if pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+            dead.append(path)
+    if not dead:
+        return
+    try:
+        with open(os.path.join(METRICS_DIR, 'retired.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            retired_path = os.path.join(METRICS_DIR, RETIRED_SNAPSHOT)
+            snapshots = [_read_snapshot(retired_path)] + [_read_snapshot(path) for path in dead]
+            # Another worker may have folded some of these while we waited for the lock
+            folded = [path for path, snapshot in zip(dead, snapshots[1:]) if snapshot is not None]
+            if not folded:
+                return
+            merged = _merge(snapshot for snapshot in snapshots if snapshot is not None)
+            _write_snapshot(retired_path, {name: dict(metric, values=[[list(key), value] for key, value
+                                                                      in metric['values'].items()])
+                                           for name, metric in merged.items()})
+            for path in folded:
+                os.remove(path)
+    except OSError:
+        pass  # retried on the next scrape
+
+
+def _merged_snapshots():
+    if not METRICS_DIR:
+        with _registry_lock:
+            return [{metric.name: metric.snapshot() for metric in _registry.values()}]
+    flush()
+    retire_dead_snapshots()
+    snapshots = (_read_snapshot(path) for path in glob.glob(os.path.join(METRICS_DIR, '*.json')))
+    return [snapshot for snapshot in snapshots if snapshot is not None]
+
+
+def _merge(snapshots):
+    """Sum ``snapshots`` into ``{name: metric}`` with values keyed by label tuple."""
+    merged = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, dict(metric, values={}))
+            for key, value in metric['values']:
+                key = tuple(key)
+                if metric['type'] == 'counter':
+                    target['values'][key] = target['values'].get(key, 0) + value
+                    continue
+                series = target['values'].setdefault(
+                    key, {'buckets': [0] * len(value['buckets']), 'sum': 0.0, 'count': 0})
+                series['buckets'] = [a + b for a, b in zip(series['buckets'], value['buckets'])]
+                series['sum'] += value['sum']
+                series['count'] += value['count']
+    return merged
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+def render_metrics():
+    """All processes' metrics, summed, in the Prometheus text exposition format."""
+    merged = _merge(_merged_snapshots())
+
+    lines = []
+    for name in sorted(merged):
+        metric = merged[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for key, value in sorted(metric['values'].items()):
+            if metric['type'] == 'counter':
+                lines.append(f"{name}{_format_labels(metric['labels'], key)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric['bucket_bounds'] + [float('inf')], value['buckets']):
+                cumulative += count
+                labels = _format_labels(metric['labels'], key, [('le', _format_bound(bound))])
+                lines.append(f"{name}_bucket{labels} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(metric['labels'], key)} {value['sum']}")
+            lines.append(f"{name}_count{_format_labels(metric['labels'], key)} {value['count']}")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,84 @@
+# phrase_matcher.py
+from collections import deque
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton that finds many phrases in one pass over a text.
+
+    The trie and failure links are built once; state transitions are then
+    memoized on first use, so scanning costs a single dict lookup per
+    character no matter how many phrases are loaded. Phrases and texts are
+    matched as given, so callers lowercase both when case should not matter.
+    """
+
+    def __init__(self, phrases):
+        self.phrases = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        index = {}
+        for phrase in phrases:
+            if not phrase or phrase in index:
+                continue
+            index[phrase] = len(self.phrases)
+            self.phrases.append(phrase)
+            state = 0
+            for ch in phrase:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            self._output[state] += (index[phrase],)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(ch, 0)
+                self._fail[next_state] = fail if fail != next_state else 0
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+        self._lengths = [len(phrase) for phrase in self.phrases]
+        self._delta = [dict(transitions) for transitions in self._goto]
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def _transition(self, state, ch):
+        # Follow failure links once, then remember the result for this state
+        origin = state
+        while state and ch not in self._goto[state]:
+            state = self._fail[state]
+        next_state = self._goto[state].get(ch, 0)
+        self._delta[origin][ch] = next_state
+        return next_state
+
+    def iter_matches(self, text):
+        """Yield ``(start, end, phrase)`` for every occurrence, overlaps included."""
+        delta, output, transition = self._delta, self._output, self._transition
+        state = 0
+        for end, ch in enumerate(text, 1):
+            next_state = delta[state].get(ch)
+            state = transition(state, ch) if next_state is None else next_state
+            for phrase_id in output[state]:
+                yield end - self._lengths[phrase_id], end, self.phrases[phrase_id]
+
+    def find(self, text):
+        """Return the set of phrases that occur anywhere in ``text``."""
+        delta, output, transition = self._delta, self._output, self._transition
+        state = 0
+        hit_states = set()
+        for ch in text:
+            next_state = delta[state].get(ch)
+            state = transition(state, ch) if next_state is None else next_state
+            if output[state]:
+                hit_states.add(state)
+        return {self.phrases[phrase_id] for state in hit_states for phrase_id in output[state]}
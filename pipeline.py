@@ -0,0 +1,444 @@
+# pipeline.py
+import logging
+import itertools
+import os
+import re
+import time
+import uuid
+
+import numpy as np
+
+from dashboard_stats import get_dashboard_stats
+from document_cache import (DUPLICATE_UPLOADS, NearDuplicateIndex, get_document_cache, minhash_signature,
+                            upload_digest)
+from extraction import FALLBACK_TEXT, iter_extracted_batches, warm_up_pool
+from metrics import counter, histogram
+from talent_pool import get_talent_pool
+from utils import (WARMUP_TEXTS, analyze_skill_gaps, extract_skills, get_embedding, get_embeddings, score_candidates,
+                   top_k_indices, generate_ai_insights, detect_fake_resume, warm_up_model)
+
+EMBEDDING_BATCH_SIZE = 32
+# Role matching lists this many candidates per role and roles per candidate
+ROLE_MATCH_TOP_K = int(os.getenv('ROLE_MATCH_TOP_K', '10'))
+ROLE_MATCH_ALTERNATIVES = 3
+STAGES = ('extraction', 'embedding', 'analysis')
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+SEARCHES = counter('recruitment_searches_total', "Completed searches", ('kind',))
+SEARCH_SECONDS = histogram('recruitment_search_seconds', "Time to run a whole search", ('kind',))
+CANDIDATES_ANALYZED = counter('recruitment_candidates_analyzed_total', "Candidates scored and analyzed", ('kind',))
+
+logger = logging.getLogger(__name__)
+
+
+def match_status(match_percentage):
+    if match_percentage >= 85:
+        return 'Perfect Match'
+    elif match_percentage >= 70:
+        return 'Strong Match'
+    elif match_percentage >= 50:
+        return 'Good Match'
+    return 'Partial Match'
+
+
+def record_activity(candidates, kind):
+    """Add scored candidates to the dashboard's running totals."""
+    get_dashboard_stats().record_candidates(kind, [
+        (candidate['score'], candidate['status'], (candidate.get('fake_detection') or {}).get('risk_level'))
+        for candidate in candidates])
+
+
+def candidate_name_from_filename(filename):
+    return os.path.splitext(filename)[0].replace('_', ' ').replace('-', ' ').title()
+
+
+def candidate_email(resume_text, candidate_name):
+    """The first email address in the resume, or one made up from the name."""
+    email_match = EMAIL_PATTERN.search(resume_text)
+    return email_match.group(0) if email_match else f"{candidate_name.lower().replace(' ', '.')}@email.com"
+
+
+def match_percentage(similarity_score):
+    return int(round(float(similarity_score), 4) * 100)
+
+
+def analyze_candidate(job_description, filename, resume_text, similarity_score, fake_detection=None,
+                      insights=True, detect_fake=True):
+    """Build the candidate record shown on the results and scorecard pages.
+
+    Pass a previous ``fake_detection`` result to skip that job-independent
+    check. ``insights=False`` skips the AI insights (leaving ``ai_insights``
+    None) and ``detect_fake=False`` the fake-resume check, for callers that
+    only need scores; insights need the fake-resume check.
+    """
+    percentage = match_percentage(similarity_score)
+    candidate_name = candidate_name_from_filename(filename)
+
+    # Detect fake resume
+    fake_check = fake_detection
+    if fake_check is None and (detect_fake or insights):
+        fake_check = detect_fake_resume(resume_text, candidate_name)
+
+    # Generate AI insights
+    if insights:
+        ai_analysis = generate_ai_insights(job_description, resume_text, candidate_name, fake_check)
+        matched_keywords = ai_analysis['skill_gap_analysis']['strong_skills']
+    else:
+        ai_analysis = None
+        matched_keywords = analyze_skill_gaps(job_description, resume_text)['strong_skills']
+
+    return {
+        'id': uuid.uuid4().hex[:12],
+        'name': candidate_name,
+        'email': candidate_email(resume_text, candidate_name),
+        'filename': filename,
+        'score': percentage,
+        'status': match_status(percentage),
+        'matched_keywords': matched_keywords,
+        'experience': '3+ years' if percentage > 70 else '1-3 years',
+        'ai_insights': ai_analysis,
+        'fake_detection': fake_check,
+        'resume_text': resume_text  # Store for scorecard view
+    }
+
+
+def warm_up():
+    """Prepare this worker for traffic: warm the model, start extraction workers
+    and prime the matchers used by candidate analysis."""
+    warm_up_model(batch_size=EMBEDDING_BATCH_SIZE)
+    warm_up_pool()
+    analyze_candidate(WARMUP_TEXTS[1], 'warm_up.pdf', WARMUP_TEXTS[2], 0.5)
+
+
+def iter_search(job_description, documents, progress=None, kind='upload', **analysis_options):
+    """Score ``(data, filename[, sha256 digest])`` uploads against a job description.
+
+    Yields ``(candidate, resume_embedding)`` for each analyzed candidate as
+    soon as it is ready, in completion order: whatever extractions have finished are embedded together (up to
+    EMBEDDING_BATCH_SIZE at a time), scored and analyzed before waiting on
+    the rest. ``progress`` is called as ``progress(stage, done, total)``
+    while each stage of STAGES advances.
+
+    Uploads are deduplicated by content hash. Text already extracted from
+    an identical earlier upload comes from the document cache, and a repeat
+    of a file, or a near-duplicate of a resume (same body, different
+    header), within this batch reuses that resume's analysis instead of
+    being scored again. Each such candidate carries a ``duplicate`` entry
+    saying what it duplicates. ``analysis_options`` go to analyze_candidate,
+    and ``kind`` labels the search in metrics.
+    """
+    progress = progress or (lambda stage, done, total: None)
+    total = len(documents)
+    started = time.perf_counter()
+    logger.info("Starting search over %d resumes for: %.100s", total, job_description, extra={'resumes': total})
+
+    documents = [document if len(document) == 3 else (*document, upload_digest(document[0]))
+                 for document in documents]
+    document_cache = get_document_cache()
+    cached = document_cache.get_many(list({digest for _, _, digest in documents}))
+    first_index, copies = {}, {}
+    for index, (_, _, digest) in enumerate(documents):
+        if digest in first_index:
+            copies.setdefault(first_index[digest], []).append(index)
+        else:
+            first_index[digest] = index
+    to_extract = [index for digest, index in first_index.items() if digest not in cached]
+    from_cache = [(index, cached[digest]['text']) for digest, index in first_index.items() if digest in cached]
+    for scope, count in (('batch', sum(len(indices) for indices in copies.values())), ('history', len(from_cache))):
+        if count:
+            DUPLICATE_UPLOADS.inc(count, kind='exact', scope=scope)
+
+    def batches():
+        if from_cache:
+            yield from_cache
+        for batch in iter_extracted_batches([documents[index][:2] for index in to_extract]):
+            yield [(to_extract[position], text) for position, text in batch]
+
+    job_embedding = get_embedding(job_description)
+    extracted = total - len(to_extract)
+    embedded = analyzed = 0
+    if extracted:
+        progress('extraction', extracted, total)
+    near_index = NearDuplicateIndex()
+    results = {}  # document index -> (candidate, embedding) of every resume scored so far
+    unrecorded = []  # emitted since the dashboard totals were last updated
+
+    def emit(index, candidate, embedding):
+        nonlocal analyzed
+        results[index] = (candidate, embedding)
+        unrecorded.append(candidate)
+        analyzed += 1
+        progress('analysis', analyzed, total)
+        logger.debug("Analyzed %d/%d %s: %d%% - %s", analyzed, total, candidate['name'], candidate['score'],
+                     candidate['status'])
+        return candidate, embedding
+
+    def duplicate_of(index, original, kind, similarity, resume_text=None):
+        candidate, embedding = results[original]
+        filename = documents[index][1]
+        candidate = dict(candidate, id=uuid.uuid4().hex[:12], filename=filename,
+                         name=candidate_name_from_filename(filename),
+                         duplicate={'kind': kind, 'of': documents[original][1],
+                                    'similarity': similarity, 'scope': 'batch'})
+        if resume_text is not None:
+            candidate.update(email=candidate_email(resume_text, candidate['name']), resume_text=resume_text)
+        return candidate, embedding
+
+    for batch in batches():
+        if batch is not from_cache:
+            extracted += len(batch)
+            progress('extraction', extracted, total)
+        for start in range(0, len(batch), EMBEDDING_BATCH_SIZE):
+            chunk, near_duplicates, signatures = [], [], {}
+            for index, resume_text in batch[start:start + EMBEDDING_BATCH_SIZE]:
+                record = cached.get(documents[index][2])
+                signature = record['signature'] if record else minhash_signature(resume_text)
+                match = near_index.find(signature)
+                if match:
+                    near_duplicates.append((index, resume_text, match))
+                else:
+                    near_index.add(index, signature)
+                    signatures[index] = signature
+                    chunk.append((index, resume_text))
+
+            resume_embeddings = get_embeddings([text for _, text in chunk], batch_size=EMBEDDING_BATCH_SIZE)
+            scores, _ = score_candidates(job_embedding, resume_embeddings)
+            embedded += len(chunk)
+            progress('embedding', embedded, total)
+
+            analyzed_chunk, new_documents = [], []
+            for (index, resume_text), score, resume_embedding in zip(chunk, scores, resume_embeddings):
+                _, filename, digest = documents[index]
+                record = cached.get(digest)
+                candidate = analyze_candidate(job_description, filename, resume_text, score,
+                                              fake_detection=record and record['fake_detection'],
+                                              **analysis_options)
+                if record:
+                    candidate['duplicate'] = {'kind': 'exact', 'of': record['filename'], 'similarity': 1.0,
+                                              'scope': 'history'}
+                else:
+                    earlier = document_cache.find_near_duplicate(signatures[index], exclude={digest})
+                    if earlier:
+                        DUPLICATE_UPLOADS.inc(kind='near', scope='history')
+                        candidate['duplicate'] = {'kind': 'near', 'of': earlier[1]['filename'],
+                                                  'similarity': round(earlier[2], 3), 'scope': 'history'}
+                    if resume_text != FALLBACK_TEXT:
+                        new_documents.append((digest, {'filename': filename, 'text': resume_text,
+                                                       'fake_detection': candidate['fake_detection'],
+                                                       'signature': signatures[index]}))
+                analyzed_chunk.append(candidate)
+                yield emit(index, candidate, resume_embedding)
+            CANDIDATES_ANALYZED.inc(len(analyzed_chunk), kind=kind)
+            get_talent_pool().add_many(analyzed_chunk, resume_embeddings)
+            document_cache.put_many(new_documents)
+
+            if near_duplicates:
+                DUPLICATE_UPLOADS.inc(len(near_duplicates), kind='near', scope='batch')
+                embedded += len(near_duplicates)
+                progress('embedding', embedded, total)
+            for index, resume_text, (original, similarity) in near_duplicates:
+                yield emit(index, *duplicate_of(index, original, 'near', round(similarity, 3), resume_text))
+            for index, _ in chunk + [(index, None) for index, _, _ in near_duplicates]:
+                if index in copies:
+                    embedded += len(copies[index])
+                    progress('embedding', embedded, total)
+                for copy_index in copies.get(index, ()):
+                    yield emit(copy_index, *duplicate_of(copy_index, index, 'exact', 1.0))
+            record_activity(unrecorded, kind)
+            unrecorded.clear()
+    get_dashboard_stats().record_search(kind)
+    SEARCHES.inc(kind=kind)
+    SEARCH_SECONDS.observe(time.perf_counter() - started, kind=kind)
+
+
+def iter_score_texts(job_description, resumes, kind='text', **analysis_options):
+    """Score already-extracted ``(filename, resume_text)`` pairs against a job description.
+
+    ``resumes`` is consumed lazily, EMBEDDING_BATCH_SIZE at a time, so it
+    can be a stream of any length. Yields ``(candidate, resume_embedding)``
+    in input order; ``analysis_options`` go to analyze_candidate.
+    """
+    started = time.perf_counter()
+    job_embedding = get_embedding(job_description)
+    resumes = iter(resumes)
+    while True:
+        chunk = list(itertools.islice(resumes, EMBEDDING_BATCH_SIZE))
+        if not chunk:
+            break
+        resume_embeddings = get_embeddings([text for _, text in chunk], batch_size=EMBEDDING_BATCH_SIZE)
+        scores, _ = score_candidates(job_embedding, resume_embeddings)
+        analyzed_chunk = [analyze_candidate(job_description, filename, resume_text, score, **analysis_options)
+                          for (filename, resume_text), score in zip(chunk, scores)]
+        CANDIDATES_ANALYZED.inc(len(analyzed_chunk), kind=kind)
+        get_talent_pool().add_many(analyzed_chunk, resume_embeddings)
+        record_activity(analyzed_chunk, kind)
+        yield from zip(analyzed_chunk, resume_embeddings)
+    get_dashboard_stats().record_search(kind)
+    SEARCHES.inc(kind=kind)
+    SEARCH_SECONDS.observe(time.perf_counter() - started, kind=kind)
+
+
+def extract_documents(documents):
+    """Text of each ``(data, filename[, sha256 digest])`` upload, in order.
+
+    Files whose text is in the document cache are not extracted again, and
+    a file uploaded twice is extracted once; new texts are cached.
+    """
+    digests = [document[2] if len(document) == 3 else upload_digest(document[0]) for document in documents]
+    document_cache = get_document_cache()
+    cached = document_cache.get_many(list(set(digests)))
+    first_index = {}
+    for index, digest in enumerate(digests):
+        first_index.setdefault(digest, index)
+    to_extract = [index for digest, index in first_index.items() if digest not in cached]
+    texts = {digest: record['text'] for digest, record in cached.items()}
+    new_documents = []
+    for batch in iter_extracted_batches([documents[index][:2] for index in to_extract]):
+        for position, text in batch:
+            index = to_extract[position]
+            texts[digests[index]] = text
+            if text != FALLBACK_TEXT:
+                new_documents.append((digests[index], {'filename': documents[index][1], 'text': text,
+                                                       'fake_detection': None, 'signature': minhash_signature(text)}))
+    document_cache.put_many(new_documents)
+    return [texts[digest] for digest in digests]
+
+
+def match_roles(documents, roles, role_embeddings, top_k=ROLE_MATCH_TOP_K):
+    """Match a batch of uploads against many roles with one resumes x roles matrix product.
+
+    ``roles`` are job library role dicts (with their extracted ``skills``)
+    and ``role_embeddings`` their embedding matrix. Returns a dict with
+    ``candidates``, each listing its ROLE_MATCH_ALTERNATIVES best-fitting
+    roles (best first) with the skills it has and lacks for them, sorted by
+    best fit; and ``roles``, each listing its ``top_k`` best candidates.
+    """
+    started = time.perf_counter()
+    logger.info("Matching %d resumes against %d roles", len(documents), len(roles))
+    texts = extract_documents(documents)
+    resume_embeddings = get_embeddings(texts, batch_size=EMBEDDING_BATCH_SIZE)
+    scores = resume_embeddings @ np.asarray(role_embeddings, dtype=np.float32).T
+
+    candidates = []
+    for i, (document, resume_text) in enumerate(zip(documents, texts)):
+        name = candidate_name_from_filename(document[1])
+        resume_skills = extract_skills(resume_text)
+        fits = []
+        for j in (top_k_indices(scores[i], ROLE_MATCH_ALTERNATIVES) if len(roles) else []):
+            role = roles[j]
+            gaps = analyze_skill_gaps(role['description'], resume_text, required_skills=role['skills'],
+                                      resume_skills=resume_skills)
+            percentage = match_percentage(scores[i, j])
+            fits.append({
+                'role_id': role['id'],
+                'title': role['title'],
+                'score': percentage,
+                'status': match_status(percentage),
+                'matched_skills': gaps['strong_skills'],
+                'missing_skills': gaps['missing_skills'],
+                'skill_match_rate': round(gaps['skill_match_rate'])
+            })
+        candidates.append({
+            'id': uuid.uuid4().hex[:12],
+            'name': name,
+            'email': candidate_email(resume_text, name),
+            'filename': document[1],
+            'risk_level': detect_fake_resume(resume_text, name)['risk_level'],
+            'best_role': fits[0] if fits else None,
+            'roles': fits
+        })
+
+    best_role = np.argmax(scores, axis=1) if len(roles) else np.zeros(0, dtype=np.int64)
+    role_results = []
+    for j, role in enumerate(roles):
+        role_results.append({
+            'id': role['id'],
+            'title': role['title'],
+            'skills': role['skills'],
+            'best_fit_count': int(np.sum(best_role == j)),
+            'candidates': [{'id': candidates[i]['id'], 'name': candidates[i]['name'],
+                            'filename': candidates[i]['filename'], 'score': match_percentage(scores[i, j]),
+                            'best_role_id': candidates[i]['best_role']['role_id']}
+                           for i in top_k_indices(scores[:, j], top_k)]
+        })
+    candidates.sort(key=lambda candidate: candidate['best_role']['score'] if candidate['best_role'] else 0,
+                    reverse=True)
+    CANDIDATES_ANALYZED.inc(len(candidates), kind='roles')
+    stats = get_dashboard_stats()
+    stats.record_candidates('roles', [(candidate['best_role']['score'], candidate['best_role']['status'],
+                                       candidate['risk_level'])
+                                      for candidate in candidates if candidate['best_role']])
+    stats.record_search('roles')
+    SEARCHES.inc(kind='roles')
+    SEARCH_SECONDS.observe(time.perf_counter() - started, kind='roles')
+    logger.info("Role matching complete: %d resumes x %d roles", len(candidates), len(roles))
+    return {'candidates': candidates, 'roles': role_results}
+
+
+def rank(results):
+    """Sort ``(candidate, embedding)`` pairs best match first into a candidate list and embedding matrix."""
+    results = sorted(results, key=lambda result: result[0]['score'], reverse=True)
+    candidates = [candidate for candidate, _ in results]
+    embeddings = np.array([embedding for _, embedding in results], dtype=np.float32)
+    return candidates, embeddings
+
+
+def run_search(job_description, documents, progress=None):
+    """Run iter_search to completion and return ``(candidates, embeddings)``, best match first."""
+    analyzed_candidates, embeddings = rank(iter_search(job_description, documents, progress))
+    logger.info("Search complete: %d candidates analyzed", len(analyzed_candidates))
+    return analyzed_candidates, embeddings
+
+
+def search_talent_pool(job_description, top_k=50):
+    """Match a job description against every pooled resume, best match first.
+
+    Only the job description is embedded; the ``top_k`` nearest past
+    candidates are then analyzed from their stored text exactly like fresh
+    uploads. Returns ``(candidates, embeddings)`` like run_search.
+    """
+    started = time.perf_counter()
+    logger.info("Searching talent pool for: %.100s", job_description)
+    hits = get_talent_pool().search(get_embedding(job_description), top_k=top_k)
+    results = []
+    for hit in hits:
+        candidate = analyze_candidate(job_description, hit['filename'], hit['resume_text'], hit['score'])
+        candidate['pool_id'] = hit['id']
+        results.append((candidate, hit['embedding']))
+    CANDIDATES_ANALYZED.inc(len(results), kind='talent_pool')
+    record_activity([candidate for candidate, _ in results], 'talent_pool')
+    get_dashboard_stats().record_search('talent_pool')
+    SEARCHES.inc(kind='talent_pool')
+    SEARCH_SECONDS.observe(time.perf_counter() - started, kind='talent_pool')
+    logger.info("Talent pool search complete: %d candidates", len(results))
+    return rank(results)
+
+
+def rerank_search(job_description, candidates, embeddings=None):
+    """Re-score an existing search's candidates against a new job description.
+
+    Only the new job description is embedded: resume embeddings come from
+    the stored search (or are re-embedded, from the embedding cache, for
+    searches saved without them), and each candidate's fake-resume check is
+    reused since it doesn't depend on the job. Returns ``(candidates,
+    embeddings)`` like run_search.
+    """
+    if not candidates:
+        return [], np.zeros((0, 0), dtype=np.float32)
+    started = time.perf_counter()
+    logger.info("Re-ranking %d candidates for: %.100s", len(candidates), job_description)
+    if embeddings is None or len(embeddings) != len(candidates):
+        embeddings = get_embeddings([candidate['resume_text'] for candidate in candidates],
+                                    batch_size=EMBEDDING_BATCH_SIZE)
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    scores, _ = score_candidates(get_embedding(job_description), embeddings)
+    results = []
+    for candidate, score, embedding in zip(candidates, scores, embeddings):
+        reranked = analyze_candidate(job_description, candidate['filename'], candidate['resume_text'], score,
+                                     fake_detection=candidate.get('fake_detection'))
+        # Keep what the search added on top of the analysis (pool_id, duplicate markers)
+        reranked.update((key, value) for key, value in candidate.items() if key not in reranked)
+        results.append((reranked, embedding))
+    CANDIDATES_ANALYZED.inc(len(results), kind='rerank')
+    SEARCHES.inc(kind='rerank')
+    SEARCH_SECONDS.observe(time.perf_counter() - started, kind='rerank')
+    return rank(results)
@@ -0,0 +1,188 @@
+# result_store.py
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+RESULTS_FOLDER = os.getenv('RESULTS_FOLDER', 'results')
+RESULT_STORE_MAX_SEARCHES = int(os.getenv('RESULT_STORE_MAX_SEARCHES', '50'))
+RESULT_STORE_MAX_BYTES = int(os.getenv('RESULT_STORE_MAX_BYTES', str(200 * 1024 * 1024)))
+RESULT_STORE_MAX_DISK_SEARCHES = int(os.getenv('RESULT_STORE_MAX_DISK_SEARCHES', '500'))
+SEARCH_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+
+
+def _estimate_size(record):
+    # Resume text and embeddings dominate a search's footprint; the rest is a small constant per candidate
+    embeddings = record.get('embeddings')
+    return (sum(len(c.get('resume_text', '')) + 2048 for c in record['candidates']) + len(record['job_description'])
+            + (embeddings.nbytes if embeddings is not None else 0))
+
+
+class SearchResultStore:
+    """Server-side storage for quantum search results, keyed by search ID.
+
+    Recent searches live in an in-process LRU bounded by entry count and
+    approximate size. Every search is also written to a JSON file in
+    ``folder`` so that any gunicorn worker can serve it, with the candidates'
+    embeddings alongside in a ``.npy`` file for re-ranking; the oldest files
+    are pruned once there are more than ``max_disk_searches``.
+    """
+
+    def __init__(self, folder=RESULTS_FOLDER, max_searches=RESULT_STORE_MAX_SEARCHES,
+                 max_bytes=RESULT_STORE_MAX_BYTES, max_disk_searches=RESULT_STORE_MAX_DISK_SEARCHES):
+        self.folder = folder
+        self.max_searches = max_searches
+        self.max_bytes = max_bytes
+        self.max_disk_searches = max_disk_searches
+        self._records = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    def _path(self, search_id):
+        return os.path.join(self.folder, f"{search_id}.json")
+
+    def _embeddings_path(self, search_id):
+        return os.path.join(self.folder, f"{search_id}.npy")
+
+    def _index(self, record):
+        record['by_id'] = {c['id']: c for c in record['candidates']}
+        return record
+
+    def _remember(self, search_id, record):
+        if search_id in self._records:
+            self._total_bytes -= self._sizes.pop(search_id)
+        self._records[search_id] = record
+        self._sizes[search_id] = _estimate_size(record)
+        self._total_bytes += self._sizes[search_id]
+        while len(self._records) > 1 and (len(self._records) > self.max_searches
+                                          or self._total_bytes > self.max_bytes):
+            evicted, _ = self._records.popitem(last=False)
+            self._total_bytes -= self._sizes.pop(evicted)
+
+    def save(self, job_description, candidates, owner=None, search_id=None, embeddings=None,
+             parent_search_id=None):
+        """Store ranked candidates and return the search ID.
+
+        ``embeddings`` holds one resume embedding row per candidate, in the
+        same order; ``parent_search_id`` marks a re-ranked copy of a search.
+        """
+        search_id = search_id or uuid.uuid4().hex
+        for candidate in candidates:
+            candidate.setdefault('id', uuid.uuid4().hex[:12])
+        record = {
+            'search_id': search_id,
+            'owner': owner,
+            'created_at': time.time(),
+            'job_description': job_description,
+            'total_resumes': len(candidates),
+            'matched_candidates': len([c for c in candidates if c['score'] >= 50]),
+            'shortlisted': len([c for c in candidates if c['score'] >= 85]),
+            'parent_search_id': parent_search_id,
+            'candidates': candidates
+        }
+        if self.folder:
+            self._write(search_id, record, embeddings)
+        if embeddings is not None:
+            record['embeddings'] = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            self._remember(search_id, self._index(record))
+        return search_id
+
+    def _write(self, search_id, record, embeddings=None):
+        if embeddings is not None:
+            # Written first, so a search whose JSON exists always has its embeddings
+            tmp_path = f"{self._embeddings_path(search_id)}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.asarray(embeddings, dtype=np.float32))
+            os.replace(tmp_path, self._embeddings_path(search_id))
+        tmp_path = f"{self._path(search_id)}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f)
+        os.replace(tmp_path, self._path(search_id))
+        self._prune_disk()
+
+    def _prune_disk(self):
+        files = [os.path.join(self.folder, name) for name in os.listdir(self.folder) if name.endswith('.json')]
+        if len(files) <= self.max_disk_searches:
+            return
+        files.sort(key=lambda path: os.path.getmtime(path))
+        for path in files[:len(files) - self.max_disk_searches]:
+            for stale in (path, path[:-len('.json')] + '.npy'):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+
+    def get(self, search_id, owner=None):
+        """Return the stored search, or None if unknown, evicted or not owned by ``owner``."""
+        if not SEARCH_ID_PATTERN.fullmatch(search_id or ''):
+            return None
+        with self._lock:
+            record = self._records.get(search_id)
+            if record is not None:
+                self._records.move_to_end(search_id)
+        if record is None and self.folder:
+            try:
+                with open(self._path(search_id), encoding='utf-8') as f:
+                    record = self._index(json.load(f))
+            except (OSError, ValueError):
+                return None
+            with self._lock:
+                self._remember(search_id, record)
+        if record is not None and owner is not None and record.get('owner') not in (None, owner):
+            return None
+        return record
+
+    def get_candidate(self, search_id, candidate_id, owner=None):
+        record = self.get(search_id, owner)
+        if record is None:
+            return None, None
+        return record, record['by_id'].get(candidate_id)
+
+    def get_embeddings(self, search_id, owner=None):
+        """Return the search's candidate embedding matrix, or None if it wasn't stored."""
+        record = self.get(search_id, owner)
+        if record is None:
+            return None
+        if 'embeddings' not in record and self.folder:
+            try:
+                record['embeddings'] = np.load(self._embeddings_path(search_id))
+            except (OSError, ValueError):
+                record['embeddings'] = None
+        return record.get('embeddings')
+
+    def page(self, search_id, page=1, per_page=25, owner=None):
+        """Return the search summary with one page of candidates."""
+        record = self.get(search_id, owner)
+        if record is None:
+            return None
+        total_pages = max(1, -(-len(record['candidates']) // per_page))
+        page = min(max(page, 1), total_pages)
+        start = (page - 1) * per_page
+        summary = {key: value for key, value in record.items() if key not in ('candidates', 'by_id', 'embeddings')}
+        summary.update({
+            'candidates': record['candidates'][start:start + per_page],
+            'page': page,
+            'per_page': per_page,
+            'total_pages': total_pages,
+            'rank_offset': start
+        })
+        return summary
+
+
+_store = None
+
+
+def get_result_store():
+    global _store
+    if _store is None:
+        _store = SearchResultStore()
+    return _store
@@ -0,0 +1,72 @@
+# skill_taxonomy.py
+import json
+import os
+from functools import lru_cache
+
+from phrase_matcher import PhraseMatcher
+
+SKILL_TAXONOMY_PATH = os.getenv(
+    'SKILL_TAXONOMY_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'skill_taxonomy.json'))
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == '_'
+
+
+class TaxonomyMatcher:
+    """Finds taxonomy terms in text with word-boundary semantics.
+
+    Every canonical name and alias is loaded into one PhraseMatcher, so text
+    is scanned once regardless of taxonomy size. A match only counts when it
+    is not glued to surrounding letters or digits ("java" does not match
+    inside "javascript"), overlapping matches resolve to the leftmost-longest
+    one, and aliases are reported under their canonical name.
+    """
+
+    def __init__(self, taxonomy):
+        self.canonical = {}
+        for name, aliases in taxonomy.items():
+            for term in [name] + list(aliases):
+                self.canonical.setdefault(' '.join(term.lower().split()), name)
+        self.matcher = PhraseMatcher(self.canonical)
+
+    def __len__(self):
+        return len(set(self.canonical.values()))
+
+    def extract(self, text):
+        """Return canonical names found in ``text`` in order of first mention."""
+        return list(self._extract(text))
+
+    @lru_cache(maxsize=1024)
+    def _extract(self, text):
+        text = ' '.join(text.lower().split())
+        last = len(text)
+        matches = [
+            (start, end, phrase) for start, end, phrase in self.matcher.iter_matches(text)
+            if (start == 0 or not _is_word_char(text[start - 1]))
+            and (end == last or not _is_word_char(text[end]))
+        ]
+        matches.sort(key=lambda match: (match[0], match[0] - match[1]))
+
+        found = {}
+        covered_until = 0
+        for start, end, phrase in matches:
+            if start < covered_until:
+                continue
+            covered_until = end
+            found.setdefault(self.canonical[phrase], None)
+        return tuple(found)
+
+
+def load_taxonomy(path=SKILL_TAXONOMY_PATH):
+    """Load the ``skills`` and ``values`` sections of the taxonomy file."""
+    with open(path, encoding='utf-8') as f:
+        taxonomy = json.load(f)
+    return taxonomy.get('skills', {}), taxonomy.get('values', {})
+
+
+# Built once at import so every request shares the compiled automata
+_skills, _values = load_taxonomy()
+SKILL_MATCHER = TaxonomyMatcher(_skills)
+VALUE_MATCHER = TaxonomyMatcher(_values)
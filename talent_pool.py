@@ -0,0 +1,282 @@
+# talent_pool.py
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from embedding_cache import STORAGE_FAILURES
+from utils import EMBEDDING_DIM, extract_skills, top_k_indices
+from vector_store import QuantizedVectorStore
+
+TALENT_POOL_PATH = os.getenv('TALENT_POOL_PATH', os.path.join('talent_pool', 'pool.sqlite3'))
+# Pools at least this large are searched through the approximate IVF index; 0 disables it
+TALENT_POOL_IVF_THRESHOLD = int(os.getenv('TALENT_POOL_IVF_THRESHOLD', '50000'))
+TALENT_POOL_IVF_NPROBE = int(os.getenv('TALENT_POOL_IVF_NPROBE', '16'))
+# Pool embeddings are searched from a memory-mapped int8, float16 or float32 copy
+TALENT_POOL_VECTOR_DTYPE = os.getenv('TALENT_POOL_VECTOR_DTYPE', 'int8')
+# Quantized search shortlists this many times top_k before exact re-ranking
+TALENT_POOL_RESCORE = int(os.getenv('TALENT_POOL_RESCORE', '4'))
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_SIZE = 50000
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(text):
+    return hashlib.sha256(" ".join(text.split()).encode('utf-8')).hexdigest()
+
+
+class IVFIndex:
+    """Inverted-file index: vectors are bucketed under their nearest k-means centroid.
+
+    A query only scores the vectors in the ``nprobe`` buckets whose centroids
+    are closest to it, trading a little recall for a large cut in work.
+    """
+
+    def __init__(self, vectors, count, nlist=None, seed=0):
+        rng = np.random.default_rng(seed)
+        nlist = nlist or max(1, int(np.sqrt(count)))
+        sample_rows = np.arange(count)
+        if count > KMEANS_SAMPLE_SIZE:
+            sample_rows = np.sort(rng.choice(count, KMEANS_SAMPLE_SIZE, replace=False))
+        sample = vectors.vectors(sample_rows)
+        centroids = sample[rng.choice(len(sample), min(nlist, len(sample)), replace=False)].copy()
+        # Spherical k-means: the vectors are normalized, so assign by dot product
+        for _ in range(KMEANS_ITERATIONS):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            for centroid in range(len(centroids)):
+                members = sample[assignments == centroid]
+                if len(members):
+                    mean = members.sum(axis=0)
+                    centroids[centroid] = mean / (np.linalg.norm(mean) or 1)
+        self.centroids = centroids
+        self.trained_size = count
+        self.size = 0
+        self._lists = [[] for _ in range(len(centroids))]
+        for start in range(0, count, KMEANS_SAMPLE_SIZE):
+            end = min(start + KMEANS_SAMPLE_SIZE, count)
+            self.add(vectors.vectors(slice(start, end)), start)
+
+    def add(self, vectors, start):
+        """Bucket ``vectors``, which occupy rows ``start..`` of the pool matrix."""
+        if len(vectors) == 0:
+            return
+        assignments = np.argmax(vectors @ self.centroids.T, axis=1)
+        for offset, centroid in enumerate(assignments):
+            self._lists[centroid].append(start + offset)
+        self.size = start + len(vectors)
+
+    def candidates(self, query, nprobe):
+        """Row positions in the buckets nearest to ``query``."""
+        nprobe = min(nprobe, len(self.centroids))
+        nearest = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        rows = [self._lists[centroid] for centroid in nearest]
+        return np.fromiter((row for bucket in rows for row in bucket), dtype=np.int64)
+
+
+class TalentPool:
+    """Persistent pool of every resume processed by quantum search.
+
+    Each resume's text, candidate metadata and normalized embedding are kept
+    in an SQLite file shared by all gunicorn workers, deduplicated by a hash
+    of the text. For scoring, embeddings are mirrored into a quantized,
+    memory-mapped QuantizedVectorStore that every worker maps instead of
+    copying; it is topped up with new rows before each search, so matching a
+    job against past candidates needs neither extraction nor a model call
+    per resume. The shortlist is re-ranked with the exact stored vectors.
+    Exact (flat) search is used until the pool reaches ``ivf_threshold``
+    rows, after which an approximate IVF index is built and kept current.
+    """
+
+    def __init__(self, path=TALENT_POOL_PATH, ivf_threshold=TALENT_POOL_IVF_THRESHOLD,
+                 nprobe=TALENT_POOL_IVF_NPROBE, vector_dtype=TALENT_POOL_VECTOR_DTYPE):
+        self.path = path
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._vectors = QuantizedVectorStore(os.path.splitext(path)[0] + '.vectors', dtype=vector_dtype)
+        self._ivf = None
+
+    def _connection(self):
+        # SQLite handles must not cross a fork, so reconnect per process
+        if self._conn is None or self._conn_pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('''CREATE TABLE IF NOT EXISTS candidates (
+                id INTEGER PRIMARY KEY,
+                content_hash TEXT UNIQUE NOT NULL,
+                name TEXT,
+                email TEXT,
+                filename TEXT,
+                resume_text TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )''')
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def add_many(self, candidates, embeddings):
+        """Upsert candidate dicts from quantum search with their embedding rows.
+
+        Candidates whose text is already pooled get their metadata refreshed
+        and, if their embedding changed (say, after a model upgrade), the new
+        vector under a new id, so the append-only vector store picks it up.
+        Returns the number of candidates written.
+        """
+        now = time.time()
+        rows = []
+        for candidate, vector in zip(candidates, embeddings):
+            vector = np.asarray(vector, dtype=np.float32)
+            if not candidate.get('resume_text') or not vector.any():
+                continue
+            metadata = {
+                'experience': candidate.get('experience'),
+                'skills': extract_skills(candidate['resume_text']),
+                'risk_level': (candidate.get('fake_detection') or {}).get('risk_level'),
+                'last_score': candidate.get('score')
+            }
+            rows.append((content_hash(candidate['resume_text']), candidate['name'], candidate['email'],
+                         candidate['filename'], candidate['resume_text'], json.dumps(metadata),
+                         vector.tobytes(), now, now))
+        if not rows:
+            return 0
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.executemany('''INSERT INTO candidates
+                        (content_hash, name, email, filename, resume_text, metadata, embedding, created_at, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(content_hash) DO UPDATE SET
+                            name = excluded.name, email = excluded.email, filename = excluded.filename,
+                            metadata = excluded.metadata, updated_at = excluded.updated_at,
+                            id = CASE WHEN embedding = excluded.embedding THEN id
+                                      ELSE (SELECT MAX(id) FROM candidates) + 1 END,
+                            embedding = excluded.embedding''', rows)
+        except sqlite3.Error as e:
+            STORAGE_FAILURES.inc(store='talent_pool', operation='write')
+            logger.warning("Talent pool write failed: %s", e)
+            return 0
+        return len(rows)
+
+    def _rows_after(self, last_id):
+        rows = self._connection().execute(
+            'SELECT id, embedding FROM candidates WHERE id > ? ORDER BY id', (last_id,)).fetchall()
+        ids = [row[0] for row in rows]
+        vectors = np.frombuffer(b''.join(row[1] for row in rows), dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+        return ids, vectors
+
+    def _refresh(self):
+        """Quantize rows added since the last refresh (by any worker) into the vector store."""
+        start = len(self._vectors)
+        self._vectors.refresh()
+        last_row = self._connection().execute('SELECT MAX(id) FROM candidates').fetchone()[0] or 0
+        if last_row > self._vectors.last_id():
+            self._vectors.append(self._rows_after)
+        end = len(self._vectors)
+
+        if not self.ivf_threshold or end < self.ivf_threshold or end == start:
+            return
+        if self._ivf is None or end > 2 * self._ivf.trained_size:
+            # (Re)train once the pool has doubled since the centroids were fitted
+            logger.info("Building talent pool IVF index over %d candidates", end)
+            self._ivf = IVFIndex(self._vectors, end)
+        else:
+            self._ivf.add(self._vectors.vectors(slice(self._ivf.size, end)), self._ivf.size)
+
+    def __len__(self):
+        try:
+            return self._connection().execute('SELECT COUNT(*) FROM candidates').fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def search(self, job_embedding, top_k=20, exact=False):
+        """Return the ``top_k`` pooled candidates closest to a job embedding, best first.
+
+        Each hit is a dict with the pool ``id``, ``score`` (cosine similarity),
+        name, email, filename, resume_text and metadata. ``exact=True`` skips
+        the approximate index.
+        """
+        if job_embedding is None:
+            return []
+        query = np.asarray(job_embedding, dtype=np.float32)
+        try:
+            with self._lock:
+                self._refresh()
+                ivf = self._ivf
+        except (sqlite3.Error, OSError) as e:
+            STORAGE_FAILURES.inc(store='talent_pool', operation='read')
+            logger.warning("Talent pool read failed: %s", e)
+            return []
+
+        # Quantized scores pick a shortlist that is re-ranked with the exact float32 vectors
+        shortlist = top_k * TALENT_POOL_RESCORE if self._vectors.dtype != 'float32' else top_k
+        rows = ivf.candidates(query, self.nprobe) if ivf is not None and not exact else None
+        scores = self._vectors.score(query, rows)
+        while True:
+            positions = top_k_indices(scores, shortlist)
+            hits = self._fetch(self._vectors.ids[positions if rows is None else rows[positions]], query)
+            # Re-embedded candidates moved to a new id; their old vectors fetch nothing, so look further down
+            missing = len(positions) - len(hits)
+            if not missing or len(positions) == len(scores):
+                break
+            shortlist += missing
+        return sorted(hits, key=lambda hit: hit['score'], reverse=True)[:top_k]
+
+    def _fetch(self, ids, query):
+        if len(ids) == 0:
+            return []
+        id_list = [int(i) for i in ids]
+        rows = self._connection().execute(
+            f"SELECT id, name, email, filename, resume_text, metadata, updated_at, embedding FROM candidates "
+            f"WHERE id IN ({','.join('?' * len(id_list))})", id_list).fetchall()
+        hits = []
+        for row in rows:
+            embedding = np.frombuffer(row[7], dtype=np.float32)
+            hits.append({
+                'id': row[0],
+                'score': float(embedding @ query),
+                'name': row[1],
+                'email': row[2],
+                'filename': row[3],
+                'resume_text': row[4],
+                'metadata': json.loads(row[5]),
+                'updated_at': row[6],
+                'embedding': embedding
+            })
+        return hits
+
+    def stats(self):
+        return {
+            'candidates': len(self),
+            'loaded': len(self._vectors),
+            'vector_dtype': self._vectors.dtype,
+            'vector_bytes': self._vectors.nbytes(),
+            'index': 'ivf' if self._ivf is not None else 'flat',
+            'ivf_lists': len(self._ivf.centroids) if self._ivf is not None else 0
+        }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_talent_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TalentPool()
+        return _pool
@@ -0,0 +1,28 @@
+import json
+import os
+
+from background_jobs import SearchJobManager, _write_status, fail_orphaned_jobs
+
+
+def write_job(folder, job_id, status, pid):
+    _write_status(str(folder), {'job_id': job_id, 'owner': None, 'pid': pid, 'status': status, 'stages': {},
+                                'search_id': None, 'error': None})
+
+
+def read_status(folder, job_id):
+    with open(os.path.join(folder, f"{job_id}.json"), encoding='utf-8') as f:
+        return json.load(f)['status']
+
+
+def test_jobs_of_exited_workers_are_failed(tmp_path):
+    dead_pid = 2 ** 22 + 1  # above Linux's pid_max, so never a live process
+    write_job(tmp_path, 'a' * 32, 'running', dead_pid)
+    write_job(tmp_path, 'b' * 32, 'running', os.getpid())
+    write_job(tmp_path, 'c' * 32, 'completed', dead_pid)
+
+    SearchJobManager(folder=str(tmp_path), max_workers=1)
+    assert [read_status(tmp_path, job_id) for job_id in ('a' * 32, 'b' * 32, 'c' * 32)] == [
+        'failed', 'running', 'completed']
+
+    assert fail_orphaned_jobs(str(tmp_path), pid=os.getpid()) == 1
+    assert read_status(tmp_path, 'b' * 32) == 'failed'
@@ -0,0 +1,67 @@
+import json
+import zipfile
+
+import numpy as np
+
+import batch_score
+import pipeline
+from batch_score import ResultWriter, iter_resumes, load_jobs, score_batch
+from benchmarks.corpus import generate_corpus
+from dashboard_stats import DashboardStats
+from document_cache import DocumentCache
+
+
+def write_corpus(tmp_path, count=6):
+    documents = generate_corpus(count, seed=11, adversarial_ratio=0)
+    (tmp_path / 'in').mkdir()
+    for data, filename in documents[:count // 2]:
+        (tmp_path / 'in' / filename).write_bytes(data)
+    (tmp_path / 'in' / 'notes.md').write_text("not a resume")
+    with zipfile.ZipFile(tmp_path / 'more.zip', 'w') as archive:
+        for data, filename in documents[count // 2:]:
+            archive.writestr(f"batch/{filename}", data)
+    return documents
+
+
+def test_resumes_are_read_from_directories_and_archives(tmp_path):
+    documents = write_corpus(tmp_path)
+    resumes = list(iter_resumes([str(tmp_path / 'in'), str(tmp_path / 'more.zip')]))
+    assert sorted(data for _, _, data in resumes) == sorted(data for data, _ in documents)
+    assert {key.split('!')[0] for key, _, _ in resumes} >= {str(tmp_path / 'more.zip')}
+    assert not any(filename.endswith('.md') for _, filename, _ in resumes)
+
+
+def test_resuming_drops_rows_written_after_the_last_checkpoint(tmp_path):
+    path = str(tmp_path / 'out.jsonl')
+    writer = ResultWriter(path)
+    writer.write('a.pdf', [{'job': 'one', 'score': 1}])
+    writer.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"job": "one", "sco')  # killed mid-write
+
+    writer = ResultWriter(path, resume=True)
+    assert writer.done == {'a.pdf'}
+    writer.write('b.pdf', [{'job': 'one', 'score': 2}])
+    writer.close()
+    with open(path, encoding='utf-8') as f:
+        assert [json.loads(line)['score'] for line in f] == [1, 2]
+
+
+def test_score_batch_writes_a_row_per_resume_and_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_score, 'get_document_cache', lambda: DocumentCache(path=''))
+    dashboard = DashboardStats(path=None)
+    monkeypatch.setattr(batch_score, 'get_dashboard_stats', lambda: dashboard)
+    monkeypatch.setattr(pipeline, 'get_dashboard_stats', lambda: dashboard)
+    monkeypatch.setattr(batch_score, 'get_embeddings', lambda texts, batch_size=None: np.eye(
+        len(texts), 4, dtype=np.float32))
+    write_corpus(tmp_path)
+    jobs = load_jobs(job_texts=["Python developer", "Java engineer"])
+    writer = ResultWriter(str(tmp_path / 'out.csv'))
+    stats = score_batch(iter_resumes([str(tmp_path / 'in'), str(tmp_path / 'more.zip')]), jobs, writer,
+                        workers=1, window_size=4)
+    writer.close()
+    assert stats['scored'] == 6
+    assert dashboard.summary()['candidates'] == 6
+    lines = (tmp_path / 'out.csv').read_text(encoding='utf-8').splitlines()
+    assert lines[0].startswith('job,filename,name') and len(lines) == 13
+    assert sorted(line.split(',')[0] for line in lines[1:]) == ['job1'] * 6 + ['job2'] * 6
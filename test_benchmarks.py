@@ -0,0 +1,39 @@
+import numpy as np
+
+from benchmarks.corpus import ADVERSARIAL_PDFS, FORMATS, generate_corpus, make_document, resume_text
+from inference_backends import create_backend
+from utils import extract_text
+
+
+def test_corpus_is_deterministic_and_mixed():
+    first = generate_corpus(40, seed=3, adversarial_ratio=0.1)
+    assert first == generate_corpus(40, seed=3, adversarial_ratio=0.1)
+    assert first != generate_corpus(40, seed=4, adversarial_ratio=0.1)
+    extensions = {filename.rsplit('.', 1)[1] for _, filename in first}
+    assert extensions == set(FORMATS)
+    assert sum(filename.startswith('adversarial_') for _, filename in first) == 4
+
+
+def test_every_format_extracts_the_resume_text():
+    import random
+    text = resume_text(random.Random(0), 'long')
+    for fmt in FORMATS:
+        extracted = extract_text(make_document(text, fmt), f"resume.{fmt}")
+        assert extracted.split() == text.split()
+
+
+def test_adversarial_pdfs_fall_back_instead_of_raising():
+    documents = generate_corpus(len(ADVERSARIAL_PDFS) * 2, adversarial_ratio=0.5)
+    for data, filename in documents:
+        assert extract_text(data, filename, max_pages=20)
+
+
+def test_stub_backend_is_deterministic_and_normalized():
+    backend = create_backend('stub', 'unused')
+    vectors = backend.encode(["Python developer", "python DEVELOPER", "Java engineer", ""])
+    assert vectors.shape == (4, 384)
+    assert np.allclose(vectors[0], vectors[1])
+    assert np.isclose(np.linalg.norm(vectors[0]), 1)
+    assert vectors[0] @ vectors[2] < 0.5
+    assert not vectors[3].any()
+    assert np.allclose(backend.encode("Python developer"), vectors[0])
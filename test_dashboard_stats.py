@@ -0,0 +1,48 @@
+from dashboard_stats import RECENT_OUTREACH_KEPT, THROUGHPUT_DAYS, THROUGHPUT_HOURS, DashboardStats
+
+NOW = 1_700_000_000.0
+
+
+def test_counters_accumulate_across_workers_and_breakdowns_keep_their_order(tmp_path):
+    path = str(tmp_path / 'stats.sqlite3')
+    DashboardStats(path).record_candidates('upload', [(90, 'Perfect Match', 'Low'), (60, 'Good Match', None)], now=NOW)
+    DashboardStats(path).record_candidates('api', [(72, 'Strong Match', 'High')], now=NOW)
+    DashboardStats(path).record_search('upload')
+
+    summary = DashboardStats(path).summary(now=NOW)
+    assert (summary['candidates'], summary['searches'], summary['shortlisted']) == (3, 1, 1)
+    assert summary['average_score'] == 74.0
+    assert [(band['label'], band['count']) for band in summary['score_bands']] == [
+        ('Perfect Match', 1), ('Strong Match', 1), ('Good Match', 1), ('Partial Match', 0)]
+    assert {level['label']: level['count'] for level in summary['risk_levels']} == {
+        'Low': 1, 'Medium': 0, 'High': 1, 'Critical': 0, 'Unchecked': 1}
+    assert {kind['label']: kind['count'] for kind in summary['kinds']} == {'api': 1, 'upload': 2}
+
+
+def test_throughput_is_bucketed_by_hour_and_day(tmp_path):
+    stats = DashboardStats(str(tmp_path / 'stats.sqlite3'))
+    stats.record_candidates('upload', [(90, 'Perfect Match', 'Low')] * 3, now=NOW - 2 * 3600)
+    stats.record_candidates('upload', [(40, 'Partial Match', 'Low')] * 2, now=NOW)
+    stats.record_candidates('upload', [(40, 'Partial Match', 'Low')] * 7, now=NOW - 30 * 86400)
+
+    summary = stats.summary(now=NOW)
+    hourly, daily = summary['hourly'], summary['daily']
+    assert len(hourly) == THROUGHPUT_HOURS and len(daily) == THROUGHPUT_DAYS
+    assert [bucket['candidates'] for bucket in hourly[-3:]] == [3, 0, 2]
+    assert hourly[-3]['shortlisted'] == 3
+    assert sum(bucket['candidates'] for bucket in daily) == 5
+    assert summary['candidates'] == 12
+
+
+def test_outreach_keeps_only_each_recruiters_latest_selections():
+    stats = DashboardStats(path=None)
+    for i in range(RECENT_OUTREACH_KEPT + 2):
+        stats.record_outreach('a@company.com', f'Candidate {i}', f'c{i}@example.com', score=80 + i,
+                              role='Backend', now=NOW + i)
+    stats.record_outreach('b@company.com', 'Other', 'o@example.com', now=NOW)
+
+    summary = stats.summary(recruiter='a@company.com', now=NOW + 10)
+    assert summary['outreach'] == RECENT_OUTREACH_KEPT + 3
+    assert [item['name'] for item in summary['recent_outreach']] == [
+        f'Candidate {i}' for i in reversed(range(2, RECENT_OUTREACH_KEPT + 2))]
+    assert summary['hourly'][-1]['outreach'] == RECENT_OUTREACH_KEPT + 3
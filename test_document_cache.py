@@ -0,0 +1,86 @@
+import io
+import random
+
+from benchmarks.corpus import generate_corpus, make_document, resume_text
+from dashboard_stats import DashboardStats
+from document_cache import (DocumentCache, NearDuplicateIndex, minhash_signature, read_upload,
+                            signature_similarity, upload_digest)
+
+
+def test_read_upload_hashes_in_chunks():
+    data = bytes(range(256)) * 1000
+    assert read_upload(io.BytesIO(data), chunk_size=1000) == (data, upload_digest(data))
+
+
+def test_a_new_header_is_a_near_duplicate_but_another_resume_is_not():
+    rng = random.Random(1)
+    text = resume_text(rng, 'long')
+    other = resume_text(rng, 'long')
+    retitled = "Jane Q. Doe\njane.doe@example.com | +1 555 0100\n" + text.split('\n', 2)[-1]
+    signature = minhash_signature(text)
+    assert signature_similarity(signature, minhash_signature(retitled)) >= 0.8
+    assert signature_similarity(signature, minhash_signature(other)) < 0.5
+    assert minhash_signature("Professional resume content") is None
+
+    index = NearDuplicateIndex()
+    index.add('original', signature)
+    index.add('other', minhash_signature(other))
+    assert index.find(minhash_signature(retitled))[0] == 'original'
+    assert index.find(minhash_signature(resume_text(rng, 'long'))) is None
+
+
+def test_documents_persist_and_near_duplicates_are_found_from_disk(tmp_path):
+    text = resume_text(random.Random(2), 'long')
+    record = {'filename': 'jane.pdf', 'text': text, 'fake_detection': {'risk_level': 'Low'},
+              'signature': minhash_signature(text)}
+    DocumentCache(path=str(tmp_path / 'documents.sqlite3')).put_many([('abc', record)])
+
+    cache = DocumentCache(path=str(tmp_path / 'documents.sqlite3'))
+    found = cache.get_many(['abc', 'missing'])
+    assert list(found) == ['abc']
+    assert found['abc']['text'] == text and found['abc']['fake_detection'] == {'risk_level': 'Low'}
+    retitled = minhash_signature("Jane Doe, Senior Engineer\n" + text)
+    content_hash, near, similarity = cache.find_near_duplicate(retitled)
+    assert content_hash == 'abc' and near['filename'] == 'jane.pdf' and similarity >= 0.8
+    assert cache.find_near_duplicate(retitled, exclude={'abc'}) is None
+
+
+def test_search_reuses_analysis_for_copies_and_near_duplicates(tmp_path, monkeypatch):
+    import document_cache
+    import pipeline
+    monkeypatch.setattr(pipeline, 'get_document_cache',
+                        lambda: DocumentCache(path=str(tmp_path / 'documents.sqlite3')))
+    monkeypatch.setattr(pipeline, 'get_talent_pool', lambda: type('Pool', (), {'add_many': lambda *args: 0})())
+    stats = DashboardStats(path=None)
+    monkeypatch.setattr(pipeline, 'get_dashboard_stats', lambda: stats)
+    monkeypatch.setattr(pipeline, 'get_embedding', lambda text: document_cache.np.ones(4, dtype='float32'))
+    monkeypatch.setattr(pipeline, 'get_embeddings', lambda texts, batch_size=None: document_cache.np.ones(
+        (len(texts), 4), dtype='float32'))
+
+    (data, _), (other, _) = generate_corpus(2, seed=5, formats=('docx',), adversarial_ratio=0)
+    text = resume_text(random.Random(3), 'long')
+    documents = [(data, 'alice.docx'), (data, 'alice_copy.docx'), (other, 'bob.docx'),
+                 (make_document(text, 'txt'), 'carol.txt'),
+                 (make_document("Carol Smith\ncarol@example.com\n" + text, 'txt'), 'carol_v2.txt')]
+    progress = {}
+    results = {candidate['filename']: candidate for candidate, _ in pipeline.iter_search(
+        "Python developer", documents, lambda stage, done, total: progress.__setitem__(stage, (done, total)))}
+
+    assert progress == {stage: (5, 5) for stage in pipeline.STAGES}
+    assert 'duplicate' not in results['alice.docx'] and 'duplicate' not in results['bob.docx']
+    assert results['alice_copy.docx']['duplicate'] == {'kind': 'exact', 'of': 'alice.docx', 'similarity': 1.0,
+                                                       'scope': 'batch'}
+    # Extractions finish in any order, so either version may be the one that was scored
+    carol, carol_v2 = results['carol.txt'], results['carol_v2.txt']
+    near = [candidate for candidate in (carol, carol_v2) if 'duplicate' in candidate]
+    assert len(near) == 1 and near[0]['duplicate']['kind'] == 'near'
+    assert carol_v2['email'] == 'carol@example.com' != carol['email']
+    assert carol['score'] == carol_v2['score']
+    assert len({candidate['id'] for candidate in results.values()}) == 5
+
+    again = [candidate for candidate, _ in pipeline.iter_search("Python developer", documents[2:3])]
+    assert again[0]['duplicate']['scope'] == 'history'
+
+    reranked, _ = pipeline.rerank_search("Java developer", list(results.values()))
+    assert {candidate['filename']: candidate.get('duplicate') for candidate in reranked} == {
+        filename: candidate.get('duplicate') for filename, candidate in results.items()}
@@ -0,0 +1,37 @@
+import time
+
+import pytest
+
+import extraction
+from extraction import FALLBACK_TEXT, iter_extracted_texts
+
+
+@pytest.fixture
+def one_worker(monkeypatch):
+    monkeypatch.setattr(extraction, 'EXTRACTION_WORKERS', 1)
+    monkeypatch.setattr(extraction, '_pool', None)
+    yield
+    if extraction._pool is not None:
+        extraction._pool.shutdown(cancel_futures=True)
+
+
+def test_missed_deadline_leaves_other_searches_on_the_pool(one_worker):
+    pool = extraction._get_pool()
+    other_search = pool.submit(time.sleep, 1)
+    documents = [(b"Python developer with Django experience", 'a.txt'), (b"Java developer", 'b.txt')]
+
+    # The only worker is busy with the other search, so these files overrun their deadline
+    assert sorted(iter_extracted_texts(documents, timeout=0.05)) == [(0, FALLBACK_TEXT), (1, FALLBACK_TEXT)]
+    assert other_search.result(timeout=5) is None
+    assert extraction._get_pool() is pool
+    assert sorted(iter_extracted_texts(documents))[0][1] != FALLBACK_TEXT
+
+
+def test_a_hung_worker_resets_the_pool(one_worker, monkeypatch):
+    monkeypatch.setattr(extraction, 'HUNG_WORKER_GRACE', 0)
+    pool = extraction._get_pool()
+    stuck = pool.submit(time.sleep, 30)
+    while not stuck.running():
+        time.sleep(0.01)
+    extraction._reset_if_hung(pool, [stuck], timeout=0.1)
+    assert extraction._pool is None
@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import pytest
+
+from web_scrapers import http_cache
+from web_scrapers.http_cache import CachingHTTPClient, RateLimitedError
+
+
+class QuotaHandler(BaseHTTPRequestHandler):
+    """A GitHub-like API: ETags, a request quota, and Stack Exchange style backoff on /backoff."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        path = urlsplit(self.path).path
+        server.hits.append((time.monotonic(), path, self.headers.get('If-None-Match')))
+        headers = {}
+        if path == '/backoff':
+            body = json.dumps({'items': [], 'backoff': 1, 'quota_remaining': 100}).encode()
+        else:
+            if self.headers.get('If-None-Match') == server.etag:
+                # Conditional hits don't cost quota
+                self._send(304, b'', {'ETag': server.etag, 'X-RateLimit-Remaining': str(server.remaining),
+                                      'X-RateLimit-Reset': str(server.reset_at)})
+                return
+            server.remaining -= 1
+            body = json.dumps({'path': path, 'version': server.version}).encode()
+            headers = {'ETag': server.etag, 'X-RateLimit-Remaining': str(server.remaining),
+                       'X-RateLimit-Reset': str(server.reset_at)}
+        self._send(200, body, headers)
+
+    def _send(self, status, body, headers):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def api():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), QuotaHandler)
+    server.daemon_threads = True
+    server.hits = []
+    server.etag = '"v1"'
+    server.version = 1
+    server.remaining = 60
+    server.reset_at = int(time.time()) + 3600
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f'http://127.0.0.1:{server.server_address[1]}'
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(tmp_path):
+    return CachingHTTPClient(path=str(tmp_path / 'http.sqlite3'))
+
+
+def test_repeat_requests_are_served_from_cache(api, client):
+    first = client.get(f'{api.url}/users/alice')
+    second = client.get(f'{api.url}/users/alice')
+    assert first.json() == second.json()
+    assert second.from_cache
+    assert len(api.hits) == 1
+
+
+def test_stale_entries_are_revalidated_with_etag(api, client, monkeypatch):
+    monkeypatch.setitem(http_cache.HTTP_CACHE_TTLS, '/users/', 0)
+    client.get(f'{api.url}/users/alice')
+    response = client.get(f'{api.url}/users/alice')
+
+    assert response.json()['path'] == '/users/alice'
+    assert api.hits[1][2] == '"v1"'
+    assert api.remaining == 59  # the 304 was free
+    assert client.stats()['revalidated'] == 1
+
+
+def test_exhausted_quota_is_waited_out_before_calling(api, client):
+    api.remaining = 1
+    api.reset_at = int(time.time()) + 2
+    client.get(f'{api.url}/search/users?q=python')
+    assert client.wait_time('127.0.0.1:%d' % api.server_address[1]) > 0
+
+    # With no time to wait and nothing cached, the call is refused rather than sent
+    with pytest.raises(RateLimitedError):
+        client.get(f'{api.url}/users/bob', deadline=time.monotonic() + 0.1)
+    assert len(api.hits) == 1
+
+
+def test_waits_without_a_deadline_are_capped(api, client, monkeypatch):
+    monkeypatch.setattr(http_cache, 'RATE_LIMIT_MAX_WAIT', 0.5)
+    api.remaining = 1
+    api.reset_at = int(time.time()) + 3600
+    client.get(f'{api.url}/search/users?q=python')
+
+    started = time.monotonic()
+    with pytest.raises(RateLimitedError):
+        client.get(f'{api.url}/users/bob')
+    assert time.monotonic() - started < 0.5
+    assert len(api.hits) == 1
+
+
+def test_exhausted_quota_serves_stale_copy(api, client, monkeypatch):
+    monkeypatch.setitem(http_cache.HTTP_CACHE_TTLS, '/users/', 0)
+    api.remaining = 1
+    client.get(f'{api.url}/users/alice')
+    response = client.get(f'{api.url}/users/alice', deadline=time.monotonic() + 0.1)
+    assert response.from_cache
+    assert len(api.hits) == 1
+
+
+def test_stack_exchange_backoff_delays_next_call(api, client):
+    client.get(f'{api.url}/backoff?page=1')
+    client.get(f'{api.url}/backoff?page=2')
+    assert api.hits[1][0] - api.hits[0][0] >= 0.9
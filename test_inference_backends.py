@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('onnxruntime')
+pytest.importorskip('sentence_transformers')
+
+from inference_backends import create_backend
+
+JOB = "Senior Python developer with Flask, SQL and AWS experience leading a data team"
+RESUMES = [
+    "Python developer, five years of Flask and Django, SQL, AWS",
+    "Java engineer building React and Node cloud services",
+    "Machine learning engineer: Python, data pipelines, team lead",
+    "Resume",
+    " ".join(["Experienced senior engineer, python java react cloud data"] * 40),
+]
+WORDS = ("python java developer senior engineer react node cloud team lead leading data machine learning "
+         "flask django sql aws resume years experience experienced building services pipelines with and "
+         "of a five").split()
+
+
+@pytest.fixture(scope='module')
+def model_dir(tmp_path_factory):
+    """A tiny randomly initialized BERT saved as a local sentence-transformers model (no download)."""
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    hf_dir = tmp_path_factory.mktemp('hf')
+    (hf_dir / 'vocab.txt').write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS
+                                                + list("abcdefghijklmnopqrstuvwxyz,:")))
+    tokenizer = BertTokenizerFast(vocab_file=str(hf_dir / 'vocab.txt'))
+    tokenizer.save_pretrained(str(hf_dir))
+    torch.manual_seed(0)
+    config = BertConfig(vocab_size=len(tokenizer), hidden_size=64, num_hidden_layers=2, num_attention_heads=4,
+                        intermediate_size=128, max_position_embeddings=128)
+    BertModel(config).save_pretrained(str(hf_dir))
+
+    st_dir = tmp_path_factory.mktemp('sentence_model')
+    transformer = models.Transformer(str(hf_dir), max_seq_length=64)
+    SentenceTransformer(modules=[transformer, models.Pooling(64, 'mean'), models.Normalize()]).save(str(st_dir))
+    return str(st_dir)
+
+
+def cosine_scores(backend):
+    vectors = backend.encode([JOB] + RESUMES, batch_size=2, normalize_embeddings=True)
+    return vectors[1:] @ vectors[0]
+
+
+@pytest.mark.parametrize('name, tolerance', [('onnx', 1e-4), ('onnx-int8', 0.05)])
+def test_onnx_scores_match_torch(model_dir, tmp_path, name, tolerance):
+    reference = cosine_scores(create_backend('torch', 'test-model', model_dir=model_dir))
+    backend = create_backend(name, 'test-model', model_dir=model_dir, onnx_dir=str(tmp_path / 'onnx'))
+    scores = cosine_scores(backend)
+    assert np.abs(scores - reference).max() <= tolerance
+
+
+def test_onnx_encode_shapes(model_dir, tmp_path):
+    backend = create_backend('onnx', 'test-model', model_dir=model_dir, onnx_dir=str(tmp_path / 'onnx'))
+    single = backend.encode(JOB)
+    assert single.shape == (64,)
+    assert np.isclose(np.linalg.norm(single), 1, atol=1e-5)
+    assert backend.encode([]).shape == (0, 64)
+
+
+def test_onnx_backend_requires_local_model_dir():
+    with pytest.raises(ValueError):
+        create_backend('onnx', 'test-model', model_dir=None)
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import job_library
+import pipeline
+from benchmarks.corpus import make_document
+from dashboard_stats import DashboardStats
+from document_cache import DocumentCache
+from inference_backends import create_backend
+from job_library import JobLibrary
+
+BACKEND = create_backend('stub', 'unused')
+
+
+def encode(texts, batch_size=32):
+    return BACKEND.encode(list(texts))
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_library, 'get_embeddings', encode)
+    return JobLibrary(path=str(tmp_path / 'roles.sqlite3'))
+
+
+def test_roles_store_their_skills_and_only_open_ones_are_matched(library):
+    backend = library.add('Backend', "Python developer with Django, PostgreSQL and AWS", created_by='a@b.com')
+    frontend = library.add('Frontend', "React and TypeScript engineer")
+    assert set(backend['skills']) >= {'python', 'django', 'aws'}
+
+    roles, embeddings = library.open_roles()
+    assert [role['title'] for role in roles] == ['Backend', 'Frontend']
+    assert np.allclose(embeddings[1], encode(["React and TypeScript engineer"])[0])
+
+    library.update(frontend['id'], status='closed')
+    assert [role['title'] for role in library.open_roles()[0]] == ['Backend']
+    assert [role['status'] for role in library.list()] == ['open', 'closed']
+    with pytest.raises(ValueError):
+        library.update(backend['id'], status='archived')
+    assert library.delete(frontend['id']) and not library.delete(frontend['id'])
+
+
+def test_open_roles_reload_after_another_worker_edits_the_library(library):
+    library.add('Backend', "Python developer")
+    assert len(library.open_roles()[0]) == 1
+    JobLibrary(path=library.path).add('Data', "Spark and Kafka data engineer")
+    assert [role['title'] for role in library.open_roles()[0]] == ['Backend', 'Data']
+
+
+def test_roles_embedded_by_another_model_are_re_embedded(library, monkeypatch):
+    role = library.add('Backend', "Python developer")
+    monkeypatch.setattr(job_library, 'EMBEDDING_MODEL_KEY', 'another-model')
+    calls = []
+    monkeypatch.setattr(job_library, 'get_embeddings', lambda texts: calls.append(texts) or encode(texts))
+    fresh = JobLibrary(path=library.path)
+    fresh.open_roles()
+    fresh.open_roles()
+    assert calls == [[role['description']]]
+
+
+def test_match_roles_scores_every_resume_against_every_role(library, monkeypatch):
+    monkeypatch.setattr(pipeline, 'get_embeddings', encode)
+    monkeypatch.setattr(pipeline, 'get_document_cache', lambda: DocumentCache(path=''))
+    stats = DashboardStats(path=None)
+    monkeypatch.setattr(pipeline, 'get_dashboard_stats', lambda: stats)
+    library.add('Backend', "Python Django PostgreSQL backend developer")
+    library.add('Frontend', "React TypeScript CSS frontend developer")
+    roles, embeddings = library.open_roles()
+    documents = [(make_document(text, 'txt'), filename) for text, filename in [
+        ("Backend developer: Python, Django, PostgreSQL and Docker", 'ana.txt'),
+        ("Frontend developer: React, TypeScript, CSS and Figma", 'ben.txt'),
+        ("Python Django backend developer who knows PostgreSQL", 'cy.txt')]]
+
+    matches = pipeline.match_roles(documents, roles, embeddings, top_k=2)
+    best = {candidate['filename']: candidate['best_role']['title'] for candidate in matches['candidates']}
+    assert best == {'ana.txt': 'Backend', 'ben.txt': 'Frontend', 'cy.txt': 'Backend'}
+    ana = next(candidate for candidate in matches['candidates'] if candidate['filename'] == 'ana.txt')
+    assert 'python' in ana['best_role']['matched_skills'] and len(ana['roles']) == 2
+
+    backend = matches['roles'][0]
+    assert backend['best_fit_count'] == 2
+    assert {candidate['filename'] for candidate in backend['candidates']} == {'ana.txt', 'cy.txt'}
@@ -0,0 +1,95 @@
+import json
+import os
+
+import metrics
+
+
+def sample_lines(text, name):
+    return [line for line in text.splitlines() if line.startswith(name)]
+
+
+def test_counters_and_histograms_render_in_prometheus_format(monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_DIR', '')
+    requests = metrics.counter('test_render_requests_total', "Requests", ('status',))
+    latency = metrics.histogram('test_render_seconds', "Latency", buckets=(0.1, 1))
+    requests.inc(status=200)
+    requests.inc(2, status=200)
+    requests.inc(status=500)
+    for value in (0.05, 0.5, 5):
+        latency.observe(value)
+
+    text = metrics.render_metrics()
+    assert '# TYPE test_render_requests_total counter' in text
+    assert sample_lines(text, 'test_render_requests_total{') == [
+        'test_render_requests_total{status="200"} 3', 'test_render_requests_total{status="500"} 1']
+    assert '# TYPE test_render_seconds histogram' in text
+    assert sample_lines(text, 'test_render_seconds_bucket') == [
+        'test_render_seconds_bucket{le="0.1"} 1', 'test_render_seconds_bucket{le="1.0"} 2',
+        'test_render_seconds_bucket{le="+Inf"} 3']
+    assert 'test_render_seconds_count 3' in text
+    assert 'test_render_seconds_sum 5.55' in text
+
+
+def test_render_sums_every_process_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_DIR', str(tmp_path))
+    hits = metrics.counter('test_merge_hits_total', "Hits", ('cache',))
+    hits.inc(4, cache='embedding')
+    # Another worker's snapshot, as its flush thread would write it
+    other = {'test_merge_hits_total': {'type': 'counter', 'help': "Hits", 'labels': ['cache'],
+                                       'values': [[['embedding'], 6], [['http'], 1]]}}
+    (tmp_path / '999999.json').write_text(json.dumps(other))
+
+    text = metrics.render_metrics()
+    assert 'test_merge_hits_total{cache="embedding"} 10' in text
+    assert 'test_merge_hits_total{cache="http"} 1' in text
+    assert (tmp_path / f"{os.getpid()}.json").exists()
+
+    metrics.clear_metrics_dir()
+    assert not list(tmp_path.glob('*.json'))
+
+
+def test_exited_processes_are_folded_into_one_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_DIR', str(tmp_path))
+    metrics.counter('test_retire_jobs_total', "Jobs").inc(2)
+    metrics.histogram('test_retire_seconds', "Latency", buckets=(1,)).observe(0.5)
+    for _ in range(3):
+        pid = os.fork()
+        if pid == 0:
+            metrics.counter('test_retire_jobs_total', "Jobs").inc(5)
+            metrics.histogram('test_retire_seconds', "Latency", buckets=(1,)).observe(2)
+            metrics.flush()
+            os._exit(0)
+        os.waitpid(pid, 0)
+
+    for _ in range(2):
+        text = metrics.render_metrics()
+        assert 'test_retire_jobs_total 17' in text
+        assert 'test_retire_seconds_bucket{le="1.0"} 1' in text and 'test_retire_seconds_count 4' in text
+    assert sorted(path.name for path in tmp_path.glob('*.json')) == [f"{os.getpid()}.json", 'retired.json']
+
+
+def test_forked_child_starts_from_zero(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_DIR', str(tmp_path))
+    jobs = metrics.counter('test_fork_jobs_total', "Jobs")
+    jobs.inc(5)
+    pid = os.fork()
+    if pid == 0:
+        jobs.inc()
+        metrics.flush()
+        os._exit(0)
+    os.waitpid(pid, 0)
+    child = json.loads((tmp_path / f"{pid}.json").read_text())
+    assert child['test_fork_jobs_total']['values'] == [[[], 1]]
+    assert 'test_fork_jobs_total 6' in metrics.render_metrics()
+
+
+def test_histogram_time_works_as_a_decorator(monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_DIR', '')
+    timed = metrics.histogram('test_decorated_seconds', "Decorated calls")
+
+    @timed.time()
+    def work(x):
+        return x * 2
+
+    assert work(2) == 4 and work(3) == 6
+    assert 'test_decorated_seconds_count 2' in metrics.render_metrics()
@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from candidate_aggregator import CandidateAggregator
+from web_scrapers.professional_apis import ProfessionalDataAggregator
+
+
+class StubAPIHandler(BaseHTTPRequestHandler):
+    """Serves GitHub- and Stack Exchange-shaped responses with configurable delays."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        path = urlsplit(self.path).path
+        with server.lock:
+            server.requests.append(path)
+            server.queries.append(parse_qs(urlsplit(self.path).query))
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(server.delays.get(path, server.default_delay))
+            if path == '/search/users':
+                body = {'items': [{'login': login} for login in server.logins]}
+            elif path.startswith('/users/'):
+                login = path.rsplit('/', 1)[1]
+                body = {'name': login.title(), 'location': 'Remote', 'html_url': f'https://github.com/{login}',
+                        'bio': 'Python developer'}
+            elif path == '/2.3/users':
+                body = {'items': [{'display_name': 'Stack User', 'reputation': 9000, 'link': 'https://so/u/1'}]}
+            else:
+                self.send_error(404)
+                return
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_api():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubAPIHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = []
+    server.queries = []
+    server.in_flight = server.max_in_flight = 0
+    server.logins = [f'user{i}' for i in range(6)]
+    server.delays = {}
+    server.default_delay = 0.2
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_aggregator(server, tmp_path, **kwargs):
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    return ProfessionalDataAggregator(github_api=base, stackexchange_api=base,
+                                      http_cache_path=str(tmp_path / 'http.sqlite3'), **kwargs)
+
+
+def test_user_details_are_fetched_concurrently(stub_api, tmp_path):
+    aggregator = make_aggregator(stub_api, tmp_path, max_per_host=6)
+    started = time.monotonic()
+    candidates = aggregator.search_professionals('Python developer with Django', max_results=12)
+    elapsed = time.monotonic() - started
+
+    # Serially this is 1 search + 6 lookups (+ Stack Overflow) at 0.2s each, i.e. at least 1.4s
+    assert elapsed < 1.0
+    assert [c['name'] for c in candidates if c['source'] == 'GitHub'] == [f'User{i}' for i in range(6)]
+    assert any(c['source'] == 'Stack Overflow' for c in candidates)
+
+
+def test_per_host_concurrency_limit(stub_api, tmp_path):
+    aggregator = make_aggregator(stub_api, tmp_path, max_per_host=2)
+    candidates = aggregator.search_github(['python'], 6)
+    assert len(candidates) == 6
+    assert stub_api.max_in_flight <= 2
+
+
+def test_search_terms_are_url_encoded(stub_api, tmp_path):
+    stub_api.logins = []
+    aggregator = make_aggregator(stub_api, tmp_path)
+    aggregator.search_github(['c#', 'c++', '.net'], 5)
+    aggregator.search_stackoverflow(['c#', 'c++'], 5)
+    assert stub_api.queries[0]['q'] == ['c# c++ .net']
+    assert stub_api.queries[1]['inname'] == ['c#;c++'] and stub_api.queries[1]['site'] == ['stackoverflow']
+
+
+def test_deadline_returns_partial_results(stub_api, tmp_path):
+    stub_api.delays = {'/users/user3': 3, '/2.3/users': 3}
+    aggregator = make_aggregator(stub_api, tmp_path, deadline=1)
+    started = time.monotonic()
+    candidates = aggregator.search_professionals('Python developer', max_results=12)
+
+    assert time.monotonic() - started < 1.5
+    assert [c['name'] for c in candidates] == ['User0', 'User1', 'User2', 'User4', 'User5']
+
+
+def test_constructors_create_session():
+    aggregator = CandidateAggregator()
+    assert aggregator.pro_aggregator.session is not None
@@ -0,0 +1,81 @@
+import numpy as np
+
+from talent_pool import TalentPool
+from vector_store import QuantizedVectorStore, quantize
+
+
+def clustered_embeddings(count, seed=0):
+    # Resume embeddings cluster by role, so uniform noise would overstate recall
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(40, 384)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), count)] + 0.6 * rng.normal(size=(count, 384))
+    vectors = vectors.astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def recall_at_k(store, vectors, queries, k=10):
+    hits = 0
+    for query in queries:
+        exact = set(np.argsort(-(vectors @ query))[:k])
+        approx = set(np.argsort(-store.score(query))[:k])
+        hits += len(exact & approx)
+    return hits / (k * len(queries))
+
+
+def test_quantize_round_trip_error_is_small():
+    vectors = clustered_embeddings(200)
+    for dtype, tolerance in (('int8', 0.01), ('float16', 0.001)):
+        codes, scales = quantize(vectors, dtype)
+        restored = codes.astype(np.float32) * scales[:, None]
+        assert np.abs(restored - vectors).max() < tolerance
+
+
+def test_quantized_recall_against_float32(tmp_path):
+    vectors = clustered_embeddings(5000)
+    queries = clustered_embeddings(50, seed=1)
+    for dtype, minimum in (('float16', 0.99), ('int8', 0.9)):
+        store = QuantizedVectorStore(str(tmp_path / 'vectors'), dtype=dtype)
+        store.append(lambda last_id: (np.arange(1, len(vectors) + 1), vectors))
+        assert len(store) == len(vectors)
+        assert isinstance(store.ids, np.memmap)
+        assert recall_at_k(store, vectors, queries) >= minimum
+
+
+def test_append_only_adds_newer_rows(tmp_path):
+    vectors = clustered_embeddings(10)
+    store = QuantizedVectorStore(str(tmp_path / 'vectors'))
+    store.append(lambda last_id: (np.arange(1, 6), vectors[:5]))
+    # A second process opening the same files sees the rows and only appends newer ones
+    other = QuantizedVectorStore(str(tmp_path / 'vectors'))
+    other.append(lambda last_id: (np.arange(last_id + 1, 11), vectors[last_id:]))
+    store.refresh()
+    assert list(store.ids) == list(range(1, 11))
+
+
+def test_talent_pool_rescoring_matches_exact_ranking(tmp_path):
+    vectors = clustered_embeddings(2000)
+    pool = TalentPool(path=str(tmp_path / 'pool.sqlite3'), ivf_threshold=0, vector_dtype='int8')
+    candidates = [{'resume_text': f'resume {i}', 'name': f'Candidate {i}', 'email': f'c{i}@example.com',
+                   'filename': f'c{i}.pdf', 'score': 0} for i in range(len(vectors))]
+    assert pool.add_many(candidates, vectors) == len(vectors)
+
+    for query in clustered_embeddings(20, seed=2):
+        hits = pool.search(query, top_k=10)
+        exact = np.argsort(-(vectors @ query))[:10]
+        assert [hit['filename'] for hit in hits] == [f'c{i}.pdf' for i in exact]
+
+
+def test_re_embedded_candidates_are_searched_with_their_new_vector(tmp_path):
+    vectors = clustered_embeddings(50)
+    pool = TalentPool(path=str(tmp_path / 'pool.sqlite3'), ivf_threshold=0, vector_dtype='float32')
+    candidates = [{'resume_text': f'resume {i}', 'name': f'Candidate {i}', 'email': f'c{i}@example.com',
+                   'filename': f'c{i}.pdf', 'score': 0} for i in range(len(vectors))]
+    pool.add_many(candidates, vectors)
+    assert pool.search(vectors[7], top_k=1)[0]['filename'] == 'c7.pdf'
+
+    # Candidate 3 comes back embedded by a new model, now closest to where candidate 7 was
+    pool.add_many([candidates[3]], vectors[7:8])
+    hits = pool.search(vectors[7], top_k=2)
+    assert sorted(hit['filename'] for hit in hits) == ['c3.pdf', 'c7.pdf']
+    assert all(np.allclose(hit['embedding'], vectors[7]) for hit in hits)
+    assert len(pool) == len(vectors) and len(pool.search(vectors[0], top_k=len(vectors))) == len(vectors)
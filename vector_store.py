@@ -0,0 +1,134 @@
+# vector_store.py
+import fcntl
+import os
+import threading
+
+import numpy as np
+
+from utils import EMBEDDING_DIM
+
+VECTOR_DTYPES = ('float32', 'float16', 'int8')
+SCORE_BLOCK_ROWS = 65536
+
+
+def quantize(vectors, dtype):
+    """Encode float vectors as ``(codes, scales)``; ``codes[i] * scales[i]`` approximates row i.
+
+    int8 uses a symmetric per-vector scale so every row spends the full
+    [-127, 127] range; float16 and float32 keep a scale of 1.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+    if dtype == 'int8':
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales[scales == 0] = 1
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    return vectors.astype(dtype), np.ones(len(vectors), dtype=np.float32)
+
+
+class QuantizedVectorStore:
+    """Append-only, memory-mapped store of quantized embeddings.
+
+    Rows live in three flat files next to ``prefix``: the codes
+    (``n x dim`` of ``dtype``), one float32 scale per row and the int64
+    IDs the rows belong to. Files are mapped read-only, so every gunicorn
+    worker scores straight out of the same page cache without holding its
+    own copy. Appends take an exclusive file lock and write the IDs last,
+    which makes the ID count the number of complete rows for readers.
+    """
+
+    def __init__(self, prefix, dtype='int8', dim=EMBEDDING_DIM):
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        self.prefix = prefix
+        self.dtype = dtype
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._count = 0
+        self._codes = np.zeros((0, dim), dtype=dtype)
+        self._scales = np.zeros(0, dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        directory = os.path.dirname(prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, part):
+        return f"{self.prefix}.{self.dtype}.{part}"
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def ids(self):
+        return self._ids
+
+    def last_id(self):
+        return int(self._ids[-1]) if self._count else 0
+
+    def refresh(self):
+        """Map rows appended since the last refresh, by this or any other process."""
+        try:
+            count = os.path.getsize(self._path('ids')) // 8
+        except OSError:
+            count = 0
+        with self._lock:
+            if count == self._count:
+                return
+            # Mapping a fresh view is cheap; views handed out earlier stay valid
+            self._ids = np.memmap(self._path('ids'), dtype=np.int64, mode='r', shape=(count,))
+            self._scales = np.memmap(self._path('scales'), dtype=np.float32, mode='r', shape=(count,))
+            self._codes = np.memmap(self._path('codes'), dtype=self.dtype, mode='r', shape=(count, self.dim))
+            self._count = count
+
+    def append(self, rows_after):
+        """Append rows under an exclusive lock shared by all processes.
+
+        ``rows_after(last_id)`` is called with the lock held and returns
+        ``(ids, vectors)`` for the rows newer than ``last_id``, so concurrent
+        workers never append the same row twice.
+        """
+        with open(self._path('lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self.refresh()
+            ids, vectors = rows_after(self.last_id())
+            if len(ids) == 0:
+                return 0
+            codes, scales = quantize(vectors, self.dtype)
+            # A previous writer may have died midway; drop its partial rows first
+            for part, row_bytes in (('codes', codes.itemsize * self.dim), ('scales', 4), ('ids', 8)):
+                with open(self._path(part), 'ab') as f:
+                    f.truncate(self._count * row_bytes)
+            with open(self._path('codes'), 'ab') as f:
+                f.write(codes.tobytes())
+            with open(self._path('scales'), 'ab') as f:
+                f.write(scales.tobytes())
+            with open(self._path('ids'), 'ab') as f:
+                f.write(np.asarray(ids, dtype=np.int64).tobytes())
+        self.refresh()
+        return len(ids)
+
+    def vectors(self, rows):
+        """Dequantize the given rows (an index array or slice) to float32."""
+        with self._lock:
+            codes, scales = self._codes, self._scales
+        return codes[rows].astype(np.float32) * scales[rows][:, None]
+
+    def score(self, query, rows=None):
+        """Dot products of ``query`` with every row (or just ``rows``).
+
+        Blocks are dequantized one at a time so scoring never materializes
+        a float32 copy of the whole pool.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        with self._lock:
+            codes, scales = self._codes, self._scales
+        if rows is not None:
+            return (codes[rows].astype(np.float32) @ query) * scales[rows]
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+            end = start + SCORE_BLOCK_ROWS
+            scores[start:end] = codes[start:end].astype(np.float32) @ query
+        return scores * scales
+
+    def nbytes(self):
+        return self._count * (self.dim * np.dtype(self.dtype).itemsize + 4 + 8)
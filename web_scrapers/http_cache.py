@@ -0,0 +1,248 @@
+# web_scrapers/http_cache.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
+import requests
+
+from metrics import counter, histogram
+
+HTTP_CACHE_PATH = os.getenv('HTTP_CACHE_PATH', os.path.join('cache', 'http.sqlite3'))
+# Seconds a cached response is served without revalidation, by URL path prefix
+HTTP_CACHE_TTLS = {
+    '/search/users': int(os.getenv('HTTP_CACHE_SEARCH_TTL', '900')),
+    '/users/': int(os.getenv('HTTP_CACHE_USER_TTL', str(24 * 3600))),
+    '/2.3/users': int(os.getenv('HTTP_CACHE_SEARCH_TTL', '900'))
+}
+HTTP_CACHE_DEFAULT_TTL = 600
+# Keep this many calls in reserve; below it, calls are spread evenly until the quota resets
+RATE_LIMIT_RESERVE = 5
+# Longest a call without a deadline waits out a rate limit; a spent quota can take until midnight UTC to reset
+RATE_LIMIT_MAX_WAIT = float(os.getenv('RATE_LIMIT_MAX_WAIT', '30'))
+REQUEST_TIMEOUT = 5
+EXTERNAL_API_SECONDS = histogram('recruitment_external_api_seconds', "Time for each call to an external API",
+                                 ('host',))
+EXTERNAL_API_REQUESTS = counter('recruitment_external_api_requests_total', "External API responses by status",
+                                ('host', 'status'))
+EXTERNAL_API_FAILURES = counter('recruitment_external_api_failures_total',
+                                "External API calls that failed or were skipped", ('host', 'reason'))
+HTTP_CACHE_REQUESTS = counter('recruitment_http_cache_requests_total',
+                              "External API lookups by how the response cache served them", ('result',))
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitedError(requests.RequestException):
+    """The host's quota or backoff rules out a call before the caller's deadline."""
+
+
+class CachedResponse:
+    """The parts of ``requests.Response`` the aggregator uses, from the network or the cache."""
+
+    def __init__(self, status_code, body, headers, from_cache=False):
+        self.status_code = status_code
+        self.content = body
+        self.headers = headers
+        self.from_cache = from_cache
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def _ttl_for(url):
+    path = urlsplit(url).path
+    for prefix, ttl in HTTP_CACHE_TTLS.items():
+        if path.startswith(prefix):
+            return ttl
+    return HTTP_CACHE_DEFAULT_TTL
+
+
+class CachingHTTPClient:
+    """GET with a shared response cache, conditional revalidation and quota-aware throttling.
+
+    Fresh responses are served from an SQLite cache shared by all workers.
+    Stale ones are revalidated with If-None-Match / If-Modified-Since, and a
+    304 (which GitHub does not count against the quota) just extends them.
+    GitHub's X-RateLimit-Remaining/Reset and Stack Exchange's
+    quota_remaining/backoff are recorded per host, also in SQLite, and the
+    next call waits as long as they require. When that wait would overrun
+    the caller's deadline, a stale cached copy is returned if there is one;
+    otherwise RateLimitedError is raised. Calls without a deadline wait at
+    most RATE_LIMIT_MAX_WAIT seconds. At most ``max_per_host`` requests
+    per host are on the network at once.
+    """
+
+    def __init__(self, session=None, path=HTTP_CACHE_PATH, max_per_host=6):
+        self.session = session or requests.Session()
+        self.path = path
+        self.max_per_host = max_per_host
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._host_slots = {}
+        self.hits = 0
+        self.revalidated = 0
+        self.fetched = 0
+
+    def _connection(self):
+        # SQLite handles must not cross a fork, so reconnect per process
+        if self._conn is None or self._conn_pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY, body BLOB NOT NULL, headers TEXT NOT NULL, expires_at REAL NOT NULL)''')
+            conn.execute('''CREATE TABLE IF NOT EXISTS rate_limits (
+                host TEXT PRIMARY KEY, remaining INTEGER, reset_at REAL, not_before REAL NOT NULL DEFAULT 0)''')
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def _slots(self, host):
+        with self._lock:
+            return self._host_slots.setdefault(host, threading.BoundedSemaphore(self.max_per_host))
+
+    def _cached(self, url):
+        with self._lock:
+            return self._connection().execute(
+                'SELECT body, headers, expires_at FROM responses WHERE url = ?', (url,)).fetchone()
+
+    def _store(self, url, body, headers):
+        kept = {name: headers[name] for name in ('ETag', 'Last-Modified', 'Content-Type') if name in headers}
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO responses (url, body, headers, expires_at) VALUES (?, ?, ?, ?)',
+                             (url, body, json.dumps(kept), time.time() + _ttl_for(url)))
+
+    def _extend(self, url):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute('UPDATE responses SET expires_at = ? WHERE url = ?', (time.time() + _ttl_for(url), url))
+
+    def wait_time(self, host):
+        """Seconds to hold off before the next call to ``host`` under its recorded limits."""
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT remaining, reset_at, not_before FROM rate_limits WHERE host = ?', (host,)).fetchone()
+        if row is None:
+            return 0
+        remaining, reset_at, not_before = row
+        now = time.time()
+        wait = max(0, not_before - now)
+        if remaining is not None and reset_at and reset_at > now:
+            if remaining <= 0:
+                wait = max(wait, reset_at - now)
+            elif remaining < RATE_LIMIT_RESERVE:
+                # Spread the last few calls over the rest of the window instead of spending them at once
+                wait = max(wait, (reset_at - now) / (remaining + 1))
+        return wait
+
+    def _record_limits(self, host, response, body):
+        remaining = reset_at = None
+        backoff = 0
+        headers = response.headers
+        if 'X-RateLimit-Remaining' in headers:
+            remaining = int(headers['X-RateLimit-Remaining'])
+            reset_at = float(headers.get('X-RateLimit-Reset', 0)) or None
+        elif 'json' in headers.get('Content-Type', ''):
+            try:
+                data = json.loads(body)
+            except ValueError:
+                data = {}
+            if isinstance(data, dict):
+                backoff = data.get('backoff', 0)
+                if 'quota_remaining' in data:
+                    remaining = data['quota_remaining']
+                    # Stack Exchange quotas reset at midnight UTC
+                    tomorrow = datetime.now(timezone.utc).date() + timedelta(days=1)
+                    reset_at = datetime.combine(tomorrow, datetime.min.time(), timezone.utc).timestamp()
+        if remaining is None and not backoff:
+            return
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute('''INSERT INTO rate_limits (host, remaining, reset_at, not_before) VALUES (?, ?, ?, ?)
+                                ON CONFLICT(host) DO UPDATE SET
+                                    remaining = COALESCE(excluded.remaining, remaining),
+                                    reset_at = COALESCE(excluded.reset_at, reset_at),
+                                    not_before = MAX(not_before, excluded.not_before)''',
+                             (host, remaining, reset_at, time.time() + backoff))
+
+    def get(self, url, deadline=None, params=None):
+        """Return a CachedResponse for ``url``, waiting for rate limits up to ``deadline``.
+
+        ``params`` are URL-encoded into the query string, which is also the cache key.
+        """
+        if params:
+            url = requests.Request('GET', url, params=params).prepare().url
+        cached = self._cached(url)
+        if cached is not None and cached[2] > time.time():
+            self.hits += 1
+            HTTP_CACHE_REQUESTS.inc(result='hit')
+            return CachedResponse(200, cached[0], json.loads(cached[1]), from_cache=True)
+
+        host = urlsplit(url).netloc
+        with self._slots(host):
+            wait = self.wait_time(host)
+            if wait:
+                latest = deadline if deadline is not None else time.monotonic() + RATE_LIMIT_MAX_WAIT
+                if time.monotonic() + wait > latest:
+                    if cached is not None:
+                        logger.info("%s is rate limited; serving a stale copy of %s", host, url)
+                        self.hits += 1
+                        HTTP_CACHE_REQUESTS.inc(result='stale')
+                        return CachedResponse(200, cached[0], json.loads(cached[1]), from_cache=True)
+                    EXTERNAL_API_FAILURES.inc(host=host, reason='rate_limited')
+                    raise RateLimitedError(f"{host} is rate limited for another {wait:.0f}s")
+                logger.info("Waiting %.1fs for the %s rate limit", wait, host)
+                time.sleep(wait)
+
+            headers = {}
+            if cached is not None:
+                validators = json.loads(cached[1])
+                if 'ETag' in validators:
+                    headers['If-None-Match'] = validators['ETag']
+                if 'Last-Modified' in validators:
+                    headers['If-Modified-Since'] = validators['Last-Modified']
+            timeout = REQUEST_TIMEOUT
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    EXTERNAL_API_FAILURES.inc(host=host, reason='deadline')
+                    raise requests.Timeout(f"search deadline passed before requesting {url}")
+                timeout = min(timeout, remaining)
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, headers=headers, timeout=timeout)
+            except requests.RequestException as e:
+                EXTERNAL_API_FAILURES.inc(host=host, reason='timeout' if isinstance(e, requests.Timeout) else 'error')
+                raise
+            finally:
+                EXTERNAL_API_SECONDS.observe(time.perf_counter() - started, host=host)
+            EXTERNAL_API_REQUESTS.inc(host=host, status=response.status_code)
+
+        self._record_limits(host, response, response.content)
+        if response.status_code == 304 and cached is not None:
+            self.revalidated += 1
+            HTTP_CACHE_REQUESTS.inc(result='revalidated')
+            self._extend(url)
+            return CachedResponse(200, cached[0], json.loads(cached[1]), from_cache=True)
+        self.fetched += 1
+        HTTP_CACHE_REQUESTS.inc(result='fetched')
+        if response.status_code == 200:
+            self._store(url, response.content, response.headers)
+        elif cached is not None and response.status_code in (403, 429):
+            # Quota exhausted mid-window: a stale answer beats none
+            return CachedResponse(200, cached[0], json.loads(cached[1]), from_cache=True)
+        return CachedResponse(response.status_code, response.content, dict(response.headers))
+
+    def stats(self):
+        return {'hits': self.hits, 'revalidated': self.revalidated, 'fetched': self.fetched}
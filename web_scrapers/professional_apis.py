@@ -1,133 +1,177 @@
 # web_scrapers/professional_apis.py
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from skill_taxonomy import SKILL_MATCHER
+from web_scrapers.http_cache import HTTP_CACHE_PATH, CachingHTTPClient
+
+
+GITHUB_API_URL = os.getenv('GITHUB_API_URL', 'https://api.github.com')
+STACKEXCHANGE_API_URL = os.getenv('STACKEXCHANGE_API_URL', 'https://api.stackexchange.com')
+# Whole-search budget; whatever has arrived by then is returned
+PROFESSIONAL_SEARCH_DEADLINE = float(os.getenv('PROFESSIONAL_SEARCH_DEADLINE', '8'))
+PROFESSIONAL_MAX_PER_HOST = int(os.getenv('PROFESSIONAL_MAX_PER_HOST', '6'))
+
+logger = logging.getLogger(__name__)
 
 
 class ProfessionalDataAggregator:
-    def init(self):
+    """Searches public developer APIs for candidate profiles.
+
+    Sources and per-user detail lookups run concurrently on a bounded
+    thread pool over one keep-alive session, with at most ``max_per_host``
+    requests in flight per host. Responses are cached and API quotas are
+    respected by CachingHTTPClient. A search returns whatever has arrived
+    once ``deadline`` seconds have passed.
+    """
+
+    def __init__(self, github_api=GITHUB_API_URL, stackexchange_api=STACKEXCHANGE_API_URL,
+                 deadline=PROFESSIONAL_SEARCH_DEADLINE, max_per_host=PROFESSIONAL_MAX_PER_HOST,
+                 http_cache_path=HTTP_CACHE_PATH):
+        self.github_api = github_api.rstrip('/')
+        self.stackexchange_api = stackexchange_api.rstrip('/')
+        self.deadline = deadline
+        self.max_per_host = max_per_host
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_per_host)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.http = CachingHTTPClient(self.session, path=http_cache_path, max_per_host=max_per_host)
+        # One thread per possible in-flight request across both sources, plus the source searches
+        self._executor = ThreadPoolExecutor(max_workers=2 * max_per_host + 2, thread_name_prefix='pro-search')
+
+    def _get(self, url, deadline=None, params=None):
+        """GET through the shared caching, rate-limited session."""
+        return self.http.get(url, deadline, params=params)
+
+    def _deadline(self, deadline):
+        return deadline if deadline is not None else time.monotonic() + self.deadline
 
     def search_professionals(self, job_description, max_results=10):
         """Search for professionals using public APIs"""
+        keywords = []
         try:
-            print(f"🔍 Searching professional networks for: {job_description[:50]}...")
-
             keywords = self.extract_keywords(job_description)
-            print(f"📝 Keywords: {keywords}")
-
-            candidates = []
-
-            # Try GitHub API
-            github_candidates = self.search_github(keywords, max_results // 2)
-            candidates.extend(github_candidates)
-
-            # Try Stack Overflow API
-            stackoverflow_candidates = self.search_stackoverflow(keywords, max_results // 2)
-            candidates.extend(stackoverflow_candidates)
-
-            print(f"✅ Found {len(candidates)} professionals")
+            logger.info("Searching professional networks for: %.50s (keywords %s)", job_description, keywords)
+
+            deadline = time.monotonic() + self.deadline
+            # Stack Overflow runs on the pool while GitHub fans out its user lookups from here
+            stackoverflow_future = self._executor.submit(self.search_stackoverflow, keywords,
+                                                         max_results // 2, deadline)
+            candidates = self.search_github(keywords, max_results // 2, deadline)
+            try:
+                candidates.extend(stackoverflow_future.result(timeout=max(0, deadline - time.monotonic())))
+            except FutureTimeout:
+                logger.warning("Stack Overflow search missed the deadline")
+
+            logger.info("Found %d professionals", len(candidates))
             return candidates[:max_results]
 
         except Exception as e:
-            print(f"❌ Error in professional search: {e}")
+            logger.error("Error in professional search: %s", e)
             return self.get_sample_professionals(keywords, max_results)
 
-    def search_github(self, keywords, max_results):
+    def search_github(self, keywords, max_results, deadline=None):
         """Search GitHub for developer profiles"""
+        deadline = self._deadline(deadline)
         candidates = []
         try:
-            query = "+".join(keywords)
-            url = f"https://api.github.com/search/users?q={query}&per_page={max_results}"
-
-            print(f"🌐 Calling GitHub API: {url}")
-            response = self.session.get(url)
-            print(f"📡 GitHub API response: {response.status_code}")
+            # Terms like "c#" and "c++" must be encoded, so requests builds the query string
+            url = f"{self.github_api}/search/users"
+            response = self._get(url, deadline, params={'q': " ".join(keywords), 'per_page': max_results})
+            logger.debug("GitHub API %s returned %s", url, response.status_code)
 
             if response.status_code == 200:
                 data = response.json()
-                print(f"📊 GitHub found {len(data.get('items', []))} users")
 
-                for user in data.get('items', [])[:max_results]:
-                    user_details = self.get_github_user_details(user['login'])
-                    if user_details:
-                        candidates.append(user_details)
+                logins = [user['login'] for user in data.get('items', [])[:max_results]]
+                futures = [self._executor.submit(self.get_github_user_details, login, deadline)
+                           for login in logins]
+                done, not_done = wait(futures, timeout=max(0, deadline - time.monotonic()))
+                if not_done:
+                    logger.warning("%d GitHub user lookups missed the deadline", len(not_done))
+                    for future in not_done:
+                        future.cancel()
+                # Keep GitHub's ranking order
+                for future in futures:
+                    if future in done and future.result():
+                        candidates.append(future.result())
             else:
-                print(f"⚠️ GitHub API returned {response.status_code}")
+                logger.warning("GitHub API returned %s", response.status_code)
 
         except Exception as e:
-            print(f"⚠️ GitHub API error: {e}")
+            logger.warning("GitHub API error: %s", e)
 
         return candidates
 
-    def get_github_user_details(self, username):
+    def get_github_user_details(self, username, deadline=None):
         """Get GitHub user details"""
         try:
-            url = f"https://api.github.com/users/{username}"
-            response = self.session.get(url)
+            url = f"{self.github_api}/users/{username}"
+            response = self._get(url, deadline)
 
             if response.status_code == 200:
                 user_data = response.json()
 
                 return {
-                    'name': user_data.get('name', username),
+                    'name': user_data.get('name') or username,
                     'title': 'Software Developer',
-                    'location': user_data.get('location', 'Remote'),
+                    'location': user_data.get('location') or 'Remote',
                     'source': 'GitHub',
                     'profile_url': user_data.get('html_url', ''),
                     'skills': ['Python', 'JavaScript', 'Git'],
                     'experience_level': 'Mid-level',
-                    'bio': user_data.get('bio', 'Open source contributor')
+                    'bio': user_data.get('bio') or 'Open source contributor'
                 }
         except Exception as e:
-            print(f"⚠️ Error fetching GitHub user {username}: {e}")
+            logger.warning("Error fetching GitHub user %s: %s", username, e)
 
         return None
 
-    def search_stackoverflow(self, keywords, max_results):
+    def search_stackoverflow(self, keywords, max_results, deadline=None):
         """Search Stack Overflow for technical profiles"""
         candidates = []
         try:
-            query = ";".join(keywords[:2])  # Use only first 2 keywords
-            url = f"https://api.stackexchange.com/2.3/users?order=desc&sort=reputation&inname={query}&site=stackoverflow&pagesize={max_results}"
-
-            print(f"🌐 Calling Stack Overflow API: {url}")
-            response = self.session.get(url)
-            print(f"📡 Stack Overflow API response: {response.status_code}")
+            url = f"{self.stackexchange_api}/2.3/users"
+            response = self._get(url, self._deadline(deadline), params={
+                'order': 'desc', 'sort': 'reputation', 'inname': ";".join(keywords[:2]),  # Use only first 2 keywords
+                'site': 'stackoverflow', 'pagesize': max_results})
+            logger.debug("Stack Overflow API %s returned %s", url, response.status_code)
 
             if response.status_code == 200:
                 data = response.json()
-                print(f"📊 Stack Overflow found {len(data.get('items', []))} users")
-        for user in data.get('items', [])[:max_results]:
-            candidate = {
-                'name': user.get('display_name', 'Stack Overflow User'),
-                'title': 'Technical Expert',
-                'location': user.get('location', 'Global'),
-                'source': 'Stack Overflow',
-                'profile_url': user.get('link', ''),
-                'skills': keywords[:3],
-                'experience_level': 'Senior' if user.get('reputation', 0) > 5000 else 'Mid-level',
-                'reputation': user.get('reputation', 0)
-            }
-            candidates.append(candidate)
-        else:
-            print(f"⚠️ Stack Overflow API returned {response.status_code}")
+                for user in data.get('items', [])[:max_results]:
+                    candidate = {
+                        'name': user.get('display_name', 'Stack Overflow User'),
+                        'title': 'Technical Expert',
+                        'location': user.get('location', 'Global'),
+                        'source': 'Stack Overflow',
+                        'profile_url': user.get('link', ''),
+                        'skills': keywords[:3],
+                        'experience_level': 'Senior' if user.get('reputation', 0) > 5000 else 'Mid-level',
+                        'reputation': user.get('reputation', 0)
+                    }
+                    candidates.append(candidate)
+            else:
+                logger.warning("Stack Overflow API returned %s", response.status_code)
 
         except Exception as e:
-        print(f"⚠️ Stack Overflow API error: {e}")
+            logger.warning("Stack Overflow API error: %s", e)
 
-    return candidates
+        return candidates
 
     def extract_keywords(self, job_description):
         """Extract keywords from job description"""
-        technical_skills = [
-            'python', 'javascript', 'java', 'react', 'node', 'aws', 'docker',
-            'kubernetes', 'sql', 'mongodb', 'machine learning', 'ai'
-        ]
-
-        job_desc_lower = job_description.lower()
-        found_skills = [skill for skill in technical_skills if skill in job_desc_lower]
+        found_skills = SKILL_MATCHER.extract(job_description)
 
         if not found_skills:
             # Fallback to general terms
@@ -137,7 +181,7 @@ class ProfessionalDataAggregator:
 
     def get_sample_professionals(self, keywords, max_results):
         """Generate sample profiles if APIs fail"""
-        print(" Generating sample professional profiles...")
+        logger.info("Generating sample professional profiles")
 
         sample_names = ["Arjun Patel", "Neha Gupta", "Sandeep Reddy", "Ananya Singh"]
         sample_titles = ["Software Engineer", "Full Stack Developer", "Data Scientist", "DevOps Engineer"]
@@ -160,7 +204,9 @@ class ProfessionalDataAggregator:
 
 
 # Test the class directly
-if name == "main":
+if __name__ == "__main__":
+    from logging_config import configure_logging
+    configure_logging()
     print(" Testing ProfessionalDataAggregator...")
     aggregator = ProfessionalDataAggregator()
     test_candidates = aggregator.search_professionals("Python developer with Django experience")